@@ -7,7 +7,7 @@ rmdir /s/q omsdk.egg-info
 python setup-omdrivers.py bdist_wheel --universal 
 rmdir /s/q build
 rmdir /s/q omdrivers.egg-info
-python setup-omsdk.py bdist_wheel --universal 
+python setup-omsdk.py bdist_wheel 
 rmdir /s/q build
 rmdir /s/q omsdk.egg-info
 rem python setup.py bdist_wheel --universal 
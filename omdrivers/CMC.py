@@ -26,7 +26,7 @@ import sys
 from enum import Enum
 from omsdk.sdkdevice import iDeviceRegistry, iDeviceDriver, iDeviceDiscovery
 from omsdk.sdkdevice import iDeviceTopologyInfo
-from omsdk.sdkproto import PWSMAN
+from omsdk.sdkproto import PWSMAN, ProtocolEnum
 from omsdk.sdkcenum import EnumWrapper, TypeHelper
 
 PY2 = sys.version_info[0] == 2
@@ -644,6 +644,9 @@ class CMC(iDeviceDiscovery):
         self.protofactory.addClassifier([CMCCompEnum.System])
         self.protofactory.addCTree(CMCComponentTree)
         self.protofactory.addSubsystemSpec(CMCSubsystemHealthSpec)
+        self.fingerprint = {
+            ProtocolEnum.WSMAN : { 'ProductName' : 'CMC|Chassis Management Controller' }
+        }
 
     def my_entitytype(self, pinfra, ipaddr, creds, protofactory):
         return CMCEntity(self.ref, protofactory, ipaddr, creds)
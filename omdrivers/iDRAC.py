@@ -3542,6 +3542,10 @@ class iDRAC(iDeviceDiscovery):
         self.protofactory.addSubsystemSpec(iDRACSubsystemHealthSpec)
         self.protofactory.addClassifier(iDRACClassifier)
         self.prefDiscOrder = 1
+        self.fingerprint = {
+            ProtocolEnum.WSMAN : { 'ProductName' : 'iDRAC' },
+            ProtocolEnum.REDFISH : { 'Product' : 'Integrated Dell Remote Access Controller|iDRAC' }
+        }
 
     def my_entitytype(self, pinfra, ipaddr, creds, protofactory):
         return iDRACEntity(self.ref, protofactory, ipaddr, creds, self.srcdir, 'iDRAC')
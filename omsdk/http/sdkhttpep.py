@@ -24,9 +24,11 @@ import requests
 import requests.adapters
 import requests.exceptions
 import requests.packages.urllib3
+import threading
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 from requests.packages.urllib3.exceptions import InsecurePlatformWarning
 from omsdk.sdkcenum import EnumWrapper, TypeHelper
+from omsdk.http.sdkhttppool import HttpPool
 import logging
 
 
@@ -34,7 +36,8 @@ AuthenticationTypeMap = {
     'Basic' : 1,
     'Digest' : 2,
     'OAuth1' : 3,
-    'OAuth2' : 4
+    'OAuth2' : 4,
+    'Session' : 5
 }
 AuthenticationType = EnumWrapper('AT', AuthenticationTypeMap).enum_type
 
@@ -69,6 +72,7 @@ class HttpEndPoint(object):
         self.pOptions = pOptions
         self.session = None
         self.headers = headers
+        self._lock = threading.Lock()
         self._logger = logging.getLogger(__name__)
         url_form = "https://{0}:{1}/wsman"
         if ':' in self.ipaddr:
@@ -76,9 +80,10 @@ class HttpEndPoint(object):
         self.endpoint = url_form.format(self.ipaddr, self.pOptions.port)
 
     def reset(self):
-        if not self.session is None:
-            self.session.close()
-            self.session = None
+        with self._lock:
+            if not self.session is None:
+                HttpPool.release(self.session)
+                self.session = None
 
     def reconnect(self):
         self.reset()
@@ -87,15 +92,18 @@ class HttpEndPoint(object):
     def connect(self):
         if self.session:
             return True
+        with self._lock:
+            if self.session:
+                return True
+            return self._connect()
+
+    def _connect(self):
         self._logger.debug("Attempting a connection to device")
         # requests.packages.urllib3.disable_warnings(InsecurePlatformWarning)
         # requests.packages.urllib3.disable_warnings(SNIMissingWarning)
         # if not self.pOptions.verify_ssl:
         #     requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
-        self.adapter = requests.adapters.HTTPAdapter(
-                pool_connections = 1,
-                max_retries = self.pOptions.max_retries)
         self.session = requests.Session()
         self.session.verify = self.pOptions.verify_ssl
         self.session.cert = self.pOptions.cert
@@ -104,7 +112,8 @@ class HttpEndPoint(object):
             self.session.auth = requests.auth.HTTPBasicAuth(self.creds.username,
                                                     self.creds.password)
         self.session.headers.update(self.headers)
-        self.session.mount("https", self.adapter)
+        self.adapter = HttpPool.mount(self.session, self.ipaddr,
+                                      self.pOptions.port, self.pOptions)
         self._logger.debug("Connection to device: complete")
         return True
 
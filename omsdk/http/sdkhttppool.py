@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#
+# Copyright © 2018 Dell Inc. or its subsidiaries. All rights reserved.
+# Dell, EMC, and other trademarks are trademarks of Dell Inc. or its subsidiaries.
+# Other trademarks may be trademarks of their respective owners.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import sys
+import time
+import logging
+import threading
+import requests
+import requests.adapters
+
+PY2 = sys.version_info[0] == 2
+PY3 = sys.version_info[0] == 3
+
+logger = logging.getLogger(__name__)
+
+
+class PooledHTTPAdapter(requests.adapters.HTTPAdapter):
+    """
+    HTTPAdapter shared by all the sessions talking to one host and port
+    """
+    def __init__(self, key, pool_size, max_retries):
+        if PY2:
+            super(PooledHTTPAdapter, self).__init__(pool_connections=1,
+                pool_maxsize=pool_size, max_retries=max_retries)
+        else:
+            super().__init__(pool_connections=1, pool_maxsize=pool_size,
+                             max_retries=max_retries)
+        self.key = key
+        self.refs = 0
+        self.last_used = time.time()
+        self._limits = {}
+        self._limits_lock = threading.Lock()
+
+    def limit(self, count):
+        """Semaphore capping the concurrent requests to the host
+
+        Shared by the sessions asking for the same count, and dropped
+        with the adapter.
+        """
+        count = max(1, count)
+        with self._limits_lock:
+            if count not in self._limits:
+                self._limits[count] = threading.BoundedSemaphore(count)
+            return self._limits[count]
+
+    def send(self, request, **kwargs):
+        self.last_used = time.time()
+        try:
+            if PY2:
+                return super(PooledHTTPAdapter, self).send(request, **kwargs)
+            else:
+                return super().send(request, **kwargs)
+        finally:
+            self.last_used = time.time()
+
+
+class HttpPoolManager(object):
+    """
+    Process wide pool of HTTPS connections, keyed by host and port
+
+    Every protocol instance keeps its own requests.Session for its
+    credentials and headers, but mounts the adapter of its host from
+    here. Connections, and the TLS sessions established on them, are
+    kept alive across drivers, reconnects and discovery attempts.
+    Connections idle for more than idle_timeout seconds are closed, on
+    the next mount or release or by a background timer.
+    """
+    def __init__(self, pool_size=4, idle_timeout=300):
+        """
+        :param pool_size: maximum number of connections kept per host
+        :param idle_timeout: time in seconds after which idle connections are closed
+        :type pool_size: int
+        :type idle_timeout: int
+        """
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self._adapters = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def _prefix(self, host, port):
+        if ':' in host:
+            return "https://[{0}]:{1}/".format(host, port)
+        return "https://{0}:{1}/".format(host, port)
+
+    def configure(self, pool_size=None, idle_timeout=None):
+        """Change the pool size and idle timeout
+
+        Adapters already handed out keep their pool size until they are
+        evicted.
+        """
+        with self._lock:
+            if pool_size is not None:
+                self.pool_size = max(1, pool_size)
+            if idle_timeout is not None:
+                self.idle_timeout = idle_timeout
+        self.evict_idle()
+
+    def mount(self, session, host, port, pOptions):
+        """Mount the shared adapter of host:port on session
+
+        :param session: session of the protocol instance
+        :param host: ip address or host name of the device
+        :param port: https port of the device
+        :param pOptions: protocol options, for max_retries and ssl settings
+        :type session: requests.Session
+        :type host: str
+        :type port: int
+        :type pOptions: omsdk.http.sdkhttpep.HttpEndPointOptions
+        :return: the adapter mounted
+        :rtype: PooledHTTPAdapter
+        """
+        self.evict_idle()
+        key = (str(host).lower(), int(port), pOptions.max_retries,
+               pOptions.verify_ssl, str(pOptions.cert))
+        with self._lock:
+            adapter = self._adapters.get(key)
+            if adapter is None:
+                adapter = PooledHTTPAdapter(key, self.pool_size,
+                                            pOptions.max_retries)
+                self._adapters[key] = adapter
+            adapter.refs = adapter.refs + 1
+            adapter.last_used = time.time()
+        session.mount(self._prefix(host, port), adapter)
+        self._schedule()
+        return adapter
+
+    def release(self, session):
+        """Close session, leaving the shared adapters and their connections open
+
+        :param session: session passed to mount()
+        :type session: requests.Session
+        """
+        for prefix in list(session.adapters):
+            adapter = session.adapters[prefix]
+            if isinstance(adapter, PooledHTTPAdapter):
+                del session.adapters[prefix]
+                with self._lock:
+                    adapter.refs = max(0, adapter.refs - 1)
+        session.close()
+        self.evict_idle()
+
+    def evict_idle(self):
+        """Close connections idle for more than idle_timeout seconds
+
+        Adapters no session refers to any more are dropped from the pool.
+        """
+        now = time.time()
+        idle = []
+        with self._lock:
+            for key in list(self._adapters):
+                adapter = self._adapters[key]
+                if now - adapter.last_used < self.idle_timeout:
+                    continue
+                if adapter.refs <= 0:
+                    del self._adapters[key]
+                idle.append(adapter)
+        for adapter in idle:
+            # closed pools are recreated on the next request
+            adapter.close()
+            adapter.last_used = now
+
+    def _schedule(self):
+        # evicts idle connections of a process which stopped opening sessions
+        with self._lock:
+            if self._timer is not None or not self._adapters:
+                return
+            self._timer = threading.Timer(max(1, self.idle_timeout), self._sweep)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _sweep(self):
+        with self._lock:
+            self._timer = None
+        self.evict_idle()
+        self._schedule()
+
+    def clear(self):
+        """Close all the pooled connections"""
+        with self._lock:
+            adapters = list(self._adapters.values())
+            self._adapters = {}
+        for adapter in adapters:
+            adapter.close()
+
+    def stats(self):
+        """Number of sessions using the pool of each host:port"""
+        retval = {}
+        with self._lock:
+            for (key, adapter) in self._adapters.items():
+                name = key[0] + ':' + str(key[1])
+                retval[name] = retval.get(name, 0) + adapter.refs
+        return retval
+
+
+HttpPool = HttpPoolManager()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#
+# Copyright © 2018 Dell Inc. or its subsidiaries. All rights reserved.
+# Dell, EMC, and other trademarks are trademarks of Dell Inc. or its subsidiaries.
+# Other trademarks may be trademarks of their respective owners.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import sys
+import json
+import time
+import hashlib
+import logging
+import threading
+import requests
+import requests.auth
+import requests.exceptions
+from omsdk.http.sdkhttppool import HttpPool
+
+PY2 = sys.version_info[0] == 2
+PY3 = sys.version_info[0] == 3
+
+logger = logging.getLogger(__name__)
+
+
+class RedfishSession(object):
+    """
+    X-Auth-Token session of one user on one device
+    """
+    def __init__(self, key):
+        self.key = key
+        self.token = None
+        self.location = None
+        self.refs = 0
+        self.logins = 0
+        # False once the device turned out not to have a SessionService
+        self.supported = True
+        # no login is attempted before retry_at after a failed one
+        self.retry_at = 0
+        self.backoff = 0
+        self._lock = threading.Lock()
+
+
+class RedfishSessionCache(object):
+    """
+    Redfish SessionService logins shared by all the protocol instances
+
+    One session is opened per device, port and user, on first use. It is
+    reused by every protocol instance talking to that device, opened
+    again when the device answers 401, and logged out when the last
+    instance using it is reset.
+
+    A failed login is not attempted again for login_backoff seconds,
+    doubling with each further failure up to max_login_backoff, so that
+    bad credentials do not lock the account on the device. Requests go
+    with Basic authentication meanwhile.
+    """
+    login_backoff = 30
+    max_login_backoff = 900
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _key(self, ipaddr, creds, pOptions):
+        # the password is only kept as a digest in the key
+        digest = hashlib.sha256((creds.username + '\0' + creds.password).encode('utf-8'))
+        return (str(ipaddr).lower(), int(pOptions.port), creds.username, digest.hexdigest())
+
+    def acquire(self, ipaddr, creds, pOptions):
+        """Get the session of the user on the device, counting a new reference
+
+        :return: the session, logged in lazily by token()
+        :rtype: RedfishSession
+        """
+        key = self._key(ipaddr, creds, pOptions)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = RedfishSession(key)
+                self._sessions[key] = session
+            session.refs = session.refs + 1
+        return session
+
+    def release(self, session, pOptions):
+        """Drop a reference to the session, logging out after the last one"""
+        with self._lock:
+            session.refs = max(0, session.refs - 1)
+            if session.refs > 0:
+                return
+            if self._sessions.get(session.key) is session:
+                del self._sessions[session.key]
+        self.logout(session, pOptions)
+
+    def token(self, session, creds, pOptions, stale=None):
+        """Get the token of the session, logging in if there is none
+
+        :param creds: credentials of the user of the session
+        :param stale: token rejected by the device, which is replaced by a new login
+        :return: X-Auth-Token, None if the device does not support sessions
+            or the last login failed less than the backoff ago
+        :rtype: str
+        """
+        with session._lock:
+            if not session.supported:
+                return None
+            if session.token is None or session.token == stale:
+                if time.time() < session.retry_at:
+                    return None
+                self._login(session, creds, pOptions)
+            return session.token
+
+    def _url(self, session, pOptions, path):
+        (host, port) = session.key[0:2]
+        if ':' in host:
+            return "https://[{0}]:{1}{2}".format(host, port, path)
+        return "https://{0}:{1}{2}".format(host, port, path)
+
+    def _session(self, session, pOptions):
+        http = requests.Session()
+        http.verify = pOptions.verify_ssl
+        http.cert = pOptions.cert
+        HttpPool.mount(http, session.key[0], session.key[1], pOptions)
+        return http
+
+    def _failed(self, session):
+        session.backoff = min(self.max_login_backoff,
+                              max(self.login_backoff, session.backoff * 2))
+        session.retry_at = time.time() + session.backoff
+        logger.debug(session.key[0] + ": next Redfish session login in " +
+                     str(session.backoff) + " seconds")
+
+    def _login(self, session, creds, pOptions):
+        host = session.key[0]
+        url = self._url(session, pOptions,
+                        '/' + pOptions.urlbase + '/SessionService/Sessions')
+        session.token = None
+        session.location = None
+        http = self._session(session, pOptions)
+        try:
+            response = http.post(url, data=json.dumps({'UserName': creds.username,
+                                                       'Password': creds.password}),
+                                 headers={'Content-Type': 'application/json'},
+                                 timeout=(pOptions.connection_timeout, pOptions.read_timeout))
+            if response.status_code in [200, 201] and 'X-Auth-Token' in response.headers:
+                session.token = response.headers['X-Auth-Token']
+                session.location = response.headers.get('Location', None)
+                session.logins = session.logins + 1
+                session.backoff = 0
+                session.retry_at = 0
+                logger.debug(host + ": Redfish session created")
+            else:
+                logger.debug(host + ": Redfish session login failed with status code " +
+                             str(response.status_code))
+                if response.status_code not in [401, 403]:
+                    session.supported = False
+                else:
+                    self._failed(session)
+            response.close()
+        except requests.exceptions.RequestException as ex:
+            logger.debug(host + ": Redfish session login failed: " + str(ex))
+            self._failed(session)
+        finally:
+            HttpPool.release(http)
+
+    def logout(self, session, pOptions):
+        with session._lock:
+            token = session.token
+            location = session.location
+            session.token = None
+            session.location = None
+        if token is None or location is None:
+            return
+        if not location.startswith('http'):
+            location = self._url(session, pOptions, location)
+        http = self._session(session, pOptions)
+        try:
+            response = http.delete(location, headers={'X-Auth-Token': token},
+                                   timeout=(pOptions.connection_timeout, pOptions.read_timeout))
+            logger.debug(session.key[0] + ": Redfish session deleted with status code " +
+                         str(response.status_code))
+            response.close()
+        except requests.exceptions.RequestException as ex:
+            logger.debug(session.key[0] + ": Redfish session logout failed: " + str(ex))
+        finally:
+            HttpPool.release(http)
+
+
+RedfishSessions = RedfishSessionCache()
+
+
+class RedfishTokenAuth(requests.auth.AuthBase):
+    """
+    requests authentication with a shared Redfish X-Auth-Token
+
+    Falls back to Basic authentication when the device does not hand out
+    a session token. A request rejected with 401 is sent once more after
+    logging in again.
+    """
+    def __init__(self, ipaddr, creds, pOptions, cache=None):
+        if cache is None:
+            cache = RedfishSessions
+        self.cache = cache
+        self.ipaddr = ipaddr
+        self.creds = creds
+        self.pOptions = pOptions
+        self.basic = requests.auth.HTTPBasicAuth(creds.username, creds.password)
+        self.session = None
+        self._lock = threading.Lock()
+        self._thread_local = threading.local()
+
+    def _apply(self, r, token):
+        if token is None:
+            r.headers.pop('X-Auth-Token', None)
+            return self.basic(r)
+        r.headers.pop('Authorization', None)
+        r.headers['X-Auth-Token'] = token
+        return r
+
+    def _get_session(self):
+        with self._lock:
+            if self.session is None:
+                self.session = self.cache.acquire(self.ipaddr, self.creds, self.pOptions)
+            return self.session
+
+    def __call__(self, r):
+        token = self.cache.token(self._get_session(), self.creds, self.pOptions)
+        self._thread_local.token = token
+        self._thread_local.retried = False
+        r.register_hook('response', self.handle_401)
+        return self._apply(r, token)
+
+    def handle_401(self, r, **kwargs):
+        if r.status_code != 401 or self._thread_local.retried:
+            return r
+        stale = self._thread_local.token
+        if stale is None:
+            return r
+        self._thread_local.retried = True
+        token = self.cache.token(self._get_session(), self.creds, self.pOptions, stale)
+        # Consume content and release the connection for the new request
+        r.content
+        r.close()
+        prep = r.request.copy()
+        self._apply(prep, token)
+        _r = r.connection.send(prep, **kwargs)
+        _r.history.append(r)
+        _r.request = prep
+        return _r
+
+    def logout(self):
+        """Release the shared session, logging out if nobody else uses it"""
+        with self._lock:
+            session = self.session
+            self.session = None
+        if session is not None:
+            self.cache.release(session, self.pOptions)
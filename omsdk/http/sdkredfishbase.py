@@ -23,6 +23,7 @@
 import sys
 import logging
 import json
+import hashlib
 
 import requests
 import requests.adapters
@@ -35,6 +36,10 @@ from omsdk.sdkprotobase import ProtocolBase
 from omsdk.sdkcenum import EnumWrapper, TypeHelper
 from omsdk.sdkprotopref import ProtoPreference, ProtocolEnum
 from omsdk.http.sdkhttpep import HttpEndPoint, HttpEndPointOptions, AuthenticationType
+from omsdk.http.sdkhttppool import HttpPool
+from omsdk.http.sdkredfishauth import RedfishTokenAuth
+from omsdk.http.sdkredfishcache import RedfishResponses
+from omsdk.sdkworkers import WorkerPool
 import time
 
 logger = logging.getLogger(__name__)
@@ -47,20 +52,27 @@ class RedfishOptions(HttpEndPointOptions):
     """
     def __init__(
                  self, urlbase='redfish/v1', authentication = AuthenticationType.Basic, port = 443, connection_timeout = 20,
-                 read_timeout = 30, max_retries = 1, verify_ssl = False, cert=None, cacheTimeout=180 
+                 read_timeout = 30, max_retries = 1, verify_ssl = False, cert=None, cacheTimeout=180,
+                 parallel_requests = 4, use_expand = True
                 ):
         """
-                :param authentication: HTTP Authentication type 'Basic', 'Digest'
+                :param authentication: HTTP Authentication type 'Basic', 'Digest', 'Session' (X-Auth-Token)
                 :param port: https Port number for Redfish communication
                 :param connection_timeout: time in seconds to wait for the server to connect before giving up
                 :param read_timeout: time in seconds to wait for the server to read data before giving up
                 :param max_retries: Http connection retries in case of failures
                 :param verify_ssl: SSL Certificate verification
+                :param cacheTimeout: time in seconds responses are cached, unless a RedfishCache rule says otherwise
+                :param parallel_requests: maximum number of concurrent GETs to the device while following links
+                :param use_expand: fetch collection members inline with $expand, when the service supports it
                 :type authentication: Enum omsdk.http.sdkhttpep.AuthenticationType
                 :type port: Int
                 :type connection_timeout: Int
                 :type read_timeout: Int
                 :type verify_ssl: Boolean
+                :type cacheTimeout: Int
+                :type parallel_requests: Int
+                :type use_expand: Boolean
         """
         if PY2:
             super(RedfishOptions, self).__init__(
@@ -75,6 +87,12 @@ class RedfishOptions(HttpEndPointOptions):
         self.enid = ProtocolEnum.REDFISH
         self.urlbase = urlbase
         self.cacheTimeout = cacheTimeout #cache timeout in seconds
+        self.parallel_requests = parallel_requests
+        self.use_expand = use_expand
+
+class RedfishCollectionException(Exception):
+    pass
+
 
 class RedfishProtocolBase(ProtocolBase):
     def __init__(self, ipaddr, creds, pOptions):
@@ -84,12 +102,20 @@ class RedfishProtocolBase(ProtocolBase):
             super().__init__()
         headers = None
         self._logger = logging.getLogger(__name__)
-        self.cache = {}
+        # shared by all the instances, keyed by credentials and url so that
+        # responses are only served to callers the device has authenticated
+        self.cache = RedfishResponses
+        digest = hashlib.sha256((creds.username + '\0' + creds.password).encode('utf-8'))
+        self.cache_creds = (creds.username, digest.hexdigest())
         self.data_cache = {}
+        self.features = None
         self.session = requests.session()
         self.pOptions = pOptions
         self.session.verify = self.pOptions.verify_ssl
         self.session.cert = self.pOptions.cert
+        adapter = HttpPool.mount(self.session, ipaddr, self.pOptions.port, self.pOptions)
+        # caps the concurrent GETs to the host
+        self._limit = adapter.limit(getattr(self.pOptions, 'parallel_requests', 1))
         if not self.pOptions.verify_ssl: 
             requests.packages.urllib3.disable_warnings()
         if self.pOptions.authentication == AuthenticationType.Basic:
@@ -97,6 +123,8 @@ class RedfishProtocolBase(ProtocolBase):
         if self.pOptions.authentication == AuthenticationType.Digest:
             print("Digest authentication not yet implimented")
             self.session.auth = HTTPDigestAuth(creds.username, creds.password)
+        if self.pOptions.authentication == AuthenticationType.Session:
+            self.session.auth = RedfishTokenAuth(ipaddr, creds, self.pOptions)
         if self.pOptions.authentication == AuthenticationType.OAuth1:
             print("OAuth1 authentication not yet implimented")
         if self.pOptions.authentication == AuthenticationType.OAuth2:
@@ -104,7 +132,9 @@ class RedfishProtocolBase(ProtocolBase):
 
     def reset(self, ignore=True):
         if self.session:
-            self.session.close()
+            if isinstance(self.session.auth, RedfishTokenAuth):
+                self.session.auth.logout()
+            HttpPool.release(self.session)
             self.session = None
 
     def identify(self):
@@ -137,20 +167,322 @@ class RedfishProtocolBase(ProtocolBase):
         pass
 
     def fetch_cache(self, url):
-        if url in self.cache:
-            respDict = self.cache[url]
-            rt = respDict['time']
-            ct = int(time.time())
-            if (ct-rt) < self.pOptions.cacheTimeout:
-                return respDict['response']
+        (response, etag) = self.cache.lookup((self.cache_creds, url))
+        return response
+
+    def add_cache(self, url, response, etag=None):
+        self.cache.add((self.cache_creds, url), response, etag,
+                       self.cache.ttl(url, self.pOptions.cacheTimeout))
+
+    def _get_json(self, url, cache=True):
+        """GET one resource
+
+        :return: (True, json, status code) on success, (False, None, status code)
+            on an error status, (None, None, None) when the device could not be reached
+        """
+        etag = None
+        headers = None
+        if cache:
+            key = (self.cache_creds, url)
+            (cachData, etag) = self.cache.lookup(key)
+            if cachData:
+                return (True, cachData, 200)
+            if etag:
+                headers = {'If-None-Match': etag}
+        with self._limit:
+            try:
+                memResponse = self.session.get(url, headers=headers, timeout=(self.pOptions.connection_timeout, self.pOptions.read_timeout))
+                cachData = None
+                if memResponse.status_code == 304 and etag:
+                    cachData = self.cache.revalidate(key, self.cache.ttl(url, self.pOptions.cacheTimeout))
+                    if cachData is None:
+                        # evicted meanwhile, fetch it again
+                        memResponse.close()
+                        memResponse = self.session.get(url, timeout=(self.pOptions.connection_timeout, self.pOptions.read_timeout))
+                if cachData:
+                    retval = (True, cachData, 200)
+                elif (memResponse.ok and memResponse.status_code != 304):
+                    compjData = json.loads(memResponse.content)
+                    if cache:
+                        self.add_cache(url, compjData, memResponse.headers.get('ETag', None))
+                    retval = (True, compjData, memResponse.status_code)
+                else:
+                    logger.debug("GET Request Failed - URL : {0}  Status Code : {1}  Reason : {2}".format(memResponse.url, memResponse.status_code, memResponse.reason))
+                    retval = (False, None, memResponse.status_code)
+                memResponse.close()
+                return retval
+            except requests.exceptions.ConnectionError as err:
+                logger.debug(err)
+            except requests.exceptions.Timeout as err:
+                logger.debug(err)
+        return (None, None, None)
+
+    def _get_member(self, url, query=None, cache=True):
+        """GET one resource of a link walk
+
+        A query the service rejects is dropped from the protocol features
+        and the resource is fetched again without it.
+
+        :return: (True, json) on success, (False, None) on an error status,
+            (None, None) when the device could not be reached
+        """
+        if query:
+            (ok, compjData, status) = self._get_json(url + '?' + query, cache)
+            if ok or status not in [400, 405, 501]:
+                return (ok, self._merge_pages(compjData))
+            logger.debug(self.ipaddr + ": query not supported, disabling " + query)
+            self._drop_feature(query)
+        (ok, compjData, status) = self._get_json(url, cache)
+        return (ok, self._merge_pages(compjData))
+
+    def _link_url(self, link):
+        if link.startswith('http'):
+            return link
+        return self._service_url(link)
+
+    def _collection_pages(self, url, cache=True):
+        """Yield the pages of a collection, following Members@odata.nextLink
+
+        :raises RedfishCollectionException: when a page cannot be fetched
+        """
+        seen = set()
+        while url and url not in seen:
+            seen.add(url)
+            (ok, page, status) = self._get_json(url, cache)
+            if not ok:
+                raise RedfishCollectionException(
+                    "Failed to get " + url + ", status code " + str(status))
+            yield page
+            link = page.get('Members@odata.nextLink', None)
+            url = None
+            if link:
+                url = self._link_url(link)
+
+    def _merge_pages(self, compjData):
+        """Collection with the members of all its pages
+
+        The cached first page is left as is. A page that cannot be fetched
+        ends the collection with the members read so far.
+        """
+        if not isinstance(compjData, dict) or not compjData.get('Members@odata.nextLink', None):
+            return compjData
+        merged = dict(compjData)
+        merged['Members'] = list(compjData.get('Members', []))
+        del merged['Members@odata.nextLink']
+        pages = self._collection_pages(self._link_url(compjData['Members@odata.nextLink']))
+        try:
+            for page in pages:
+                merged['Members'].extend(page.get('Members', []))
+        except RedfishCollectionException as ex:
+            logger.debug(self.ipaddr + ": " + str(ex))
+        return merged
+
+    def _path_url(self, path):
+        if path.startswith('http'):
+            return path
+        if not path.startswith('/'):
+            path = '/' + self.pOptions.urlbase + '/' + path
+        return self._service_url(path)
+
+    def get_resource(self, path, cache=True):
+        """GET a single resource
+
+        :param path: path of the resource, relative to urlbase unless it starts with /
+        :param cache: False to bypass the response cache
+        :type path: str
+        :type cache: bool
+        :return: {'Status': 'Success', 'Data': json} or {'Status': 'Failed', 'Message': ...}
+        :rtype: dict
+        """
+        url = self._path_url(path)
+        (ok, compjData, status) = self._get_json(url, cache)
+        if ok:
+            return {'Status': 'Success', 'Data': compjData}
+        return {'Status': 'Failed', 'Message': 'GET ' + url + ' failed with status code ' + str(status)}
+
+    def post_resource(self, path, payload):
+        """POST a json payload to a resource
+
+        :param path: path of the resource, relative to urlbase unless it starts with /
+        :param payload: body of the request
+        :type path: str
+        :type payload: dict
+        :return: {'Status': 'Success', 'Data': json, 'Location': location} or {'Status': 'Failed', 'Message': ...}
+        :rtype: dict
+        """
+        return self._send('POST', path, payload)
+
+    def delete_resource(self, path):
+        """DELETE a resource
+
+        :param path: path of the resource, relative to urlbase unless it starts with /
+        :type path: str
+        :return: {'Status': 'Success'} or {'Status': 'Failed', 'Message': ...}
+        :rtype: dict
+        """
+        return self._send('DELETE', path)
+
+    def _send(self, method, path, payload=None):
+        url = self._path_url(path)
+        data = None
+        if payload is not None:
+            data = json.dumps(payload)
+        try:
+            response = self.session.request(method, url, data=data,
+                                            headers={'Content-Type': 'application/json'},
+                                            timeout=(self.pOptions.connection_timeout, self.pOptions.read_timeout))
+        except requests.exceptions.RequestException as err:
+            logger.debug(err)
+            return {'Status': 'Failed', 'Message': str(err)}
+        retval = {'Status': 'Success', 'Data': {}}
+        if not response.ok:
+            retval = {'Status': 'Failed',
+                      'Message': method + ' ' + url + ' failed with status code ' + str(response.status_code)}
+        try:
+            if response.content:
+                retval['Data'] = response.json()
+        except ValueError:
+            pass
+        if 'Location' in response.headers:
+            retval['Location'] = response.headers['Location']
+        response.close()
+        return retval
+
+    def iterate_members(self, path, top=None, skip=None, expand=False):
+        """Yield the members of a collection, page by page
+
+        Members@odata.nextLink is followed as the members are consumed, so
+        the collection is never held in full. Pages and members are always
+        read from the service, bypassing the response cache. $top and $skip are sent to
+        the service when it supports them and applied here otherwise.
+
+        :param path: path of the collection, relative to urlbase unless it starts with /
+        :param top: maximum number of members to yield
+        :param skip: number of members to skip
+        :param expand: True to fetch members the service returns as links only
+        :type path: str
+        :type top: int
+        :type skip: int
+        :type expand: bool
+        :raises RedfishCollectionException: when a page cannot be fetched
+        """
+        url = self._path_url(path)
+        args = []
+        if (top is not None or skip) and self._protocol_features()['topskip']:
+            if skip:
+                args.append('$skip=' + str(skip))
+            if top is not None:
+                args.append('$top=' + str(top))
+            skip = 0
+        if args:
+            url = url + '?' + '&'.join(args)
+        count = 0
+        skip = skip or 0
+        for page in self._collection_pages(url, False):
+            members = page.get('Members', [])
+            if skip >= len(members):
+                skip = skip - len(members)
+                continue
+            members = members[skip:]
+            skip = 0
+            if top is not None:
+                members = members[0:top - count]
+            if expand:
+                members = self._expand_members(members)
+            for member in members:
+                count = count + 1
+                yield member
+            if top is not None and count >= top:
+                break
+
+    def _expand_members(self, members):
+        fetch = []
+        for member in members:
+            if self._is_expanded(member) or '@odata.id' not in member:
+                fetch.append((None, member))
+            else:
+                fetch.append((self._link_url(member['@odata.id']), None))
+        retval = []
+        for (ok, compjData) in self._get_members(fetch, set(), None, False):
+            if ok:
+                retval.append(compjData)
+        return retval
+
+    def _get_members(self, members, seen, query=None, cache=True):
+        """GET the sibling resources of one level of a link walk concurrently
+
+        :param members: (url, resource) tuples, resource being the member
+            already expanded inline by the service or None to fetch it
+        :param seen: urls already requested in the walk, which are skipped
+        :param query: query to add to the urls fetched
+        :param cache: False to bypass the response cache
+        :return: (ok, json) in the order of members
+        """
+        todo = []
+        for (url, inline) in members:
+            if url is None:
+                todo.append((url, inline))
+            elif url not in seen:
+                seen.add(url)
+                todo.append((url, inline))
+        retval = [(True, inline) for (url, inline) in todo]
+        fetch = [i for i in range(0, len(todo)) if todo[i][1] is None]
+        workers = min(len(fetch), getattr(self.pOptions, 'parallel_requests', 1))
+        if workers <= 1:
+            for i in fetch:
+                retval[i] = self._get_member(todo[i][0], query, cache)
+            return retval
+        with WorkerPool(workers, name="omsdk-redfish") as pool:
+            items = [(i, pool.submit(self._get_member, todo[i][0], query, cache)) for i in fetch]
+            for (i, item) in items:
+                retval[i] = item.get()
+        return retval
+
+    def _service_url(self, path):
+        if ':' in self.ipaddr:
+            return "https://[" + self.ipaddr + ']:' + str(self.pOptions.port) + path
+        return "https://" + self.ipaddr + ':' + str(self.pOptions.port) + path
+
+    def _protocol_features(self):
+        """Query capabilities of the service, from ProtocolFeaturesSupported of the service root
+
+        :return: {'expand': bool, 'topskip': bool}
+        :rtype: dict
+        """
+        if self.features is None:
+            features = {'expand': False, 'topskip': False}
+            (ok, root, status) = self._get_json(self._service_url('/' + self.pOptions.urlbase + '/'))
+            supported = {}
+            if ok:
+                supported = root.get('ProtocolFeaturesSupported', {})
+            expand = supported.get('ExpandQuery', {})
+            if isinstance(expand, dict):
+                features['expand'] = bool(expand.get('NoLinks', False) and expand.get('Levels', False))
+            features['topskip'] = bool(supported.get('TopSkipQuery', False))
+            self.features = features
+        return self.features
+
+    def _drop_feature(self, query):
+        features = self._protocol_features()
+        for name in list(features):
+            if query.startswith('$' + name):
+                features[name] = False
+
+    def _walk_query(self, resource, ix):
+        """Query for the resources fetched at step ix of the path list
+
+        Collections whose members are walked next are expanded.
+        """
+        if ix < len(resource) and resource[ix] == 'Members':
+            if getattr(self.pOptions, 'use_expand', False) and self._protocol_features()['expand']:
+                return '$expand=.($levels=1)'
         return None
 
-    def add_cache(self, url, response):
-        ts = time.time()
-        respDict = {}
-        respDict['time'] = int(ts)
-        respDict['response'] = response
-        self.cache[url] = respDict
+    def _is_expanded(self, member):
+        for key in member:
+            if not key.startswith('@odata.'):
+                return True
+        return False
 
     def _communicate(self, clsName, resource):
         out = self._parse_output(clsName, resource)
@@ -185,7 +517,7 @@ class RedfishProtocolBase(ProtocolBase):
                     self.pOptions.connection_timeout, self.pOptions.read_timeout))
                     if (memResponse.ok):
                         # retval['Status'] = 'Success'
-                        compjData = json.loads(memResponse.content)
+                        compjData = self._merge_pages(json.loads(memResponse.content))
 
                         if resource.get('attribute', None):
                             if compjData.get(resource['attribute'], None):
@@ -251,35 +583,29 @@ class RedfishProtocolBase(ProtocolBase):
             oDataList.append(oDataDict)
             rlen = len(resource)
             xcomp = []
+            seen = set()
+            expanded = False
             while ix<rlen:
                 xcomp = []
                 tflag = False
                 ix = ix + 1
+                members = []
                 for mem in oDataList:
                     url = "https://" + self.ipaddr + ':' + str(self.pOptions.port) + mem[odataid]
                     if ':' in self.ipaddr:
                         url = "https://[" + self.ipaddr + ']:' + str(self.pOptions.port) + mem[odataid]
-                    cachData = self.fetch_cache(url)
-                    if cachData:
-                        compjData = cachData
-                        xcomp.append(compjData)
-                        retval['Status'] = 'Success'
+                    if expanded and self._is_expanded(mem):
+                        members.append((url, mem))
                     else:
-                        try:
-                            memResponse = self.session.get(url, timeout=(self.pOptions.connection_timeout, self.pOptions.read_timeout))
-                            if (memResponse.ok):
-                                retval['Status'] = 'Success'
-                                compjData = json.loads(memResponse.content)
-                                self.add_cache(url,compjData)
-                                xcomp.append(compjData)
-                            else:
-                                retval['Status'] = 'Failure'
-                                logger.debug("GET Request Failed - URL : {0}  Status Code : {1}  Reason : {2}".format(memResponse.url, memResponse.status_code, memResponse.reason))
-                            memResponse.close()
-                        except requests.exceptions.ConnectionError as err:
-                            logger.debug(err)
-                        except requests.exceptions.Timeout as err:
-                            logger.debug(err)
+                        members.append((url, None))
+                query = self._walk_query(resource, ix)
+                expanded = query is not None and query.startswith('$expand')
+                for (ok, compjData) in self._get_members(members, seen, query):
+                    if ok:
+                        retval['Status'] = 'Success'
+                        xcomp.append(compjData)
+                    elif ok is not None:
+                        retval['Status'] = 'Failure'
                 intrmOdataList = []
                 for xc in xcomp:##Members flow
                     if ix < rlen:
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#
+# Copyright © 2018 Dell Inc. or its subsidiaries. All rights reserved.
+# Dell, EMC, and other trademarks are trademarks of Dell Inc. or its subsidiaries.
+# Other trademarks may be trademarks of their respective owners.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import re
+import sys
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+PY2 = sys.version_info[0] == 2
+PY3 = sys.version_info[0] == 3
+
+logger = logging.getLogger(__name__)
+
+
+class RedfishCache(object):
+    """
+    Size bounded LRU cache of Redfish responses
+
+    Entries expire after a time to live chosen per resource. Expired
+    entries holding an ETag are kept for revalidation: the caller sends
+    If-None-Match and refreshes the entry when the service answers 304.
+    """
+    # (regex on the url, time to live in seconds), first match wins
+    DefaultTTLs = [
+        (r'/(Thermal|Power|Sensors)(/|#|$)', 30),
+    ]
+
+    def __init__(self, max_entries=4096, ttls=None):
+        """
+        :param max_entries: maximum number of responses kept
+        :param ttls: list of (url regex, seconds) overriding the default time to live
+        :type max_entries: int
+        :type ttls: list
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.set_ttls(ttls)
+        self.reset_stats()
+
+    def set_ttls(self, ttls=None):
+        if ttls is None:
+            ttls = self.DefaultTTLs
+        self._ttls = [(re.compile(pattern), ttl) for (pattern, ttl) in ttls]
+
+    def ttl(self, url, default):
+        """Time to live of the resource at url
+
+        :param default: time to live when no rule matches
+        """
+        for (pattern, ttl) in self._ttls:
+            if pattern.search(url):
+                return ttl
+        return default
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'Entries': len(self._entries),
+                'Hits': self.hits,
+                'Misses': self.misses,
+                'Revalidated': self.revalidated,
+                'Evictions': self.evictions,
+                'Expirations': self.expirations
+            }
+
+    def lookup(self, key):
+        """Find a response
+
+        :return: (response, None) for a fresh entry, (None, etag) for an
+            expired entry to revalidate, (None, None) when there is nothing
+        """
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is None:
+                self.misses = self.misses + 1
+                return (None, None)
+            (response, etag, expires) = entry
+            self._touch(key, entry)
+            if time.time() < expires:
+                self.hits = self.hits + 1
+                return (response, None)
+            self.misses = self.misses + 1
+            if etag is None:
+                self.expirations = self.expirations + 1
+                del self._entries[key]
+            return (None, etag)
+
+    def _touch(self, key, entry):
+        del self._entries[key]
+        self._entries[key] = entry
+
+    def add(self, key, response, etag=None, ttl=180):
+        evicted = 0
+        with self._lock:
+            if key in self._entries:
+                del self._entries[key]
+            self._entries[key] = (response, etag, time.time() + ttl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted = evicted + 1
+            self.evictions = self.evictions + evicted
+
+    def revalidate(self, key, ttl=180):
+        """Extend an entry the service confirmed with 304
+
+        :return: the cached response, None if it was evicted meanwhile
+        """
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is None:
+                return None
+            (response, etag, expires) = entry
+            self._entries[key] = (response, etag, time.time() + ttl)
+            self.revalidated = self.revalidated + 1
+            return response
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+RedfishResponses = RedfishCache()
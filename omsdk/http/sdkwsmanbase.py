@@ -25,6 +25,7 @@ import io
 import logging
 import traceback
 import json
+import threading
 from enum import Enum
 
 import xml.etree.ElementTree as ET
@@ -40,6 +41,7 @@ from omsdk.sdkprotobase import ProtocolBase
 from omsdk.sdkcenum import EnumWrapper, TypeHelper
 from omsdk.http.sdkwsmanpdu import WsManRequest, WsManResponse
 from omsdk.http.sdkhttpep import HttpEndPoint, HttpEndPointOptions, AuthenticationType
+from omsdk.http.sdkhttppool import HttpPool
 from omsdk.sdkprotopref import ProtoPreference, ProtocolEnum
 from omsdk.sdkprint import PrettyPrint
 import logging
@@ -66,7 +68,7 @@ class WsManOptions(HttpEndPointOptions):
 
     def __init__(
             self, authentication=AuthenticationType.Basic, port=443, connection_timeout=20,
-            read_timeout=30, max_retries=1, verify_ssl=False, cert = None
+            read_timeout=30, max_retries=1, verify_ssl=False, cert = None, page_size=32000
     ):
         """
         :param authentication: HTTP Authentication type 'Basic', 'Digest'
@@ -75,11 +77,13 @@ class WsManOptions(HttpEndPointOptions):
         :param read_timeout: time in seconds to wait for the server to read data before giving up
         :param max_retries: Http connection retries in case of failures
         :param verify_ssl: SSL Certificate verification
+        :param page_size: maximum number of instances fetched per Enumerate/Pull request
         :type authentication: Enum omsdk.http.sdkhttpep.AuthenticationType
         :type port: Int
         :type connection_timeout: Int
         :type read_timeout: Int
         :type verify_ssl: Boolean
+        :type page_size: Int
         """
 
         if PY2:
@@ -93,6 +97,11 @@ class WsManOptions(HttpEndPointOptions):
                 read_timeout, max_retries, verify_ssl, cert
             )
         self.enid = ProtocolEnum.WSMAN
+        self.page_size = page_size
+
+
+class WsManEnumerationException(Exception):
+    pass
 
 
 class WsManProtocolBase(ProtocolBase):
@@ -104,8 +113,12 @@ class WsManProtocolBase(ProtocolBase):
             super().__init__()
         headers = None
         self._logger = logging.getLogger(__name__)
+        self.pOptions = pOptions
+        self.redfish_session = None
+        self._redfish_lock = threading.Lock()
 
     def reset(self, ignore=True):
+        self._reset_redfish_session()
         self._proto_reset()
 
     def identify(self):
@@ -115,10 +128,83 @@ class WsManProtocolBase(ProtocolBase):
         return self._communicate(wsm)
 
     def enumerate(self, clsName, resource, select={}, resetTransport=False, filter=None):
+        retval = None
+        for page in self._enumerate_pages(resource, select, filter):
+            if page['Status'] != 'Success':
+                if retval is not None:
+                    self._logger.debug(str(resource) + ": Pull failed, returning partial data")
+                    return {'Status': page['Status'], 'Data': retval['Data'], 'Message': page.get('Message')}
+                return page
+            if retval is None:
+                retval = page
+            else:
+                self._merge_page(retval['Data'], page['Data'])
+        return retval
+
+    def enumerate_iter(self, resource, select={}, filter=None, page_size=None):
+        """Enumerate the instances of a resource one page at a time
+
+        Only one page of instances is held in memory at any time. Closing
+        the generator early releases the enumeration context on the device.
+
+        :param resource: resource uri of the class to enumerate
+        :param select: selectors
+        :param filter: WQL filter
+        :param page_size: instances per Enumerate/Pull request, defaults to WsManOptions.page_size
+        :return: generator of instances as dict
+        """
+        for page in self._enumerate_pages(resource, select, filter, page_size):
+            if page['Status'] != 'Success':
+                raise WsManEnumerationException(str(resource) + ": " + str(page.get('Message', page['Status'])))
+            for cls in page['Data']:
+                instances = page['Data'][cls]
+                if not isinstance(instances, list):
+                    instances = [instances]
+                for instance in instances:
+                    yield instance
+
+    def _enumerate_pages(self, resource, select, filter, page_size=None):
+        if page_size is None:
+            page_size = getattr(self.pOptions, 'page_size', 32000)
         wsm = WsManRequest()
         wsm.enumerate(to=self._proto_endpoint(), ruri=resource,
-                      selectors=select, filter=filter)
-        return self._communicate(wsm)
+                      selectors=select, filter=filter, maxElements=page_size)
+        out = self._communicate(wsm)
+        context = None
+        try:
+            while True:
+                context = None
+                if out['Status'] == 'Success':
+                    if out['Data'] is None:
+                        out['Data'] = {}
+                    if not out.get('EndOfSequence', True):
+                        context = out.get('EnumerationContext')
+                yield out
+                if not context:
+                    break
+                wsm = WsManRequest()
+                wsm.pull(to=self._proto_endpoint(), ruri=resource,
+                         selectors=select, context=context, maxElements=page_size)
+                out = self._communicate(wsm)
+        finally:
+            if context:
+                # enumeration abandoned half way
+                wsm = WsManRequest()
+                wsm.release(to=self._proto_endpoint(), ruri=resource,
+                            selectors=select, context=context)
+                self._communicate(wsm)
+
+    def _merge_page(self, data, page):
+        for cls in page:
+            instances = page[cls]
+            if not isinstance(instances, list):
+                instances = [instances]
+            if cls not in data:
+                data[cls] = instances
+                continue
+            if not isinstance(data[cls], list):
+                data[cls] = [data[cls]]
+            data[cls].extend(instances)
 
     # Operation Invoke
     def opget(self, ruri, name, args):
@@ -237,6 +323,27 @@ class WsManProtocolBase(ProtocolBase):
             method_args['data'] = '{}'
         return method_args
 
+    def _get_redfish_session(self):
+        """Keep-alive session for the redfish operations of this device
+
+        The session draws its connections from the shared HttpPool, so
+        repeated operations (job polling, SCP export/import) reuse the same
+        TLS connection instead of opening a new one per request.
+        """
+        with self._redfish_lock:
+            if self.redfish_session is None:
+                session = requests.Session()
+                session.auth = HTTPBasicAuth(self.proto.creds.username, self.proto.creds.password)
+                HttpPool.mount(session, self.proto.ipaddr, self.proto.pOptions.port, self.proto.pOptions)
+                self.redfish_session = session
+            return self.redfish_session
+
+    def _reset_redfish_session(self):
+        with self._redfish_lock:
+            if self.redfish_session is not None:
+                HttpPool.release(self.redfish_session)
+                self.redfish_session = None
+
     def _get_base_url(self, ipaddr, resouce_path, port=443):
         if ":" in ipaddr:
             baseurl = "https://[" + ipaddr + ']:' + str(port) + resouce_path
@@ -330,13 +437,13 @@ class WsManProtocolBase(ProtocolBase):
             redfish_payload = self._build_redfish_payload(toargs)
 
         url = self._get_base_url(ipaddr=self.proto.ipaddr, resouce_path=rpath, port=self.proto.pOptions.port)
-        auth = HTTPBasicAuth(self.proto.creds.username, self.proto.creds.password)
+        session = self._get_redfish_session()
         cert_verify = False
         headers = {'content-type': 'application/json'}
-        kwargs = self._pack_rest_method_args(auth=auth, verify=cert_verify, data=redfish_payload, headers=headers)
+        kwargs = self._pack_rest_method_args(auth=session.auth, verify=cert_verify, data=redfish_payload, headers=headers)
         retval = {}
         try:
-            response = requests.request(method=http_method, url=url, **kwargs)
+            response = session.request(method=http_method, url=url, **kwargs)
         except Exception as exp:
             logger.error(self.proto.ipaddr+" : Exception while executing redfish request: {}".format(exp))
             retval["Status"] = "Failed"
@@ -452,6 +559,13 @@ class WsManProtocolBase(ProtocolBase):
     # retval['Message'] = Message
     # retval['Return'] = enum(ReturnValue).value
     # retval['Job']['JobId'] = jobid
+    def _parse_context(self, retval, response):
+        # OptimizeEnumeration/Pull: more instances remain till EndOfSequence
+        retval['EndOfSequence'] = "EndOfSequence" in response
+        context = response.get("EnumerationContext")
+        if context and not isinstance(context, dict):
+            retval['EnumerationContext'] = context
+
     def _parse_output(self, en, name=None):
         retval = {}
         if "Header" in en:
@@ -480,6 +594,11 @@ class WsManProtocolBase(ProtocolBase):
         elif "EnumerateResponse" in en["Body"]:
             retval['Status'] = 'Success'
             retval['Data'] = en["Body"]["EnumerateResponse"]["Items"]
+            self._parse_context(retval, en["Body"]["EnumerateResponse"])
+        elif "PullResponse" in en["Body"]:
+            retval['Status'] = 'Success'
+            retval['Data'] = en["Body"]["PullResponse"].get("Items")
+            self._parse_context(retval, en["Body"]["PullResponse"])
         elif "IdentifyResponse" in en["Body"]:
             retval['Status'] = 'Success'
             retval['Data'] = en["Body"]
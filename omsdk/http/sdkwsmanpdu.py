@@ -38,6 +38,48 @@ logger = logging.getLogger(__name__)
 PY2 = sys.version_info[0] == 2
 PY3 = sys.version_info[0] == 3
 
+try:
+    from lxml import etree as lxml_etree
+    LxmlPresent = True
+except ImportError:
+    LxmlPresent = False
+
+
+class WsManTemplate(object):
+    """
+    Pre-rendered envelope with slots for the variable text
+    """
+    Marker = re.compile('\x01([0-9]+)\x01')
+
+    def __init__(self, text):
+        pieces = self.Marker.split(text)
+        self.texts = pieces[0::2]
+        self.slots = [int(i) for i in pieces[1::2]]
+
+    @staticmethod
+    def marker(slot):
+        return '\x01{0}\x01'.format(slot)
+
+    @staticmethod
+    def escape(value):
+        if value is None:
+            return ''
+        value = str(value)
+        if '&' in value:
+            value = value.replace('&', '&amp;')
+        if '<' in value:
+            value = value.replace('<', '&lt;')
+        if '>' in value:
+            value = value.replace('>', '&gt;')
+        return value
+
+    def render(self, values):
+        out = [self.texts[0]]
+        for (slot, text) in zip(self.slots, self.texts[1:]):
+            out.append(self.escape(values[slot]))
+            out.append(text)
+        return ''.join(out)
+
 
 class WsManRequest:
     envAttrs = {
@@ -61,99 +103,304 @@ class WsManRequest:
         'xmlns:p': 'http://schemas.microsoft.com/wbem/wsman/1/wsman.xsd',
     }
 
+    # Envelopes are rendered once per action, resource URI and selector
+    # names and then reused with only the variable text substituted.
+    # The element tree is built only when root/header/body is accessed.
+    UseTemplates = True
+    MaxTemplates = 1024
+    _templates = {}
+
     def __init__(self):
-        self.root = ET.Element('env:Envelope', self.envAttrs)
-        self.header = ET.SubElement(self.root, 'env:Header')
-        self.body = ET.SubElement(self.root, 'env:Body')
+        # (operation, static parts, variable text)
+        self._ops = []
+        self._root = None
+        self._header = None
+        self._body = None
         self.selector = None
 
-    def enumerate(self, to, ruri, selectors, filter=None, envSize=512000, mid=None, opTimeout=60):
+    @property
+    def root(self):
+        if self._root is None:
+            self._root = ET.Element('env:Envelope', self.envAttrs)
+            self._header = ET.SubElement(self._root, 'env:Header')
+            self._body = ET.SubElement(self._root, 'env:Body')
+            for (op, static, values) in self._ops:
+                self._apply(op, static, values)
+        return self._root
+
+    @property
+    def header(self):
+        self.root
+        return self._header
+
+    @property
+    def body(self):
+        self.root
+        return self._body
+
+    def _add(self, op, static, values):
+        self._ops.append((op, static, values))
+        if self._root is not None:
+            self._apply(op, static, values)
+        return self
+
+    def _apply(self, op, static, values):
+        getattr(self, '_apply_' + op)(static, values)
+
+    def enumerate(self, to, ruri, selectors, filter=None, envSize=512000, mid=None, opTimeout=60, maxElements=32000):
         self.set_header(to, ruri, "http://schemas.xmlsoap.org/ws/2004/09/enumeration/Enumerate", envSize, mid,
                         opTimeout)
         if (len(selectors) > 0):
             self.add_selectors(selectors)
-        selset = ET.SubElement(self.body, 'n:Enumerate')
-        args = {'OptimizeEnumeration': '', 'MaxElements': 32000}
+        if filter:
+            return self._add('enumerate', (maxElements, True), (filter,))
+        return self._add('enumerate', (maxElements, False), ())
+
+    def _apply_enumerate(self, static, values):
+        (maxElements, has_filter) = static
+        selset = ET.SubElement(self._body, 'n:Enumerate')
+        args = {'OptimizeEnumeration': '', 'MaxElements': maxElements}
         for i in args:
             myto = ET.SubElement(selset, 'w:' + i)
             myto.text = str(args[i])
 
-        if filter:
+        if has_filter:
             myto = ET.SubElement(selset, 'w:Filter',
                                  {'Dialect': 'http://schemas.microsoft.com/wbem/wsman/1/WQL'})
-            myto.text = str(filter)
+            myto.text = str(values[0])
 
-        return self
+    def pull(self, to, ruri, selectors, context, envSize=512000, mid=None, opTimeout=60, maxElements=32000):
+        self.set_header(to, ruri, "http://schemas.xmlsoap.org/ws/2004/09/enumeration/Pull", envSize, mid,
+                        opTimeout)
+        if (len(selectors) > 0):
+            self.add_selectors(selectors)
+        return self._add('pull', (maxElements,), (context,))
+
+    def _apply_pull(self, static, values):
+        selset = ET.SubElement(self._body, 'n:Pull')
+        myto = ET.SubElement(selset, 'n:EnumerationContext')
+        myto.text = values[0]
+        myto = ET.SubElement(selset, 'n:MaxElements')
+        myto.text = str(static[0])
+
+    def release(self, to, ruri, selectors, context, mid=None):
+        self.set_header(to, ruri, "http://schemas.xmlsoap.org/ws/2004/09/enumeration/Release", mid=mid)
+        if (len(selectors) > 0):
+            self.add_selectors(selectors)
+        return self._add('release', (), (context,))
+
+    def _apply_release(self, static, values):
+        selset = ET.SubElement(self._body, 'n:Release')
+        myto = ET.SubElement(selset, 'n:EnumerationContext')
+        myto.text = values[0]
 
     def set_header(self, to, ruri, action, envSize=512000, mid=None, opTimeout=60):
-        myto = ET.SubElement(self.header, 'a:To')
-        myto.text = to
-        myto = ET.SubElement(self.header, 'w:ResourceURI',
+        if not mid:
+            mid = uuid.uuid4()
+        return self._add('header', (ruri, action, envSize, opTimeout),
+                         (to, 'uuid:{0}'.format(mid)))
+
+    def _apply_header(self, static, values):
+        (ruri, action, envSize, opTimeout) = static
+        myto = ET.SubElement(self._header, 'a:To')
+        myto.text = values[0]
+        myto = ET.SubElement(self._header, 'w:ResourceURI',
                              {'env:mustUnderstand': 'true'})
         myto.text = ruri
-        myto = ET.SubElement(self.header, 'a:ReplyTo')
+        myto = ET.SubElement(self._header, 'a:ReplyTo')
         myto = ET.SubElement(myto, 'a:Address',
                              {'env:mustUnderstand': 'true'})
         myto.text = "http://schemas.xmlsoap.org/ws/2004/08/addressing/role/anonymous"
-        myto = ET.SubElement(self.header, 'a:Action',
+        myto = ET.SubElement(self._header, 'a:Action',
                              {'env:mustUnderstand': 'true'})
         myto.text = action
-        myto = ET.SubElement(self.header, 'w:MaxEnvelopeSize',
+        myto = ET.SubElement(self._header, 'w:MaxEnvelopeSize',
                              {'env:mustUnderstand': 'true'})
         myto.text = str(envSize)
-        if not mid:
-            mid = uuid.uuid4()
-        myto = ET.SubElement(self.header, 'a:MessageID')
-        myto.text = 'uuid:{0}'.format(mid)
-        myto = ET.SubElement(self.header, 'w:Locale',
+        myto = ET.SubElement(self._header, 'a:MessageID')
+        myto.text = values[1]
+        myto = ET.SubElement(self._header, 'w:Locale',
                              {'env:mustUnderstand': 'false',
                               'xml:lang': 'en-US'})
-        myto = ET.SubElement(self.header, 'p:DataLocale',
+        myto = ET.SubElement(self._header, 'p:DataLocale',
                              {'env:mustUnderstand': 'false',
                               'xml:lang': 'en-US'})
-        myto = ET.SubElement(self.header, 'w:OperationTimeout')
+        myto = ET.SubElement(self._header, 'w:OperationTimeout')
         myto.text = 'PT{0}.000S'.format(int(opTimeout))
-        return self
 
     def add_selectors(self, selectors):
+        names = tuple(selectors)
+        return self._add('selectors', names,
+                         tuple(selectors[i] for i in names))
+
+    def _apply_selectors(self, static, values):
         if self.selector is None:
-            self.selector = ET.SubElement(self.header, 'w:SelectorSet')
-        for i in selectors:
-            myto = ET.SubElement(self.selector, 'w:Selector', {'Name': i})
-            myto.text = selectors[i]
-        return self
+            self.selector = ET.SubElement(self._header, 'w:SelectorSet')
+        for (name, value) in zip(static, values):
+            myto = ET.SubElement(self.selector, 'w:Selector', {'Name': name})
+            myto.text = value
 
     def add_body(self, ruri, action, args):
-        selset = ET.SubElement(self.body, 'p:' + action + "_INPUT", {'xmlns:p': ruri})
-        for i in args:
-            myto = ET.SubElement(selset, 'p:' + i)
-            myto.text = str(args[i])
-        return self
+        names = tuple(args)
+        return self._add('body', (ruri, action, names),
+                         tuple(str(args[i]) for i in names))
+
+    def _apply_body(self, static, values):
+        (ruri, action, names) = static
+        selset = ET.SubElement(self._body, 'p:' + action + "_INPUT", {'xmlns:p': ruri})
+        for (name, value) in zip(names, values):
+            myto = ET.SubElement(selset, 'p:' + name)
+            myto.text = value
 
     def add_error(self, ex):
-        selset = ET.SubElement(self.body, "ClientFault")
+        return self._add('error', (), (str(ex),))
+
+    def _apply_error(self, static, values):
+        selset = ET.SubElement(self._body, "ClientFault")
         selset = ET.SubElement(selset, "Reason")
         selset = ET.SubElement(selset, "Text")
-        selset.text = str(ex)
-        return self
+        selset.text = values[0]
 
     def identify(self):
-        ET.SubElement(self.body, 'wsmid:Identify')
-        return self
+        return self._add('identify', (), ())
+
+    def _apply_identify(self, static, values):
+        ET.SubElement(self._body, 'wsmid:Identify')
+
+    def _template(self):
+        key = tuple((op, static, len(values)) for (op, static, values) in self._ops)
+        template = self._templates.get(key)
+        if template is None:
+            slot = 0
+            proto = WsManRequest()
+            for (op, static, values) in self._ops:
+                markers = []
+                for i in values:
+                    markers.append(WsManTemplate.marker(slot))
+                    slot = slot + 1
+                proto._ops.append((op, static, tuple(markers)))
+            template = WsManTemplate(self._serialize(proto.root))
+            if len(self._templates) >= self.MaxTemplates:
+                self._templates.clear()
+            self._templates[key] = template
+        return template
+
+    def _serialize(self, root):
+        t = ET.ElementTree(root)
+        output = io.StringIO()
+        t.write(output, encoding="unicode")
+        return output.getvalue()
 
     def get_text(self):
         if PY2:
             return ET.tostring(self.root, encoding="utf8")
+        elif self._root is not None or not self.UseTemplates:
+            # the tree may have been changed directly
+            return self._serialize(self.root)
         else:
-            t = ET.ElementTree(self.root)
-            output = io.StringIO()
-            t.write(output, encoding="unicode")
-            return output.getvalue()
+            values = []
+            for (op, static, opvalues) in self._ops:
+                values.extend(opvalues)
+            return self._template().render(values)
 
     def printx(self):
         logger.debug(ET.dump(self.root))
 
 
+class WsManDecoder(object):
+    """
+    Streaming decoder of WS-Man envelopes
+
+    Produces the same namespace stripped dict as the minidom based
+    WsManResponse._xmltojson, in a single iterparse pass and without
+    keeping the document tree around. lxml can be used when it is
+    installed; the builtin parser is the default as it was faster in
+    omsdk.profiling.sdkwsmanparse.
+    """
+    UseLxml = False
+    # qualified name => local name, shared by all decoders
+    _names = {}
+    MaxNames = 10000
+
+    def __init__(self, use_lxml=None):
+        if use_lxml is None:
+            use_lxml = self.UseLxml
+        self.use_lxml = use_lxml and LxmlPresent
+
+    def _local(self, name):
+        local = self._names.get(name)
+        if local is None:
+            local = re.sub(".*:", "", name.rsplit('}', 1)[-1])
+            if len(self._names) >= self.MaxNames:
+                self._names.clear()
+            self._names[name] = local
+        return local
+
+    def _iterparse(self, source):
+        events = ('start-ns', 'start', 'end')
+        if self.use_lxml:
+            return lxml_etree.iterparse(source, events=events, remove_comments=True,
+                                        remove_pis=True, resolve_entities=False)
+        return ET.iterparse(source, events=events)
+
+    def decode(self, value):
+        if not isinstance(value, bytes):
+            value = value.encode('utf-8')
+        return self.decode_file(io.BytesIO(value))
+
+    def decode_file(self, source):
+        # frame: [attributes, [(name, value) of child elements]]
+        stack = []
+        nsattrs = []
+        root = None
+        for (event, item) in self._iterparse(source):
+            if event == 'start-ns':
+                (prefix, uri) = item
+                nsattrs.append((prefix if prefix else 'xmlns', uri))
+            elif event == 'start':
+                stack.append([nsattrs, []])
+                nsattrs = []
+            else:
+                (attrs, children) = stack.pop()
+                if not stack:
+                    root = self._element_dict(item, attrs, children, True)
+                elif len(stack) == 1:
+                    # children of the envelope are always expanded
+                    stack[-1][1].append((self._local(item.tag),
+                                         self._element_dict(item, attrs, children)))
+                elif not children:
+                    stack[-1][1].append((self._local(item.tag), item.text if item.text else None))
+                else:
+                    stack[-1][1].append((self._local(item.tag),
+                                         self._element_dict(item, attrs, children)))
+                # the value is built, drop the subtree but keep the tail
+                del item[:]
+        return root
+
+    def _element_dict(self, elem, attrs, children, isroot=False):
+        tst = {}
+        for (name, value) in attrs:
+            tst[name] = value
+        for name in elem.attrib:
+            tst[self._local(name)] = elem.attrib[name]
+        # text and element nodes in document order, as minidom sees them
+        textval = {} if isroot else None
+        if elem.text and elem.text.strip():
+            tst['#text'] = textval if isroot else elem.text
+        for (child, (name, value)) in zip(elem, children):
+            if isroot:
+                tst[name] = value
+            elif name in tst:
+                if not isinstance(tst[name], list):
+                    tst[name] = [tst[name]]
+                tst[name].append(value)
+            else:
+                tst[name] = value
+            if child.tail and child.tail.strip():
+                tst['#text'] = textval if isroot else child.tail
+        return tst
+
+
 class WsManResponse:
     def __init__(self):
         pass
@@ -162,10 +409,15 @@ class WsManResponse:
         return (re.sub(".*:", "", s) if stripNS else s)
 
     def execute_str(self, value, stripNS=True):
+        if stripNS:
+            return WsManDecoder().decode(value)
         domtree = xml.dom.minidom.parseString(value)
         return self._xmltojson(domtree, stripNS)
 
     def execute(self, fname, stripNS=True):
+        if stripNS:
+            with open(fname, 'rb') as source:
+                return WsManDecoder().decode_file(source)
         domtree = xml.dom.minidom.parse(fname)
         return self._xmltojson(domtree, stripNS)
 
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#
+# Copyright © 2018 Dell Inc. or its subsidiaries. All rights reserved.
+# Dell, EMC, and other trademarks are trademarks of Dell Inc. or its subsidiaries.
+# Other trademarks may be trademarks of their respective owners.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import sys
+import ssl
+import json
+import socket
+import logging
+import threading
+
+PY2 = sys.version_info[0] == 2
+PY3 = sys.version_info[0] == 3
+
+if PY2:
+    import Queue as queue
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+else:
+    import queue
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+
+logger = logging.getLogger(__name__)
+
+
+class _EventHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, receiver, *args, **kwargs):
+        HTTPServer.__init__(self, *args, **kwargs)
+        self.receiver = receiver
+        self.context = None
+
+    def finish_request(self, request, client_address):
+        # runs in the thread of the connection, so that the TLS handshake
+        # of a slow or idle client does not hold up the accept loop
+        request.settimeout(self.receiver.request_timeout)
+        if self.context is not None:
+            try:
+                request = self.context.wrap_socket(request, server_side=True)
+            except (ssl.SSLError, socket.error) as ex:
+                logger.debug(client_address[0] + ": TLS handshake failed: " + str(ex))
+                return
+        HTTPServer.finish_request(self, request, client_address)
+
+
+class _EventRequestHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        logger.debug(self.address_string() + " " + (format % args))
+
+    def _reply(self, code, headers=None):
+        self.send_response(code)
+        for (name, value) in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _refuse(self, code):
+        # the body is left unread, the connection cannot be reused
+        self.close_connection = True
+        self._reply(code, {'Connection': 'close'})
+
+    def do_POST(self):
+        receiver = self.server.receiver
+        if self.path.split('?')[0].rstrip('/') != receiver.path.rstrip('/'):
+            self._refuse(404)
+            return
+        if not receiver._allowed(self.client_address[0]):
+            receiver._count('Rejected')
+            self._refuse(403)
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            receiver._count('Errors')
+            self._refuse(400)
+            return
+        if length > receiver.max_content_length:
+            logger.debug(self.client_address[0] + ": event payload of " +
+                         str(length) + " bytes is too large")
+            receiver._count('Rejected')
+            self._refuse(413)
+            return
+        content = self.rfile.read(length)
+        try:
+            payload = json.loads(content.decode('utf-8'))
+            if not isinstance(payload, dict):
+                raise ValueError('event payload must be a json object')
+            if 'Events' in payload and not isinstance(payload['Events'], list):
+                raise ValueError('Events must be a json array')
+        except ValueError as ex:
+            logger.debug(self.client_address[0] + ": bad event payload: " + str(ex))
+            receiver._count('Errors')
+            self._reply(400)
+            return
+        if not receiver._enqueue(self.client_address[0], payload):
+            # queue is full: make the sender retry instead of silently losing the event
+            self._reply(503, {'Retry-After': str(receiver.retry_after)})
+            return
+        self._reply(204)
+
+
+class RedfishEventReceiver(object):
+    """
+    HTTPS listener for events pushed by the Redfish EventService
+
+    Events posted by the managed devices are queued in a bounded queue and
+    dispatched to the registered callbacks by the dispatcher threads. When
+    the queue stays full for block_timeout seconds, the POST is answered
+    with 503 and a Retry-After header so that the device redelivers it.
+
+    Every callback gets a dict:
+        {'Host': source ip, 'Context': subscription context,
+         'EventType': event type, 'Event': the decoded event record}
+
+    Usage:
+        receiver = RedfishEventReceiver(port=8443, certfile='cert.pem', keyfile='key.pem')
+        receiver.add_callback(print_event, event_types=['Alert'])
+        receiver.start()
+        redfish = [conn.proto for conn in idrac.cfactory.work_connection
+                   if conn.enumid == ProtocolEnum.REDFISH][0]
+        receiver.subscribe(redfish, context='omsdk')
+        ...
+        receiver.stop()
+    """
+
+    def __init__(self, host='', port=8443, certfile=None, keyfile=None,
+                 path='/redfish/events', queue_size=1000, workers=1,
+                 block_timeout=0.5, retry_after=5, allowed_hosts=None,
+                 destination_host=None, max_content_length=1048576,
+                 request_timeout=30):
+        """
+        :param host: address to bind to, all interfaces by default
+        :param port: port to listen on, 0 picks a free port
+        :param certfile: server certificate. Plain HTTP is served if None
+        :param keyfile: private key of the server certificate
+        :param path: url path the events are posted to
+        :param queue_size: maximum number of undispatched event payloads
+        :param workers: number of dispatcher threads
+        :param block_timeout: seconds a POST waits for room in the queue
+        :param retry_after: Retry-After seconds sent when the queue is full
+        :param allowed_hosts: addresses allowed to post events, any if None
+        :param destination_host: address the devices reach this host on,
+            used to build the subscription destination
+        :param max_content_length: largest event payload accepted, in bytes.
+            Larger posts are answered with 413 without reading them
+        :param request_timeout: seconds a connection may stay idle, TLS
+            handshake included
+        :type port: int
+        :type queue_size: int
+        :type workers: int
+        """
+        self.host = host
+        self.port = port
+        self.certfile = certfile
+        self.keyfile = keyfile
+        self.path = path
+        self.workers = max(1, workers)
+        self.block_timeout = block_timeout
+        self.retry_after = retry_after
+        self.allowed_hosts = None
+        if allowed_hosts is not None:
+            self.allowed_hosts = set(allowed_hosts)
+        self.destination_host = destination_host
+        self.max_content_length = max_content_length
+        self.request_timeout = request_timeout
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._callbacks = []
+        self._subscriptions = []
+        self._lock = threading.Lock()
+        self._server = None
+        self._threads = []
+        self.counters = {
+            'Received': 0,
+            'Dispatched': 0,
+            'Dropped': 0,
+            'Rejected': 0,
+            'Errors': 0
+        }
+
+    def _count(self, counter, value=1):
+        with self._lock:
+            self.counters[counter] = self.counters[counter] + value
+
+    def _allowed(self, address):
+        return self.allowed_hosts is None or address in self.allowed_hosts
+
+    def stats(self):
+        with self._lock:
+            retval = dict(self.counters)
+        retval['Queued'] = self._queue.qsize()
+        return retval
+
+    def add_callback(self, callback, event_types=None):
+        """Register a callback for the events
+
+        :param callback: function called with the event dict
+        :param event_types: event types (Alert, ResourceUpdated, MetricReport ...)
+            to deliver to this callback, all if None
+        :type event_types: list
+        """
+        if event_types is not None:
+            event_types = set(event_types)
+        with self._lock:
+            self._callbacks.append((callback, event_types))
+
+    def remove_callback(self, callback):
+        with self._lock:
+            self._callbacks = [i for i in self._callbacks if i[0] != callback]
+
+    @property
+    def destination(self):
+        """Url the devices should post the events to"""
+        host = self.destination_host
+        if host is None:
+            host = self.host
+        if not host or host in ['0.0.0.0', '::']:
+            host = socket.gethostbyname(socket.gethostname())
+        if ':' in host:
+            host = '[' + host + ']'
+        scheme = 'https'
+        if self.certfile is None:
+            scheme = 'http'
+        return scheme + '://' + host + ':' + str(self.port) + self.path
+
+    def start(self):
+        if self._server is not None:
+            logger.warning("Event receiver is already running")
+            return self
+        server = _EventHTTPServer(self, (self.host, self.port), _EventRequestHandler)
+        if self.certfile is not None:
+            if hasattr(ssl, 'PROTOCOL_TLS_SERVER'):
+                context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            else:
+                # Python 2 and Python 3 before 3.6
+                context = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
+            context.load_cert_chain(certfile=self.certfile, keyfile=self.keyfile)
+            server.context = context
+        self.port = server.socket.getsockname()[1]
+        self._server = server
+        self._threads = []
+        for i in range(0, self.workers):
+            thr = threading.Thread(name="omsdk-event-dispatch-" + str(i),
+                                   target=self._dispatcher)
+            thr.daemon = True
+            thr.start()
+            self._threads.append(thr)
+        thr = threading.Thread(name="omsdk-event-listener", target=server.serve_forever)
+        thr.daemon = True
+        thr.start()
+        self._threads.append(thr)
+        logger.debug("Listening for Redfish events at " + self.destination)
+        return self
+
+    def stop(self, drain=True):
+        """Stop the listener and the dispatchers
+
+        :param drain: True to dispatch the queued events before returning
+        :type drain: bool
+        """
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        if not drain:
+            while True:
+                try:
+                    self._queue.get_nowait()
+                    self._count('Dropped')
+                except queue.Empty:
+                    break
+        for i in range(0, self.workers):
+            self._queue.put(None)
+        for thr in self._threads:
+            thr.join()
+        self._threads = []
+
+    def _enqueue(self, host, payload):
+        self._count('Received')
+        try:
+            self._queue.put((host, payload), timeout=self.block_timeout)
+        except queue.Full:
+            logger.debug(host + ": event queue is full, asking to retry")
+            self._count('Dropped')
+            return False
+        return True
+
+    def _dispatcher(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            (host, payload) = entry
+            try:
+                for event in self.decode(host, payload):
+                    self._dispatch(event)
+            except Exception as ex:
+                # a bad payload must not take the dispatcher down
+                logger.error(host + ": failed to dispatch event: " + str(ex))
+                self._count('Errors')
+
+    def decode(self, host, payload):
+        """Split a posted payload into the individual events
+
+        An Event payload carries a list of records in Events; a MetricReport
+        is delivered as a single event.
+        """
+        context = payload.get('Context')
+        if 'Events' not in payload:
+            event_type = 'Event'
+            if 'MetricValues' in payload:
+                event_type = 'MetricReport'
+            return [{'Host': host, 'Context': context,
+                     'EventType': event_type, 'Event': payload}]
+        events = []
+        for record in payload['Events']:
+            if not isinstance(record, dict):
+                continue
+            events.append({'Host': host,
+                           'Context': record.get('Context', context),
+                           'EventType': record.get('EventType', 'Event'),
+                           'Event': record})
+        return events
+
+    def _dispatch(self, event):
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for (callback, event_types) in callbacks:
+            if event_types is not None and event['EventType'] not in event_types:
+                continue
+            try:
+                callback(event)
+            except Exception as ex:
+                logger.debug("Event callback failed: " + str(ex))
+                self._count('Errors')
+        self._count('Dispatched')
+
+    def subscribe(self, proto, context=None, event_types=None):
+        """Register this receiver with the EventService of a device
+
+        :param proto: connected Redfish protocol of the device
+        :param context: opaque string the device sends back with every event
+        :param event_types: event types to subscribe to, Alert if None
+        :type proto: omsdk.http.sdkredfishbase.RedfishProtocolBase
+        :type context: str
+        :type event_types: list
+        :return: {'Status': 'Success', 'Location': subscription} or {'Status': 'Failed', 'Message': ...}
+        :rtype: dict
+        """
+        if event_types is None:
+            event_types = ['Alert']
+        payload = {
+            'Destination': self.destination,
+            'Protocol': 'Redfish',
+            'EventTypes': list(event_types)
+        }
+        if context is not None:
+            payload['Context'] = context
+        retval = proto.post_resource('EventService/Subscriptions', payload)
+        if retval['Status'] == 'Success':
+            location = retval.get('Location')
+            if location is None:
+                location = retval['Data'].get('@odata.id')
+            retval['Location'] = location
+            if location is not None:
+                with self._lock:
+                    self._subscriptions.append((proto, location))
+        return retval
+
+    def unsubscribe(self, proto, location):
+        with self._lock:
+            self._subscriptions = [i for i in self._subscriptions
+                                   if i != (proto, location)]
+        return proto.delete_resource(location)
+
+    def unsubscribe_all(self):
+        """Delete all the subscriptions created by this receiver"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        retval = {'Status': 'Success', 'Data': {}}
+        for (proto, location) in subscriptions:
+            status = self.unsubscribe(proto, location)
+            retval['Data'][location] = status
+            if status['Status'] != 'Success':
+                retval['Status'] = 'Failed'
+        return retval
@@ -20,81 +20,667 @@
 #
 # Authors: Vaideeswaran Ganesan
 #
-from pysnmp.carrier.asynsock.dispatch import AsynsockDispatcher
-from pysnmp.carrier.asynsock.dgram import udp, udp6
-from pyasn1.codec.ber import decoder
-from pysnmp.proto import api
+import re
+import sys
+import time
+import errno
+import socket
 import logging
+import threading
+
+from omsdk.sdkcreds import Snmpv2Credentials, Snmpv3Credentials
+
+PY2 = sys.version_info[0] == 2
+PY3 = sys.version_info[0] == 3
+
+if PY2:
+    import Queue as queue
+else:
+    import queue
+
+try:
+    from pysnmp.carrier.asynsock.dispatch import AsynsockDispatcher
+    from pysnmp.carrier.asynsock.dgram import udp, udp6
+    from pysnmp.entity import engine, config
+    from pysnmp.entity.rfc3413 import ntfrcv
+    from pysnmp.proto import rfc1902
+    from pysnmp.smi import builder, view
+    from pysnmp.smi.rfc1902 import ObjectIdentity
+    from omsdk.sdksnmp import Snmpv3AuthProtocols, Snmpv3PrivProtocols
+
+    PySnmpPresent = True
+except ImportError:
+    PySnmpPresent = False
 
 logger = logging.getLogger(__name__)
 
+# BER tags of the SNMP PDUs and values handled by the fast path
+_TAG_INTEGER = 0x02
+_TAG_OCTETS = 0x04
+_TAG_NULL = 0x05
+_TAG_OID = 0x06
+_TAG_SEQUENCE = 0x30
+_TAG_IPADDRESS = 0x40
+_TAG_OPAQUE = 0x44
+_TAG_V1TRAP = 0xA4
+_TAG_INFORM = 0xA6
+_TAG_V2TRAP = 0xA7
+_UNSIGNED_TAGS = (0x41, 0x42, 0x43, 0x46)
+
+_VERSIONS = {0: 'v1', 1: 'v2c', 3: 'v3'}
+
+# RFC 3584, section 3.1: translation of SNMPv1 generic traps
+_SNMP_TRAPS = (1, 3, 6, 1, 6, 3, 1, 1, 5)
+_SNMP_TRAP_OID = (1, 3, 6, 1, 6, 3, 1, 1, 4, 1, 0)
+_SYS_UPTIME = (1, 3, 6, 1, 2, 1, 1, 3, 0)
+
+
+# datagrams read per socket wakeup, saves a dispatcher loop per trap
+_READ_BURST = 256
+
+
+def _drain(transport):
+    for i in range(0, _READ_BURST):
+        try:
+            (wholeMsg, transportAddress) = transport.socket.recvfrom(65535)
+        except socket.error as ex:
+            if ex.args[0] not in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                logger.debug("recvfrom() failed: " + str(ex))
+            return
+        if wholeMsg:
+            transport._cbFun(transport, transport.normalizeAddress(transportAddress), wholeMsg)
+
+
+if PySnmpPresent:
+    class _UdpTrapTransport(udp.UdpSocketTransport):
+        def handle_read(self):
+            _drain(self)
+
+    class _Udp6TrapTransport(udp6.Udp6SocketTransport):
+        def handle_read(self):
+            _drain(self)
+
+
+def _ber_tlv(data, pos):
+    tag = data[pos]
+    length = data[pos + 1]
+    pos = pos + 2
+    if length & 0x80:
+        count = length & 0x7F
+        length = 0
+        for i in range(pos, pos + count):
+            length = (length << 8) | data[i]
+        pos = pos + count
+    end = pos + length
+    if end > len(data):
+        raise ValueError('truncated BER value')
+    return (tag, pos, end)
+
+
+def _ber_expect(data, pos, tag):
+    (rtag, start, end) = _ber_tlv(data, pos)
+    if rtag != tag:
+        raise ValueError('expected tag ' + hex(tag) + ', got ' + hex(rtag))
+    return (start, end)
+
+
+def _ber_uint(data, start, end):
+    value = 0
+    for i in range(start, end):
+        value = (value << 8) | data[i]
+    return value
+
+
+def _ber_int(data, start, end):
+    value = _ber_uint(data, start, end)
+    if end > start and data[start] & 0x80:
+        value = value - (1 << (8 * (end - start)))
+    return value
+
+
+def _ber_oid(data, start, end):
+    if start >= end:
+        return ()
+    oid = []
+    value = 0
+    for i in range(start, end):
+        value = (value << 7) | (data[i] & 0x7F)
+        if not data[i] & 0x80:
+            oid.append(value)
+            value = 0
+    # first sub-identifier encodes the first two arcs
+    if oid[0] < 80:
+        return (oid[0] // 40, oid[0] % 40) + tuple(oid[1:])
+    return (2, oid[0] - 80) + tuple(oid[1:])
+
+
+def _ber_value(data, tag, start, end):
+    if tag == _TAG_INTEGER:
+        return _ber_int(data, start, end)
+    if tag in _UNSIGNED_TAGS:
+        return _ber_uint(data, start, end)
+    if tag == _TAG_OID:
+        return _ber_oid(data, start, end)
+    if tag in (_TAG_OCTETS, _TAG_IPADDRESS, _TAG_OPAQUE):
+        return bytes(data[start:end])
+    # NULL, noSuchObject, noSuchInstance, endOfMibView
+    return None
+
+
+def peek_message(data):
+    """Version, PDU tag and community of an encoded SNMP message
+
+    :return: (version, pdu tag, community). The pdu tag and community are
+        None for SNMPv3 messages, whose PDU may be encrypted
+    :rtype: tuple
+    """
+    data = bytearray(data)
+    (start, end) = _ber_expect(data, 0, _TAG_SEQUENCE)
+    (vstart, vend) = _ber_expect(data, start, _TAG_INTEGER)
+    version = _ber_int(data, vstart, vend)
+    if version not in (0, 1):
+        return (version, None, None)
+    (cstart, cend) = _ber_expect(data, vend, _TAG_OCTETS)
+    community = bytes(data[cstart:cend]).decode('utf-8', 'replace')
+    return (version, data[cend], community)
+
 
-def cbFun(transportDispatcher, transportDomain, transportAddress, wholeMsg):
-    while wholeMsg:
-        msgVer = int(api.decodeMessageVersion(wholeMsg))
-        if msgVer in api.protoModules:
-            pMod = api.protoModules[msgVer]
+def decode_trap(data):
+    """Decode an SNMPv1 Trap or SNMPv2c Trap/Inform message
+
+    A minimal BER decoder for the notification PDUs, which are much
+    cheaper to take apart here than through the full pyasn1 codec.
+
+    :param data: the encoded message
+    :type data: bytes
+    :return: trap dict with the varbinds as (oid, tag, value) tuples
+    :rtype: dict
+    """
+    data = bytearray(data)
+    (start, end) = _ber_expect(data, 0, _TAG_SEQUENCE)
+    (vstart, vend) = _ber_expect(data, start, _TAG_INTEGER)
+    version = _ber_int(data, vstart, vend)
+    if version not in (0, 1):
+        raise ValueError('unsupported SNMP version ' + str(version))
+    (cstart, cend) = _ber_expect(data, vend, _TAG_OCTETS)
+    (pdutag, pos, pduend) = _ber_tlv(data, cend)
+    trap = {
+        'Version': _VERSIONS[version],
+        'Community': bytes(data[cstart:cend]).decode('utf-8', 'replace')
+    }
+    if pdutag == _TAG_V1TRAP:
+        (s, e) = _ber_expect(data, pos, _TAG_OID)
+        enterprise = _ber_oid(data, s, e)
+        (s, e) = _ber_expect(data, e, _TAG_IPADDRESS)
+        trap['AgentAddress'] = '.'.join([str(i) for i in data[s:e]])
+        (s, e) = _ber_expect(data, e, _TAG_INTEGER)
+        generic = _ber_int(data, s, e)
+        (s, e) = _ber_expect(data, e, _TAG_INTEGER)
+        specific = _ber_int(data, s, e)
+        (tag, s, e) = _ber_tlv(data, e)
+        trap['Uptime'] = _ber_uint(data, s, e)
+        trap['PDU'] = 'Trap'
+        trap['Enterprise'] = '.'.join([str(i) for i in enterprise])
+        trap['GenericTrap'] = generic
+        trap['SpecificTrap'] = specific
+        if generic == 6:
+            trap['_trapoid'] = enterprise + (0, specific)
         else:
-            logger.debug('Unsupported SNMP version %s' % msgVer)
+            trap['_trapoid'] = _SNMP_TRAPS + (generic + 1,)
+        pos = e
+    elif pdutag in (_TAG_V2TRAP, _TAG_INFORM):
+        (s, e) = _ber_expect(data, pos, _TAG_INTEGER)
+        trap['RequestID'] = _ber_int(data, s, e)
+        (s, e) = _ber_expect(data, e, _TAG_INTEGER)
+        (s, e) = _ber_expect(data, e, _TAG_INTEGER)
+        trap['PDU'] = 'Trap'
+        if pdutag == _TAG_INFORM:
+            trap['PDU'] = 'Inform'
+        pos = e
+    else:
+        raise ValueError('not a notification PDU: ' + hex(pdutag))
+    varbinds = []
+    (pos, vbend) = _ber_expect(data, pos, _TAG_SEQUENCE)
+    while pos < vbend:
+        (s, e) = _ber_expect(data, pos, _TAG_SEQUENCE)
+        (ostart, oend) = _ber_expect(data, s, _TAG_OID)
+        (tag, vs, ve) = _ber_tlv(data, oend)
+        varbinds.append((_ber_oid(data, ostart, oend), tag, _ber_value(data, tag, vs, ve)))
+        pos = e
+    trap['_varbinds'] = varbinds
+    return trap
+
+
+class SNMPTrapReceiver(object):
+    """
+    Embeddable SNMP trap and inform receiver
+
+    SNMPv1/v2c traps are decoded on the receive thread by a lightweight
+    BER decoder. SNMPv3 notifications and informs, which need the USM and
+    an acknowledgement, go through a pysnmp engine sharing the same sockets.
+
+    Decoded traps are queued to worker threads which resolve the varbinds
+    through the MIBs and hand them to the callbacks and, if enabled, to the
+    event queue. When a queue is full the trap is dropped and counted, as
+    UDP offers no way to push back on the sender.
+
+    Every trap is delivered as a dict:
+        {'Host': ..., 'Port': ..., 'Version': 'v1'|'v2c'|'v3',
+         'Community': ... (or 'User' for v3), 'PDU': 'Trap'|'Inform',
+         'TrapOID': '1.3.6.1.6.3.1.1.5.3', 'Trap': 'IF-MIB::linkDown',
+         'Uptime': ..., 'VarBinds': [(oid, name, value), ...]}
+
+    Usage:
+        receiver = SNMPTrapReceiver(port=162, communities=['public'])
+        receiver.add_callback(print_trap)
+        receiver.start()
+        ...
+        receiver.stop()
+    """
+
+    def __init__(self, binds=None, port=162, communities=None, users=None,
+                 mibs=None, mib_sources=None, queue_size=10000,
+                 event_queue_size=0, workers=1, rcvbuf=4194304,
+                 max_inform_communities=256):
+        """
+        :param binds: addresses to listen on, all IPv4 interfaces by default
+        :param port: udp port to listen on, 0 picks a free port
+        :param communities: accepted communities (str or Snmpv2Credentials),
+            None accepts traps and informs with any community. In that mode
+            the communities of the informs are learnt as they arrive, up to
+            max_inform_communities of them
+        :param users: SNMPv3 users (Snmpv3Credentials)
+        :param mibs: MIB modules to load for decoding the varbinds
+        :param mib_sources: additional directories of compiled MIBs
+        :param queue_size: traps waiting to be decoded, beyond which they are dropped
+        :param event_queue_size: size of the event queue read through get(),
+            0 for callback delivery only
+        :param workers: number of decoding threads
+        :param rcvbuf: socket receive buffer, to absorb trap storms
+        :param max_inform_communities: communities learnt from informs when
+            any community is accepted. Informs with further communities
+            are dropped and counted as BadCommunity
+        :type binds: list
+        :type port: int
+        :type communities: list
+        :type users: list
+        :type mibs: list
+        """
+        if binds is None:
+            binds = ['0.0.0.0']
+        self.binds = binds
+        self.port = port
+        self.communities = None
+        if communities is not None:
+            self.communities = set()
+            for community in communities:
+                if isinstance(community, Snmpv2Credentials):
+                    community = community.community
+                self.communities.add(community)
+        self.users = users or []
+        if mibs is None:
+            mibs = ['SNMPv2-MIB', 'IF-MIB']
+        self.mibs = mibs
+        self.mib_sources = mib_sources or []
+        self.workers = max(1, workers)
+        self.rcvbuf = rcvbuf
+        self.max_inform_communities = max_inform_communities
+        self.addresses = []
+        self._pending = queue.Queue(maxsize=queue_size)
+        self.events = None
+        if event_queue_size > 0:
+            self.events = queue.Queue(maxsize=event_queue_size)
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._mib_lock = threading.Lock()
+        self._names = {}
+        self._max_names = 65536
+        self._engine = None
+        self._securityNames = {}
+        self._engineCommunities = set()
+        self._dispatcher = None
+        self._threads = []
+        self.counters = {
+            'Received': 0,
+            'Delivered': 0,
+            'Dropped': 0,
+            'QueueDropped': 0,
+            'BadCommunity': 0,
+            'Malformed': 0,
+            'Errors': 0
+        }
+
+    def _count(self, counter, value=1):
+        with self._lock:
+            self.counters[counter] = self.counters[counter] + value
+
+    def stats(self):
+        with self._lock:
+            retval = dict(self.counters)
+        retval['Pending'] = self._pending.qsize()
+        return retval
+
+    def add_callback(self, callback):
+        """Register a function called with every trap dict"""
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        with self._lock:
+            self._callbacks = [i for i in self._callbacks if i != callback]
+
+    def get(self, timeout=None):
+        """Next trap from the event queue
+
+        :param timeout: seconds to wait, None to wait forever
+        :return: trap dict, or None on timeout
+        :rtype: dict
+        """
+        if self.events is None:
+            raise ValueError('event queue is not enabled')
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _setup_engine(self):
+        snmpEngine = engine.SnmpEngine()
+        mibBuilder = snmpEngine.getMibBuilder()
+        if self.mib_sources:
+            mibBuilder.addMibSources(*[builder.DirMibSource(path) for path in self.mib_sources])
+        for mib in self.mibs:
+            try:
+                mibBuilder.loadModules(mib)
+            except Exception as ex:
+                logger.debug("Cannot load MIB " + str(mib) + ": " + str(ex))
+        # same MIB view the SNMPProtocol lookups are resolved with
+        snmpEngine.setUserContext(mibViewController=view.MibViewController(mibBuilder))
+        self._securityNames = {}
+        self._engineCommunities = set()
+        for community in (self.communities or []):
+            self._add_community(snmpEngine, community)
+        for user in self.users:
+            if not isinstance(user, Snmpv3Credentials):
+                continue
+            authProtocol = None
+            if user.authKey is not None:
+                authProtocol = user.authProtocol
+            privProtocol = None
+            if user.privKey is not None:
+                privProtocol = user.privProtocol
+            # informs are authenticated against the local engine, traps
+            # against the engine of the agent sending them
+            securityEngineIds = [None]
+            if user.engineId is not None:
+                securityEngineIds.append(rfc1902.OctetString(hexValue=user.engineId))
+            for securityEngineId in securityEngineIds:
+                config.addV3User(snmpEngine, user.username,
+                                 Snmpv3AuthProtocols[authProtocol], user.authKey,
+                                 Snmpv3PrivProtocols[privProtocol], user.privKey,
+                                 securityEngineId=securityEngineId)
+        ntfrcv.NotificationReceiver(snmpEngine, self._engine_notification)
+        return snmpEngine
+
+    def _add_community(self, snmpEngine, community):
+        securityName = 'omsdk-trap-' + str(len(self._engineCommunities) + 1)
+        self._securityNames[securityName] = community
+        self._engineCommunities.add(community)
+        config.addV1System(snmpEngine, securityName, community)
+
+    def start(self):
+        if not PySnmpPresent:
+            raise RuntimeError("pysnmp is required for the trap receiver")
+        if self._dispatcher is not None:
+            logger.warning("Trap receiver is already running")
+            return self
+        self._engine = self._setup_engine()
+        self._dispatcher = AsynsockDispatcher()
+        self._dispatcher.setTimerResolution(0.1)
+        self._engine.registerTransportDispatcher(self._dispatcher, 'engine')
+        self._dispatcher.registerRecvCbFun(self._receive)
+        self._dispatcher.registerRoutingCbFun(self._route)
+        self.addresses = []
+        counter = 0
+        for address in self.binds:
+            counter = counter + 1
+            if ':' in address:
+                transport = _Udp6TrapTransport().openServerMode((address, self.port))
+                domainName = udp6.domainName + (counter,)
+            else:
+                transport = _UdpTrapTransport().openServerMode((address, self.port))
+                domainName = udp.domainName + (counter,)
+            try:
+                transport.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
+            except Exception as ex:
+                logger.debug("Cannot set receive buffer: " + str(ex))
+            self.addresses.append(transport.socket.getsockname()[:2])
+            self._dispatcher.registerTransport(domainName, transport)
+        # resolve once so that the MIB index is built before the workers start
+        self._resolve(_SNMP_TRAP_OID)
+        self._threads = []
+        for i in range(0, self.workers):
+            thr = threading.Thread(name="omsdk-trap-worker-" + str(i), target=self._worker)
+            thr.daemon = True
+            thr.start()
+            self._threads.append(thr)
+        self._dispatcher.jobStarted(1)
+        thr = threading.Thread(name="omsdk-trap-receiver", target=self._run)
+        thr.daemon = True
+        thr.start()
+        self._threads.append(thr)
+        logger.debug("Listening for traps on " + str(self.addresses))
+        return self
+
+    def _run(self):
+        try:
+            self._dispatcher.runDispatcher()
+        except Exception as ex:
+            logger.error("Trap receiver failed: " + str(ex))
+
+    def stop(self):
+        if self._dispatcher is None:
+            return
+        self._dispatcher.jobFinished(1)
+        self._threads[-1].join()
+        self._dispatcher.closeDispatcher()
+        self._dispatcher = None
+        for i in range(0, self.workers):
+            self._pending.put(None)
+        for thr in self._threads:
+            thr.join()
+        self._threads = []
+        self._engine = None
+
+    def _route(self, transportDomain, transportAddress, wholeMsg):
+        try:
+            (version, pdutag, community) = peek_message(wholeMsg)
+        except (ValueError, IndexError):
+            return None
+        if version == 3:
+            # needs the USM
+            return 'engine'
+        if pdutag != _TAG_INFORM:
+            return None
+        # needs an acknowledgement. The engine silently discards informs
+        # of communities it does not know, these are left to _receive
+        # which counts them as BadCommunity.
+        if community not in self._engineCommunities:
+            if self.communities is not None or \
+                    len(self._engineCommunities) >= self.max_inform_communities:
+                return None
+            self._add_community(self._engine, community)
+        return 'engine'
+
+    def _receive(self, transportDispatcher, transportDomain, transportAddress, wholeMsg):
+        self._count('Received')
+        try:
+            trap = decode_trap(wholeMsg)
+        except (ValueError, IndexError) as ex:
+            logger.debug(str(transportAddress[0]) + ": malformed trap: " + str(ex))
+            self._count('Malformed')
             return
-        reqMsg, wholeMsg = decoder.decode(
-            wholeMsg, asn1Spec=pMod.Message(),
-        )
-        logger.debug('Notification message from %s:%s: ' % (
-            transportDomain, transportAddress
-        )
-                     )
-        reqPDU = pMod.apiMessage.getPDU(reqMsg)
-        if reqPDU.isSameTypeWith(pMod.TrapPDU()):
-            if msgVer == api.protoVersion1:
-                logger.debug('Enterprise: %s' % (
-                    pMod.apiTrapPDU.getEnterprise(reqPDU).prettyPrint()
-                )
-                             )
-                logger.debug('Agent Address: %s' % (
-                    pMod.apiTrapPDU.getAgentAddr(reqPDU).prettyPrint()
-                )
-                             )
-                logger.debug('Generic Trap: %s' % (
-                    pMod.apiTrapPDU.getGenericTrap(reqPDU).prettyPrint()
-                )
-                             )
-                logger.debug('Specific Trap: %s' % (
-                    pMod.apiTrapPDU.getSpecificTrap(reqPDU).prettyPrint()
-                )
-                             )
-                logger.debug('Uptime: %s' % (
-                    pMod.apiTrapPDU.getTimeStamp(reqPDU).prettyPrint()
-                )
-                             )
-                varBinds = pMod.apiTrapPDU.getVarBindList(reqPDU)
+        if self.communities is not None and trap['Community'] not in self.communities:
+            self._count('BadCommunity')
+            return
+        if trap['PDU'] == 'Inform':
+            # not acknowledged by the engine, see _route()
+            self._count('BadCommunity')
+            return
+        trap['Host'] = transportAddress[0]
+        trap['Port'] = transportAddress[1]
+        self._enqueue(trap)
+
+    def _engine_notification(self, snmpEngine, stateReference, contextEngineId,
+                             contextName, varBinds, cbCtx):
+        self._count('Received')
+        context = snmpEngine.observer.getExecutionContext('rfc3412.receiveMessage:request')
+        trap = {
+            'Host': context['transportAddress'][0],
+            'Port': context['transportAddress'][1],
+            'Version': _VERSIONS.get(context['messageProcessingModel'], 'v3'),
+            'PDU': 'Trap'
+        }
+        if context['pdu'].tagSet[0].tagId == 6:
+            trap['PDU'] = 'Inform'
+        if trap['Version'] == 'v3':
+            trap['User'] = str(context['securityName'])
+        else:
+            trap['Community'] = self._securityNames.get(str(context['securityName']),
+                                                        str(context['securityName']))
+        varbinds = []
+        for (oid, value) in varBinds:
+            tag = value.tagSet[0]
+            tag = tag.tagClass | tag.tagFormat | tag.tagId
+            if tag == _TAG_OID:
+                raw = tuple(value)
+            elif tag == _TAG_INTEGER or tag in _UNSIGNED_TAGS:
+                raw = int(value)
+            elif tag in (_TAG_OCTETS, _TAG_IPADDRESS, _TAG_OPAQUE):
+                raw = value.asOctets()
             else:
-                varBinds = pMod.apiPDU.getVarBindList(reqPDU)
-            logger.debug('Var-binds:')
-            for oid, val in varBinds:
-                logger.debug('%s = %s' % (oid.prettyPrint(), val.prettyPrint()))
-    return wholeMsg
+                raw = None
+            varbinds.append((tuple(oid), tag, raw))
+        trap['_varbinds'] = varbinds
+        self._enqueue(trap)
 
+    def _enqueue(self, trap):
+        trap['Timestamp'] = time.time()
+        try:
+            self._pending.put_nowait(trap)
+        except queue.Full:
+            self._count('Dropped')
 
-transportDispatcher = AsynsockDispatcher()
+    def _worker(self):
+        while True:
+            trap = self._pending.get()
+            if trap is None:
+                break
+            try:
+                self._deliver(self.decode(trap))
+            except Exception as ex:
+                logger.debug("Trap decoding failed: " + str(ex))
+                self._count('Errors')
 
-transportDispatcher.registerRecvCbFun(cbFun)
+    def _resolve(self, oid):
+        try:
+            return self._names[oid]
+        except KeyError:
+            pass
+        with self._mib_lock:
+            mibViewController = self._engine.getUserContext('mibViewController')
+            name = '.'.join([str(i) for i in oid])
+            named = None
+            syntax = None
+            try:
+                identity = ObjectIdentity(oid).resolveWithMib(mibViewController)
+                name = identity.prettyPrint()
+                node = identity.getMibNode()
+                if hasattr(node, 'getSyntax'):
+                    syntax = node.getSyntax()
+            except Exception as ex:
+                logger.debug("Cannot resolve " + name + ": " + str(ex))
+            if syntax is not None:
+                if getattr(syntax, 'namedValues', None):
+                    named = dict([(value, label) for (label, value) in syntax.namedValues.items()])
+                # only display hints other than plain text need pysnmp to render the value
+                if re.match('^([0-9]+a)?$', getattr(syntax, 'displayHint', '')):
+                    syntax = None
+            if len(self._names) >= self._max_names:
+                self._names.clear()
+            self._names[oid] = (name, named, syntax)
+        return (name, named, syntax)
 
-# UDP/IPv4
-transportDispatcher.registerTransport(
-    udp.domainName, udp.UdpSocketTransport().openServerMode(('localhost', 162))
-)
+    def _render(self, tag, raw, named, syntax):
+        if raw is None:
+            return ''
+        if named is not None and not isinstance(raw, (bytes, tuple)):
+            return named.get(raw, str(raw))
+        if syntax is not None:
+            try:
+                return re.sub("^'|'$", "", syntax.clone(raw).prettyPrint())
+            except Exception:
+                pass
+        if tag == _TAG_OID:
+            return '.'.join([str(i) for i in raw])
+        if tag == _TAG_IPADDRESS:
+            return '.'.join([str(i) for i in bytearray(raw)])
+        if isinstance(raw, bytes):
+            try:
+                text = raw.decode('utf-8')
+                if re.match('^[\\x20-\\x7e\\t\\r\\n]*$', text):
+                    return text
+            except UnicodeDecodeError:
+                pass
+            return '0x' + ''.join(['%02x' % i for i in bytearray(raw)])
+        return str(raw)
 
-# UDP/IPv6
-transportDispatcher.registerTransport(
-    udp6.domainName, udp6.Udp6SocketTransport().openServerMode(('::1', 162))
-)
+    def decode(self, trap):
+        """Resolve the varbinds of a received trap through the MIBs"""
+        trapoid = trap.pop('_trapoid', None)
+        varbinds = []
+        for (oid, tag, raw) in trap.pop('_varbinds'):
+            if oid == _SYS_UPTIME and raw is not None:
+                trap['Uptime'] = raw
+            elif oid == _SNMP_TRAP_OID and tag == _TAG_OID:
+                trapoid = raw
+            (name, named, syntax) = self._resolve(oid)
+            varbinds.append(('.'.join([str(i) for i in oid]), name, self._render(tag, raw, named, syntax)))
+        trap['VarBinds'] = varbinds
+        if trapoid is not None:
+            trap['TrapOID'] = '.'.join([str(i) for i in trapoid])
+            trap['Trap'] = self._resolve(trapoid)[0]
+        return trap
 
-transportDispatcher.jobStarted(1)
+    def _deliver(self, trap):
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback(trap)
+            except Exception as ex:
+                logger.debug("Trap callback failed: " + str(ex))
+                self._count('Errors')
+        if self.events is not None:
+            try:
+                self.events.put_nowait(trap)
+            except queue.Full:
+                self._count('QueueDropped')
+        self._count('Delivered')
 
-try:
-    # Dispatcher will never finish as job#1 never reaches zero
-    transportDispatcher.runDispatcher()
-except:
-    transportDispatcher.closeDispatcher()
-    raise
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+
+    def log_trap(trap):
+        logger.debug('Notification from %s: %s' % (trap['Host'], trap.get('Trap')))
+        for (oid, name, value) in trap['VarBinds']:
+            logger.debug('%s = %s' % (name, value))
+
+    receiver = SNMPTrapReceiver(binds=['127.0.0.1', '::1'])
+    receiver.add_callback(log_trap)
+    receiver.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        receiver.stop()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#
+# Copyright © 2018 Dell Inc. or its subsidiaries. All rights reserved.
+# Dell, EMC, and other trademarks are trademarks of Dell Inc. or its subsidiaries.
+# Other trademarks may be trademarks of their respective owners.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import sys
+import copy
+import time
+import argparse
+from omsdk.sdksnmp import EntityMibConvertor
+
+PY2 = sys.version_info[0] == 2
+PY3 = sys.version_info[0] == 3
+
+# Benchmark of the Entity MIB containment tree build.
+# Synthesizes the entPhysicalTable of a switch stack, builds the tree with
+# the indexed build of EntityMibConvertor and with the tree search for each
+# parent done before it, and checks both give the same tree:
+#     python -m omsdk.profiling.sdkentitytree --entities 5000 --rounds 3
+
+class LegacyEntityMibConvertor(EntityMibConvertor):
+    """Tree build before the index: searches the tree for each parent"""
+
+    def _checkit(self, tree, value):
+        if value in tree:
+            return tree
+        for k in tree:
+            if not "children" in tree[k]:
+                continue
+            node = self._checkit(tree[k]["children"], value)
+            if not node is None:
+                return node
+        return None
+
+    def build_entity_tree(self, entity_raw):
+        if not "Entity" in entity_raw:
+            return entity_raw
+        if len(entity_raw["Entity"]) == 0:
+            return entity_raw
+        entity_tree = {}
+        entity_tree['1'] = entity_raw["Entity"][0]
+        entity_tree['1']["children"] = {}
+        counter = 0
+        for i in entity_raw["Entity"]:
+            counter = counter + 1
+            if i['ContainedIn'] == '0':
+                continue
+            node = self._checkit(entity_tree, i['ContainedIn'])
+            if not node is None:
+                if not "children" in node[i['ContainedIn']]:
+                    node[i['ContainedIn']]['children'] = {}
+                node[i['ContainedIn']]['children'][str(counter)] = i
+        entity_tree = self._named_entity_tree(entity_tree, {})
+        return entity_tree
+
+
+def _entity(entities, cls, parent, relpos):
+    index = len(entities) + 1
+    entities.append({
+        'Name': cls + ' ' + str(index),
+        'Description': 'Synthetic ' + cls,
+        'ContainedIn': str(parent),
+        'Class': cls,
+        'ParentRelPos': str(relpos),
+        'SerialNo': 'SN' + str(index).zfill(8),
+        'IsFRU': 'true' if cls in ['powerSupply', 'fan', 'module'] else 'false'
+    })
+    return index
+
+
+def synthesize_stack(count):
+    """entPhysicalTable rows of a stack of switches with about count entities
+
+    Rows are in entPhysicalIndex order, the stack is the first row.
+    Each unit is a chassis with 2 power supplies, 4 fans and a slot
+    holding a module of 48 ports.
+    """
+    entities = []
+    stack = _entity(entities, 'stack', 0, -1)
+    unit = 0
+    while len(entities) < count:
+        unit = unit + 1
+        chassis = _entity(entities, 'chassis', stack, unit)
+        for i in range(1, 3):
+            _entity(entities, 'powerSupply', chassis, i)
+        for i in range(1, 5):
+            _entity(entities, 'fan', chassis, i)
+        slot = _entity(entities, 'container', chassis, 1)
+        module = _entity(entities, 'module', slot, 1)
+        for i in range(1, 49):
+            if len(entities) >= count:
+                break
+            _entity(entities, 'port', module, i)
+    return {'Entity': entities}
+
+
+def _count(tree):
+    count = 0
+    pending = [tree]
+    while len(pending) > 0:
+        node = pending.pop()
+        count = count + len(node)
+        for k in node:
+            if 'child' in node[k]:
+                pending.append(node[k]['child'])
+    return count
+
+
+def benchmark(counts, rounds=3):
+    """Build the tree of synthetic stacks of each size with both builds
+
+    :return: {entities: {build: {'Time': seconds, 'Entities': n, 'Same': bool}}}
+    """
+    results = {}
+    builds = [('indexed', EntityMibConvertor()), ('legacy', LegacyEntityMibConvertor())]
+    for count in counts:
+        entity_raw = synthesize_stack(count)
+        reference = None
+        results[count] = {}
+        for (name, emib_mgr) in builds:
+            elapsed = None
+            for i in range(0, rounds):
+                # legacy build links the rows of entity_raw into the tree
+                rows = copy.deepcopy(entity_raw)
+                start = time.time()
+                tree = emib_mgr.build_entity_tree(rows)
+                took = time.time() - start
+                if elapsed is None or took < elapsed:
+                    elapsed = took
+            if reference is None:
+                reference = tree
+            results[count][name] = {
+                'Time': elapsed,
+                'Entities': _count(tree),
+                'Same': tree == reference
+            }
+    return results
+
+
+def print_results(results):
+    for count in results:
+        print(str(count) + " entities")
+        for name in results[count]:
+            res = results[count][name]
+            print("    {0:10s} {1:6d} in tree {2:10.4f}s  same: {3}".format(
+                name, res['Entities'], res['Time'], res['Same']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the Entity MIB containment tree build")
+    parser.add_argument("--entities", type=int, nargs='+', default=[500, 5000],
+                        help="entities in the synthetic stack")
+    parser.add_argument("--rounds", type=int, default=3,
+                        help="builds per stack, the best is reported")
+    args = parser.parse_args(argv)
+    print_results(benchmark(args.entities, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -29,6 +29,8 @@ import time
 from omsdk.sdkconsole import iConsoleRegistry, iConsoleDriver, iConsoleDiscovery
 from omsdk.sdkprint import PrettyPrint
 from omsdk.sdkproto import PCONSOLE
+from omsdk.sdkfleet import FleetCollector
+from omsdk.sdkworkers import WorkerPool
 import sys
 import logging
 
@@ -68,7 +70,9 @@ class Results:
 
 
 class ListProc:
-    NumThreads = 20
+    MaxWorkers = 32
+    # deadline in seconds for a single device
+    DeviceTimeout = 300
 
     def __init__(self, sd, listfile, creds):
         self.listfile = listfile
@@ -103,27 +107,40 @@ class ListProc:
                 pass
 
     def _process(self, slist, func):
-        self.threadlist = []
-        P = int(len(slist) / self.NumThreads)
-        if P <= 0:
-            P = 1
-        rlist = [slist[i:i + P] for i in range(0, len(slist), P)]
-        logger.debug("Number of threads: " + str(len(rlist)))
-        counter = 0
+        t1 = time.time()
         results = Results()
-        for i in rlist:
-            counter = counter + 1
-            thr = threading.Thread(name=str(counter),
-                                   target=func, args=(i, counter, results,))
-            self.threadlist.append(thr)
-            thr.start()
-        for t in self.threadlist:
-            t.join()
+        with WorkerPool(self.MaxWorkers, name="listproc") as pool:
+            for (arg, item) in pool.map_unordered(func, slist, self.DeviceTimeout):
+                if item.status == 'Done' and item.result is not None:
+                    results.passed(item.result)
+                else:
+                    results.failed(arg)
+        logger.debug("Time for " + str(len(slist)) + " devices = " + str(time.time() - t1))
         results.printx()
         return self
 
     def classify(self):
-        return self._process(self.slist, self._classify)
+        if self.simulate:
+            return self._process(self.slist, self._classify)
+        t1 = time.time()
+        results = Results()
+        fleet = FleetCollector(self.sd, self.creds, self.sd.driver_enum.iDRAC,
+                               max_workers=self.MaxWorkers,
+                               device_timeout=self.DeviceTimeout,
+                               collect=lambda entity: True, keep_driver=True)
+        for result in fleet.iter_results(self.slist):
+            if result['Status'] == 'Success':
+                with self.myentitylistlock:
+                    self.entitylist.append(result['Driver'])
+                results.passed(result['Driver'])
+            else:
+                if result.get('Driver') is not None:
+                    result['Driver'].disconnect()
+                results.failed(result['Host'])
+        logger.debug("Fleet statistics: " + str(fleet.stats.summary()))
+        logger.debug("Time for " + str(len(self.slist)) + " devices = " + str(time.time() - t1))
+        results.printx()
+        return self
 
     def scalable(self):
         return self._process(self.entitylist, self._scalable)
@@ -131,53 +148,31 @@ class ListProc:
     def detailed(self):
         return self._process(self.entitylist, self._detailed)
 
-    def _classify(self, d, c, results):
-        t1 = time.time()
-        counter = 0
-        for i in d:
-            counter = counter + 1
-            if self.simulate:
-                entity = TT(i)
-            else:
-                entity = self.sd.get_driver("iDRAC", i, self.creds)
-            if not entity is None:
-                with self.myentitylistlock:
-                    self.entitylist.append(entity)
-                results.passed(entity)
-            else:
-                results.failed(entity)
-        logger.debug("Time for " + str(c) + " thread = " + str(time.time() - t1))
+    def _classify(self, i):
+        # simulated devices only, real ones are classified by the FleetCollector
+        entity = TT(i)
+        with self.myentitylistlock:
+            self.entitylist.append(entity)
+        return entity
 
-    def _scalable(self, d, c, results):
-        t1 = time.time()
-        for entity in d:
-            try:
-                if self.simulate:
-                    eb = [entity.ipaddr]
-                else:
-                    entity.get_partial_entityjson_str("System")
-                    eb = entity.get_json_device()
-                with open(os.path.join(".", "output", "scalable", entity.ipaddr), 'w') as f:
-                    json.dump(eb, f)
-                    f.flush()
-                results.passed(eb)
-            except Exception as e:
-                results.failed(eb)
-        logger.debug("Time for " + str(c) + " thread = " + str(time.time() - t1))
-
-    def _detailed(self, d, c, results):
-        t1 = time.time()
-        for entity in d:
-            try:
-                if self.simulate:
-                    eb = [entity.ipaddr]
-                else:
-                    entity.get_entityjson()
-                    eb = entity.get_json_device()
-                with open(os.path.join(".", "output", "detailed", entity.ipaddr), 'w') as f:
-                    json.dump(eb, f)
-                    f.flush()
-                results.passed(eb)
-            except Exception as e:
-                results.failed(eb)
-        logger.debug("Time for " + str(c) + " thread = " + str(time.time() - t1))
+    def _scalable(self, entity):
+        if self.simulate:
+            eb = [entity.ipaddr]
+        else:
+            entity.get_partial_entityjson_str("System")
+            eb = entity.get_json_device()
+        with open(os.path.join(".", "output", "scalable", entity.ipaddr), 'w') as f:
+            json.dump(eb, f)
+            f.flush()
+        return eb
+
+    def _detailed(self, entity):
+        if self.simulate:
+            eb = [entity.ipaddr]
+        else:
+            entity.get_entityjson()
+            eb = entity.get_json_device()
+        with open(os.path.join(".", "output", "detailed", entity.ipaddr), 'w') as f:
+            json.dump(eb, f)
+            f.flush()
+        return eb
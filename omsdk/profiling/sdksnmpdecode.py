@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#
+# Copyright © 2018 Dell Inc. or its subsidiaries. All rights reserved.
+# Dell, EMC, and other trademarks are trademarks of Dell Inc. or its subsidiaries.
+# Other trademarks may be trademarks of their respective owners.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import re
+import sys
+import time
+import argparse
+from omsdk.sdkproto import SNMPOptions
+from omsdk.sdksnmp import SNMPProtocol, SNMPViewTrie, PySnmpPresent
+from omsdk.profiling.sdksnmpwalk import RecordedAgent, synthesize_ports, synthesize_disks, load_snmprec
+
+if PySnmpPresent:
+    from pysnmp.hlapi import ObjectIdentity, ObjectType
+    from pysnmp.hlapi.varbinds import CommandGeneratorVarBinds
+
+PY2 = sys.version_info[0] == 2
+PY3 = sys.version_info[0] == 3
+
+# Benchmark of the decoding of SNMP table walks.
+# Walks recorded (snmprec) or synthetic tables once, then decodes the
+# responses with the compiled OID trie of SNMPViewTrie and with the MIB
+# lookups done per varbind before it, and checks both give the same rows:
+#     python -m omsdk.profiling.sdksnmpdecode --ports 480 --rounds 5
+
+# F10 Port view of the F10 driver, (MIB, symbol) or OID
+F10PortView = {
+    'Description': ('IF-MIB', 'ifDescr'),
+    'Type': ('IF-MIB', 'ifType'),
+    'Address': ('IF-MIB', 'ifPhysAddress'),
+    'ifIndex': ('IF-MIB', 'ifIndex'),
+    'Status': ('1.3.6.1.2.1.2.2.1.7',),
+    'ifInOctets': ('1.3.6.1.2.1.2.2.1.10',),
+    'ifOutOctets': ('1.3.6.1.2.1.2.2.1.16',),
+    'ifInDiscards': ('1.3.6.1.2.1.2.2.1.13',),
+    'ifOutDiscards': ('1.3.6.1.2.1.2.2.1.19',),
+    'ifInErrors': ('1.3.6.1.2.1.2.2.1.14',),
+    'ifOutErrors': ('1.3.6.1.2.1.2.2.1.20',),
+    'ifInUnknownProtos': ('1.3.6.1.2.1.2.2.1.15',),
+    'ifSpeed': ('1.3.6.1.2.1.2.2.1.5',),
+    'SysIfName': ('1.3.6.1.4.1.6027.3.26.1.4.10.1.2',)
+}
+
+# PhysicalDisk view of the EqualLogic driver
+EqualLogicDiskView = {
+    'Status': ('1.3.6.1.4.1.12740.3.1.1.1.8',),
+    'Slot': ('1.3.6.1.4.1.12740.3.1.1.1.11',),
+    'Model': ('1.3.6.1.4.1.12740.3.1.1.1.3',),
+    'SerialNumber': ('1.3.6.1.4.1.12740.3.1.1.1.5',),
+    'FirmwareVersion': ('1.3.6.1.4.1.12740.3.1.1.1.4',),
+    'TotalSize': ('1.3.6.1.4.1.12740.3.1.1.1.6',)
+}
+
+
+def legacy_decode(rows, snmpview, mibViewC):
+    """Decoder before the OID trie: MIB lookups for every varbind
+
+    Resolves the varbinds as the walk did with lookupMib and rebuilds
+    the reverse map of the view for each row.
+    """
+    entries = []
+    for varBinds in rows:
+        ifMibRevVars = {}
+        for attr in snmpview:
+            ifMibRevVars[str(snmpview[attr]) + "."] = attr
+            ifMibRevVars[snmpview[attr].prettyPrint()] = attr
+        varBinds = [ObjectType(ObjectIdentity(x[0]), x[1]).resolveWithMib(mibViewC)
+                    for x in varBinds]
+        entry = {}
+        idx = None
+        for varBind in varBinds:
+            (modName, symName, indices) = varBind[0].getMibSymbol()
+            if modName == "SNMPv2-SMI" and symName == "enterprises":
+                vname = None
+                vvarn = str(varBind[0])
+                for vvar in ifMibRevVars:
+                    if vvar in vvarn:
+                        vname = ifMibRevVars[vvar]
+                        idx = vvarn.replace(vvar, "")
+                        break
+            else:
+                vn = ObjectIdentity(modName, symName)
+                vn.resolveWithMib(mibViewC)
+                myvar = vn.prettyPrint()
+                if not myvar in ifMibRevVars:
+                    vname = str(myvar)
+                else:
+                    vname = ifMibRevVars[myvar]
+            val = varBind[1].prettyPrint()
+            if vname is None:
+                vname = "notsure"
+            if val != "":
+                entry[vname] = re.sub("^'|'$", "", val)
+            if idx and not "_SNMPIndex" in entry:
+                entry["_SNMPIndex"] = idx
+        entries.append(entry)
+    return entries
+
+
+def trie_decode(proto, rows, snmpview, mibViewC):
+    (trie, ifMibRevVars) = proto.trie.compile('Table', snmpview, mibViewC)
+    return [proto._decode_row(varBinds, trie, ifMibRevVars, mibViewC) for varBinds in rows]
+
+
+def record(agent, view):
+    """Walk a view once and keep the varbinds as received
+
+    :return: (protocol, snmpview, rows)
+    """
+    options = SNMPOptions(port=agent.port, timeout=2, nretries=0, version='v2c')
+    proto = SNMPProtocol('127.0.0.1', agent.community, None, options)
+    proto.trie = SNMPViewTrie()
+    snmpview = dict([(attr, ObjectIdentity(*view[attr])) for attr in view])
+    oids = [ObjectType(snmpview[attr]) for attr in snmpview]
+    rows = [row[3] for row in proto._walk(oids, lookupMib=False) if not row[0] and not row[1]]
+    return (proto, snmpview, rows)
+
+
+def benchmark(tables, rounds=3):
+    """Decode each table with both decoders
+
+    :return: {table: {'Varbinds': n, 'Compile': s, 'Legacy': s, 'Trie': s, 'Same': bool}}
+    """
+    results = {}
+    for name in tables:
+        (records, view) = tables[name]
+        agent = RecordedAgent(records, max_size=65000).start()
+        (proto, snmpview, rows) = record(agent, view)
+        agent.stop()
+        mibViewC = CommandGeneratorVarBinds.getMibViewController(proto.snmpe)
+        t1 = time.time()
+        proto.trie.compile('Table', snmpview, mibViewC)
+        compiled = time.time() - t1
+        t1 = time.time()
+        for i in range(0, rounds):
+            reference = legacy_decode(rows, snmpview, mibViewC)
+        legacy = (time.time() - t1) / rounds
+        t1 = time.time()
+        for i in range(0, rounds):
+            entries = trie_decode(proto, rows, snmpview, mibViewC)
+        decoded = (time.time() - t1) / rounds
+        results[name] = {
+            'Varbinds': sum([len(varBinds) for varBinds in rows]),
+            'Compile': compiled,
+            'Legacy': legacy,
+            'Trie': decoded,
+            'Same': entries == reference
+        }
+    return results
+
+
+def print_results(results):
+    for name in results:
+        res = results[name]
+        print("{0}: {1} varbinds, compiled in {2:.4f}s".format(name, res['Varbinds'], res['Compile']))
+        print("    legacy {0:8.4f}s  trie {1:8.4f}s  speedup {2:6.1f}x  same: {3}".format(
+            res['Legacy'], res['Trie'], res['Legacy'] / max(res['Trie'], 1e-9), res['Same']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the decoding of SNMP table walks")
+    parser.add_argument("--rec", help="recorded snmprec file, decoded with the view of --view")
+    parser.add_argument("--view", choices=['Port', 'PhysicalDisk'], default='Port')
+    parser.add_argument("--ports", type=int, default=96, help="interfaces in the synthetic F10 table")
+    parser.add_argument("--disks", type=int, default=48, help="disks in the synthetic EqualLogic table")
+    parser.add_argument("--rounds", type=int, default=3, help="decodes of each table")
+    args = parser.parse_args(argv)
+    views = {'Port': F10PortView, 'PhysicalDisk': EqualLogicDiskView}
+    if args.rec:
+        tables = {args.rec: (load_snmprec(args.rec), views[args.view])}
+    else:
+        tables = {
+            "F10 Port (" + str(args.ports) + ")": (synthesize_ports(args.ports), F10PortView),
+            "EqualLogic PhysicalDisk (" + str(args.disks) + ")": (synthesize_disks(args.disks), EqualLogicDiskView)
+        }
+    print_results(benchmark(tables, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
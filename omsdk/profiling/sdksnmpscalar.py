@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#
+# Copyright © 2018 Dell Inc. or its subsidiaries. All rights reserved.
+# Dell, EMC, and other trademarks are trademarks of Dell Inc. or its subsidiaries.
+# Other trademarks may be trademarks of their respective owners.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import sys
+import time
+import argparse
+from omsdk.sdkproto import SNMPOptions
+from omsdk.sdksnmp import SNMPProtocol, SNMPViewTrie, PySnmpPresent
+from omsdk.profiling.sdksnmpwalk import RecordedAgent, _oid
+
+if PySnmpPresent:
+    from pysnmp.hlapi import SnmpEngine, ObjectIdentity, ObjectType
+    from pysnmp.hlapi.varbinds import CommandGeneratorVarBinds
+
+PY2 = sys.version_info[0] == 2
+PY3 = sys.version_info[0] == 3
+
+# Benchmark of the fetching of scalar views.
+# Serves a synthetic SNMPv2-MIB system and snmp group from a local agent
+# and counts the requests a poll of it takes: views of MIB scalars walked
+# and fetched with packed GETs, and views of drivers using SNMP GET (the
+# System view of MDArray) fetched one GETNEXT per attribute and packed:
+#     python -m omsdk.profiling.sdksnmpscalar --max-size 484 1472
+
+# system group and the snmp group counters, all MIB scalars
+ScalarView = dict([('system.' + str(i), '1.3.6.1.2.1.1.' + str(i)) for i in range(1, 8)] +
+                  [('snmp.' + str(i), '1.3.6.1.2.1.11.' + str(i))
+                   for i in range(1, 33) if i not in (7, 23)])
+
+# System view of the MDArray driver
+MDArrayView = {
+    'SysObjectID': '1.3.6.1.2.1.1.2',
+    'Name': '1.3.6.1.4.1.674.10893.2.31.500.1.1',
+    'WWID': '1.3.6.1.4.1.674.10893.2.31.500.1.2',
+    'ServiceTag': '1.3.6.1.4.1.674.10893.2.31.500.1.3',
+    'ProductID': '1.3.6.1.4.1.674.10893.2.31.500.1.5',
+    'Status': '1.3.6.1.4.1.674.10893.2.31.500.1.7',
+    'SysName': '1.3.6.1.2.1.1.5'
+}
+
+
+def synthesize_scalars():
+    records = [
+        (_oid('1.3.6.1.2.1.1.1.0'), '4', 'Dell EMC PowerVault MD3860f Storage Array'),
+        (_oid('1.3.6.1.2.1.1.2.0'), '6', '1.3.6.1.4.1.674.10893.2.31'),
+        (_oid('1.3.6.1.2.1.1.3.0'), '67', '8640000'),
+        (_oid('1.3.6.1.2.1.1.4.0'), '4', 'storage-admin@example.com'),
+        (_oid('1.3.6.1.2.1.1.5.0'), '4', 'md3860-lab-01'),
+        (_oid('1.3.6.1.2.1.1.6.0'), '4', 'Lab 2, Rack 14'),
+        (_oid('1.3.6.1.2.1.1.7.0'), '2', '72')
+    ]
+    for i in range(1, 33):
+        if i not in (7, 23):
+            records.append((_oid('1.3.6.1.2.1.11.' + str(i) + '.0'), '65', str(i * 7919)))
+    records.extend([
+        (_oid(MDArrayView['Name']) + (0,), '4', 'array-01'),
+        (_oid(MDArrayView['WWID']) + (0,), '4x', '600a098000a4b28d000000005a1b2c3d'),
+        (_oid(MDArrayView['ServiceTag']) + (0,), '4', '7XK2Q12'),
+        (_oid(MDArrayView['ProductID']) + (0,), '4', 'MD38xxf'),
+        (_oid(MDArrayView['Status']) + (0,), '2', '1')
+    ])
+    return sorted(records)
+
+
+def walk_scalars(proto, snmpview):
+    # the walk of the view, as SNMPProtocol._snmp_builder did for scalars
+    oids = [ObjectType(snmpview[attr]) for attr in snmpview]
+    mibViewC = CommandGeneratorVarBinds.getMibViewController(proto.snmpe)
+    (trie, ifMibRevVars) = proto.trie.compile('Scalars', snmpview, mibViewC)
+    rows = []
+    for (errorIndication, errorStatus, errorIndex, varBinds) in proto._walk(oids, lookupMib=False):
+        if not errorIndication and not errorStatus:
+            rows.append(proto._decode_row(varBinds, trie, ifMibRevVars, mibViewC))
+    return proto._entities('Scalars', {'Scalars': rows})
+
+
+def poll(agent, snmpview, version, max_message_size, mode, snmpEngine, trie):
+    """Fetch the view from the agent, with a new session
+
+    :return: (data, requests, seconds)
+    """
+    options = SNMPOptions(port=agent.port, timeout=2, nretries=0, version=version,
+                          max_message_size=max_message_size)
+    proto = SNMPProtocol('127.0.0.1', agent.community, None, options,
+                         useSNMPGetFlag=mode in ['getnext', 'packed getnext'],
+                         snmpEngine=snmpEngine)
+    proto.trie = trie
+    if mode == 'getnext':
+        # one attribute per request
+        proto.maxVarBinds = 1
+    start = agent.packets
+    t1 = time.time()
+    if mode == 'walk':
+        data = walk_scalars(proto, snmpview)
+    else:
+        data = proto.enumerate('Scalars', snmpview)['Data']
+    elapsed = time.time() - t1
+    return (data, agent.packets - start, elapsed)
+
+
+def _attributes(data):
+    if not data or 'Scalars' not in data:
+        return 0
+    return len([attr for attr in data['Scalars'] if not attr.startswith('_')])
+
+
+def benchmark(sizes):
+    """Poll the scalar views with each mode, for agents of each max size
+
+    :return: {view: {mode: {'Packets': n, 'Time': seconds, 'Attributes': n, 'Same': bool}}}
+    """
+    results = {}
+    snmpEngine = SnmpEngine()
+    trie = SNMPViewTrie()
+    views = [
+        ("SNMPv2-MIB scalars (" + str(len(ScalarView)) + ")", ScalarView, ['walk', 'packed get']),
+        ("MDArray System (" + str(len(MDArrayView)) + ")", MDArrayView, ['getnext', 'packed getnext'])
+    ]
+    for size in sizes:
+        agent = RecordedAgent(synthesize_scalars(), max_size=size).start()
+        for (name, view, modes) in views:
+            snmpview = dict([(attr, ObjectIdentity(view[attr])) for attr in view])
+            for version in ['v1', 'v2c']:
+                reference = None
+                for mode in modes:
+                    # loads the MIBs and compiles the view
+                    poll(agent, snmpview, version, size, mode, snmpEngine, trie)
+                    (data, packets, elapsed) = poll(agent, snmpview, version, size, mode, snmpEngine, trie)
+                    if reference is None:
+                        reference = data
+                    label = name + " " + version + " max " + str(size)
+                    results.setdefault(label, {})[mode] = {
+                        'Packets': packets,
+                        'Time': elapsed,
+                        'Attributes': _attributes(data),
+                        'Same': data == reference
+                    }
+        agent.stop()
+    return results
+
+
+def print_results(results):
+    for name in results:
+        print(name)
+        for mode in results[name]:
+            res = results[name][mode]
+            print("    {0:16s} {1:4d} attributes {2:4d} packets {3:8.4f}s  same: {4}".format(
+                mode, res['Attributes'], res['Packets'], res['Time'], res['Same']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count SNMP requests per poll of scalar views")
+    parser.add_argument("--max-size", type=int, nargs='+', default=[484, 1472],
+                        help="largest message of the agent")
+    args = parser.parse_args(argv)
+    print_results(benchmark(args.max_size))
+
+
+if __name__ == "__main__":
+    main()
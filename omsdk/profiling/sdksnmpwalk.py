@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#
+# Copyright © 2018 Dell Inc. or its subsidiaries. All rights reserved.
+# Dell, EMC, and other trademarks are trademarks of Dell Inc. or its subsidiaries.
+# Other trademarks may be trademarks of their respective owners.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+import sys
+import time
+import bisect
+import socket
+import argparse
+import threading
+from omsdk.sdkproto import SNMPOptions
+from omsdk.sdksnmp import SNMPProtocol, PySnmpPresent
+
+if PySnmpPresent:
+    from pysnmp.hlapi import ObjectIdentity
+    from pysnmp.proto import api
+    from pyasn1.codec.ber import encoder, decoder
+
+PY2 = sys.version_info[0] == 2
+PY3 = sys.version_info[0] == 3
+
+# Benchmark of the SNMP table walks.
+# Serves recorded tables (snmprec files, as written by snmpsim's snmprec
+# tool, one "oid|tag|value" per line) or synthetic F10 interface and
+# EqualLogic disk tables from a local agent, walks them with SNMPv1 GETNEXT
+# and SNMPv2c GETBULK and counts the requests each walk takes:
+#     python -m omsdk.profiling.sdksnmpwalk --rec <file.snmprec> --repetitions 10 25 50
+
+# F10 Port view of the F10 driver
+PortView = {
+    'Description': '1.3.6.1.2.1.2.2.1.2',
+    'Type': '1.3.6.1.2.1.2.2.1.3',
+    'Address': '1.3.6.1.2.1.2.2.1.6',
+    'ifIndex': '1.3.6.1.2.1.2.2.1.1',
+    'Status': '1.3.6.1.2.1.2.2.1.7',
+    'ifInOctets': '1.3.6.1.2.1.2.2.1.10',
+    'ifOutOctets': '1.3.6.1.2.1.2.2.1.16',
+    'ifInDiscards': '1.3.6.1.2.1.2.2.1.13',
+    'ifOutDiscards': '1.3.6.1.2.1.2.2.1.19',
+    'ifInErrors': '1.3.6.1.2.1.2.2.1.14',
+    'ifOutErrors': '1.3.6.1.2.1.2.2.1.20',
+    'ifInUnknownProtos': '1.3.6.1.2.1.2.2.1.15',
+    'ifSpeed': '1.3.6.1.2.1.2.2.1.5',
+    'SysIfName': '1.3.6.1.4.1.6027.3.26.1.4.10.1.2'
+}
+
+# PhysicalDisk view of the EqualLogic driver
+DiskView = {
+    'Status': '1.3.6.1.4.1.12740.3.1.1.1.8',
+    'Slot': '1.3.6.1.4.1.12740.3.1.1.1.11',
+    'Model': '1.3.6.1.4.1.12740.3.1.1.1.3',
+    'SerialNumber': '1.3.6.1.4.1.12740.3.1.1.1.5',
+    'FirmwareVersion': '1.3.6.1.4.1.12740.3.1.1.1.4',
+    'TotalSize': '1.3.6.1.4.1.12740.3.1.1.1.6'
+}
+
+
+def _oid(value):
+    return tuple([int(i) for i in value.strip('.').split('.')])
+
+
+def load_snmprec(fname):
+    """Read a snmprec file into sorted (oid, tag, value) records"""
+    records = []
+    with open(fname) as rec:
+        for line in rec:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            (oid, tag, value) = line.split('|', 2)
+            records.append((_oid(oid), tag, value))
+    return sorted(records)
+
+
+def synthesize_ports(count):
+    records = []
+    for i in range(1, count + 1):
+        name = 'TenGigabitEthernet 0/' + str(i)
+        records.extend([
+            (_oid(PortView['ifIndex']) + (i,), '2', str(i)),
+            (_oid(PortView['Description']) + (i,), '4', name),
+            (_oid(PortView['Type']) + (i,), '2', '6'),
+            (_oid('1.3.6.1.2.1.2.2.1.4') + (i,), '2', '1554'),
+            (_oid(PortView['ifSpeed']) + (i,), '66', '4294967295'),
+            (_oid(PortView['Address']) + (i,), '4x', '00011e%06x' % i),
+            (_oid(PortView['Status']) + (i,), '2', str(1 + i % 2)),
+            (_oid('1.3.6.1.2.1.2.2.1.8') + (i,), '2', str(1 + i % 2)),
+            (_oid(PortView['ifInOctets']) + (i,), '65', str(i * 1000003 % 4294967296)),
+            (_oid(PortView['ifInDiscards']) + (i,), '65', '0'),
+            (_oid(PortView['ifInErrors']) + (i,), '65', str(i % 3)),
+            (_oid(PortView['ifInUnknownProtos']) + (i,), '65', '0'),
+            (_oid(PortView['ifOutOctets']) + (i,), '65', str(i * 2000003 % 4294967296)),
+            (_oid(PortView['ifOutDiscards']) + (i,), '65', '0'),
+            (_oid(PortView['ifOutErrors']) + (i,), '65', '0'),
+            (_oid(PortView['SysIfName']) + (i,), '4', 'Te 0/' + str(i))
+        ])
+    return sorted(records)
+
+
+def synthesize_disks(count):
+    records = []
+    for i in range(1, count + 1):
+        index = (1, 329487234, i)
+        records.extend([
+            (_oid(DiskView['Model']) + index, '4', 'ST9600204SS'),
+            (_oid(DiskView['FirmwareVersion']) + index, '4', 'FM0' + str(i % 10)),
+            (_oid(DiskView['SerialNumber']) + index, '4', '6WN%05d' % i),
+            (_oid(DiskView['TotalSize']) + index, '2', '572325'),
+            (_oid(DiskView['Status']) + index, '2', '1'),
+            (_oid(DiskView['Slot']) + index, '2', str(i - 1))
+        ])
+    return sorted(records)
+
+
+class RecordedAgent(object):
+    """
+    Minimal SNMPv1/v2c agent serving recorded records
+
+    Answers GET, GETNEXT and GETBULK and counts the requests it gets.
+    GETBULK responses are cut to max_size bytes, as agents do, and larger
+    GET and GETNEXT responses are refused with tooBig.
+    """
+
+    def __init__(self, records, community='public', max_size=1472, v1_only=False):
+        """
+        :param records: sorted (oid, tag, value) records
+        :param max_size: largest response the agent sends
+        :param v1_only: True to drop SNMPv2c requests, like SNMPv1 only agents
+        """
+        self.records = records
+        self.oids = [i[0] for i in records]
+        self.community = community
+        self.max_size = max_size
+        self.v1_only = v1_only
+        self.packets = 0
+        self.port = None
+        self._sock = None
+        self._thread = None
+
+    def start(self):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind(('127.0.0.1', 0))
+        self.port = self._sock.getsockname()[1]
+        self._thread = threading.Thread(name="omsdk-recorded-agent", target=self._serve)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._sock.close()
+
+    def _serve(self):
+        while True:
+            try:
+                (wholeMsg, address) = self._sock.recvfrom(65535)
+            except (socket.error, OSError):
+                return
+            self.packets = self.packets + 1
+            try:
+                response = self._respond(wholeMsg)
+            except Exception:
+                response = None
+            if response is not None:
+                self._sock.sendto(response, address)
+
+    def _value(self, pMod, tag, value):
+        if tag == '2':
+            return pMod.Integer(int(value))
+        if tag == '4':
+            return pMod.OctetString(value)
+        if tag == '4x':
+            return pMod.OctetString(hexValue=value)
+        if tag == '6':
+            return pMod.ObjectIdentifier(value)
+        if tag == '64':
+            return pMod.IpAddress(value)
+        if tag == '67':
+            return pMod.TimeTicks(int(value))
+        if pMod is api.protoModules[api.protoVersion1]:
+            return {'65': pMod.Counter, '66': pMod.Gauge}[tag](int(value))
+        return {'65': pMod.Counter32, '66': pMod.Gauge32, '70': pMod.Counter64}[tag](int(value))
+
+    def _next(self, oid, v1):
+        pos = bisect.bisect_right(self.oids, oid)
+        while pos < len(self.records):
+            if not (v1 and self.records[pos][1] == '70'):
+                return pos
+            # v1 has no Counter64
+            pos = pos + 1
+        return None
+
+    def _respond(self, wholeMsg):
+        version = int(api.decodeMessageVersion(wholeMsg))
+        if version not in api.protoModules or (self.v1_only and version != api.protoVersion1):
+            return None
+        pMod = api.protoModules[version]
+        v1 = version == api.protoVersion1
+        (reqMsg, rest) = decoder.decode(wholeMsg, asn1Spec=pMod.Message())
+        if str(pMod.apiMessage.getCommunity(reqMsg)) != self.community:
+            return None
+        reqPDU = pMod.apiMessage.getPDU(reqMsg)
+        rspMsg = pMod.apiMessage.getResponse(reqMsg)
+        rspPDU = pMod.apiMessage.getPDU(rspMsg)
+        varBinds = []
+        if reqPDU.isSameTypeWith(pMod.GetRequestPDU()):
+            for (oid, val) in pMod.apiPDU.getVarBinds(reqPDU):
+                pos = bisect.bisect_left(self.oids, tuple(oid))
+                if pos < len(self.oids) and self.oids[pos] == tuple(oid) and \
+                        not (v1 and self.records[pos][1] == '70'):
+                    varBinds.append((oid, self._value(pMod, *self.records[pos][1:])))
+                elif v1:
+                    pMod.apiPDU.setErrorStatus(rspPDU, 2)
+                    pMod.apiPDU.setErrorIndex(rspPDU, len(varBinds) + 1)
+                    varBinds.append((oid, val))
+                else:
+                    varBinds.append((oid, pMod.NoSuchInstance('')))
+        elif reqPDU.isSameTypeWith(pMod.GetNextRequestPDU()):
+            for (oid, val) in pMod.apiPDU.getVarBinds(reqPDU):
+                pos = self._next(tuple(oid), v1)
+                if pos is not None:
+                    record = self.records[pos]
+                    varBinds.append((pMod.ObjectIdentifier(record[0]), self._value(pMod, *record[1:])))
+                elif v1:
+                    pMod.apiPDU.setErrorStatus(rspPDU, 2)
+                    pMod.apiPDU.setErrorIndex(rspPDU, len(varBinds) + 1)
+                    varBinds.append((oid, val))
+                else:
+                    varBinds.append((oid, pMod.EndOfMibView('')))
+        elif not v1 and reqPDU.isSameTypeWith(pMod.GetBulkRequestPDU()):
+            return self._bulk(pMod, reqPDU, rspMsg, rspPDU)
+        else:
+            return None
+        pMod.apiPDU.setVarBinds(rspPDU, varBinds)
+        response = encoder.encode(rspMsg)
+        if len(response) > self.max_size:
+            pMod.apiPDU.setErrorStatus(rspPDU, 1)
+            pMod.apiPDU.setErrorIndex(rspPDU, 0)
+            pMod.apiPDU.setVarBinds(rspPDU, pMod.apiPDU.getVarBinds(reqPDU))
+            response = encoder.encode(rspMsg)
+        return response
+
+    def _bulk(self, pMod, reqPDU, rspMsg, rspPDU):
+        nonRepeaters = int(pMod.apiBulkPDU.getNonRepeaters(reqPDU))
+        maxRepetitions = int(pMod.apiBulkPDU.getMaxRepetitions(reqPDU))
+        request = [tuple(oid) for (oid, val) in pMod.apiBulkPDU.getVarBinds(reqPDU)]
+        varBinds = []
+        for oid in request[:nonRepeaters]:
+            pos = self._next(oid, False)
+            varBinds.append(self._bind(pMod, oid, pos))
+        rows = []
+        current = request[nonRepeaters:]
+        for i in range(0, maxRepetitions):
+            row = []
+            for oid in current:
+                row.append(self._bind(pMod, oid, self._next(oid, False)))
+            rows.append(row)
+            current = [tuple(varBind[0]) for varBind in row]
+            if all([isinstance(varBind[1], pMod.EndOfMibView) for varBind in row]):
+                break
+        while True:
+            pMod.apiPDU.setVarBinds(rspPDU, varBinds + [varBind for row in rows for varBind in row])
+            response = encoder.encode(rspMsg)
+            if len(response) <= self.max_size or len(rows) <= 1:
+                return response
+            # drop trailing rows until the response fits
+            rows = rows[:max(1, len(rows) * self.max_size // len(response))]
+
+    def _bind(self, pMod, oid, pos):
+        if pos is None:
+            return (pMod.ObjectIdentifier(oid), pMod.EndOfMibView(''))
+        record = self.records[pos]
+        return (pMod.ObjectIdentifier(record[0]), self._value(pMod, *record[1:]))
+
+
+def walk(agent, view, version, max_repetitions=25):
+    """Enumerate a view from the agent
+
+    :return: (data, requests, seconds)
+    """
+    options = SNMPOptions(port=agent.port, timeout=2, nretries=0,
+                          version=version, max_repetitions=max_repetitions)
+    proto = SNMPProtocol('127.0.0.1', agent.community, None, options)
+    snmpview = dict([(attr, ObjectIdentity(view[attr])) for attr in view])
+    start = agent.packets
+    t1 = time.time()
+    retval = proto.enumerate('Table', snmpview)
+    elapsed = time.time() - t1
+    return (retval.get('Data'), agent.packets - start, elapsed)
+
+
+def benchmark(tables, repetitions, max_size=1472):
+    """Walk each table with GETNEXT and GETBULK
+
+    :return: {table: {mode: {'Packets': n, 'Time': seconds, 'Rows': n, 'Same': bool}}}
+    """
+    results = {}
+    for name in tables:
+        (records, view) = tables[name]
+        agent = RecordedAgent(records, max_size=max_size).start()
+        results[name] = {}
+        (reference, packets, elapsed) = walk(agent, view, 'v1')
+        modes = [('v1 getnext', 'v1', None)]
+        modes.extend([('v2c bulk ' + str(i), 'v2c', i) for i in repetitions])
+        for (mode, version, count) in modes:
+            (data, packets, elapsed) = walk(agent, view, version, count or 25)
+            rows = 0
+            if data and 'Table' in data:
+                rows = len(data['Table']) if isinstance(data['Table'], list) else 1
+            results[name][mode] = {
+                'Packets': packets,
+                'Time': elapsed,
+                'Rows': rows,
+                'Same': data == reference
+            }
+        agent.stop()
+    return results
+
+
+def print_results(results):
+    for name in results:
+        print(name)
+        for mode in results[name]:
+            res = results[name][mode]
+            print("    {0:16s} {1:5d} rows {2:6d} packets {3:8.4f}s  same: {4}".format(
+                mode, res['Rows'], res['Packets'], res['Time'], res['Same']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count SNMP requests per table walk")
+    parser.add_argument("--rec", help="recorded snmprec file, walked with the view of --view")
+    parser.add_argument("--view", choices=['Port', 'PhysicalDisk'], default='Port')
+    parser.add_argument("--ports", type=int, default=96, help="interfaces in the synthetic F10 table")
+    parser.add_argument("--disks", type=int, default=48, help="disks in the synthetic EqualLogic table")
+    parser.add_argument("--repetitions", type=int, nargs='+', default=[10, 25, 50])
+    parser.add_argument("--max-size", type=int, default=1472, help="largest response of the agent")
+    args = parser.parse_args(argv)
+    views = {'Port': PortView, 'PhysicalDisk': DiskView}
+    if args.rec:
+        tables = {args.rec: (load_snmprec(args.rec), views[args.view])}
+    else:
+        tables = {
+            "F10 Port (" + str(args.ports) + ")": (synthesize_ports(args.ports), PortView),
+            "EqualLogic PhysicalDisk (" + str(args.disks) + ")": (synthesize_disks(args.disks), DiskView)
+        }
+    print_results(benchmark(tables, args.repetitions, args.max_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#
+# Copyright © 2018 Dell Inc. or its subsidiaries. All rights reserved.
+# Dell, EMC, and other trademarks are trademarks of Dell Inc. or its subsidiaries.
+# Other trademarks may be trademarks of their respective owners.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import os
+import sys
+import time
+import glob
+import argparse
+import xml.dom.minidom
+from omsdk.http.sdkwsmanpdu import WsManResponse, WsManDecoder, LxmlPresent
+
+PY2 = sys.version_info[0] == 2
+PY3 = sys.version_info[0] == 3
+
+if PY3:
+    import tracemalloc
+
+# Benchmark of the WS-Man response decoders.
+# Decodes recorded iDRAC envelopes (*.xml in a directory) or, if none are
+# given, synthetic DCIM_SoftwareIdentity enumerations with the minidom
+# decoder and the streaming iterparse (and lxml) decoder:
+#     python -m omsdk.profiling.sdkwsmanparse --dir <envelopes> --repeat 5
+
+EnvelopeHeader = """<?xml version="1.0" encoding="UTF-8"?>
+<s:Envelope xmlns:s="http://www.w3.org/2003/05/soap-envelope" xmlns:wsa="http://schemas.xmlsoap.org/ws/2004/08/addressing" xmlns:wsen="http://schemas.xmlsoap.org/ws/2004/09/enumeration" xmlns:wsman="http://schemas.dmtf.org/wbem/wsman/1/wsman.xsd" xmlns:n1="http://schemas.dell.com/wbem/wscim/1/cim-schema/2/DCIM_SoftwareIdentity" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
+<s:Header>
+<wsa:To>http://schemas.xmlsoap.org/ws/2004/08/addressing/role/anonymous</wsa:To>
+<wsa:Action>http://schemas.xmlsoap.org/ws/2004/09/enumeration/EnumerateResponse</wsa:Action>
+<wsa:RelatesTo>uuid:7f5c4a0e-0000-0000-0000-000000000000</wsa:RelatesTo>
+<wsa:MessageID>uuid:8a1d2b3c-0000-0000-0000-000000000000</wsa:MessageID>
+</s:Header>
+<s:Body>
+<wsen:EnumerateResponse>
+<wsman:Items>
+"""
+
+EnvelopeInstance = """<n1:DCIM_SoftwareIdentity>
+<n1:BuildNumber>{0}</n1:BuildNumber>
+<n1:Classifications>10</n1:Classifications>
+<n1:ComponentID>{1}</n1:ComponentID>
+<n1:ComponentType>FRMW</n1:ComponentType>
+<n1:DeviceID xsi:nil="true"/>
+<n1:ElementName>Integrated Dell Remote Access Controller</n1:ElementName>
+<n1:FQDD>iDRAC.Embedded.1-{0}</n1:FQDD>
+<n1:IdentityInfoType>OrgID:ComponentType:ComponentID</n1:IdentityInfoType>
+<n1:IdentityInfoValue>DCIM:firmware:{1}</n1:IdentityInfoValue>
+<n1:InstanceID>DCIM:INSTALLED#iDRAC.Embedded.1-{0}#IDRACinfo</n1:InstanceID>
+<n1:IsEntity>true</n1:IsEntity>
+<n1:MajorVersion>3</n1:MajorVersion>
+<n1:MinorVersion>21</n1:MinorVersion>
+<n1:RevisionNumber>{0}</n1:RevisionNumber>
+<n1:Status>Installed</n1:Status>
+<n1:SubDeviceID xsi:nil="true"/>
+<n1:Updateable>true</n1:Updateable>
+<n1:VersionString>3.21.21.{0}</n1:VersionString>
+</n1:DCIM_SoftwareIdentity>
+"""
+
+EnvelopeTrailer = """</wsman:Items>
+<wsman:EndOfSequence/>
+</wsen:EnumerateResponse>
+</s:Body>
+</s:Envelope>
+"""
+
+
+def synthesize_envelope(count):
+    parts = [EnvelopeHeader]
+    for i in range(0, count):
+        parts.append(EnvelopeInstance.format(i, 25227 + i))
+    parts.append(EnvelopeTrailer)
+    return "".join(parts).encode('utf-8')
+
+
+def load_envelopes(directory):
+    envelopes = {}
+    for fname in sorted(glob.glob(os.path.join(directory, "*.xml"))):
+        with open(fname, 'rb') as envelope:
+            envelopes[os.path.basename(fname)] = envelope.read()
+    return envelopes
+
+
+def decode_minidom(value):
+    return WsManResponse()._xmltojson(xml.dom.minidom.parseString(value), True)
+
+
+def decoders():
+    retval = [('minidom', decode_minidom),
+              ('iterparse', WsManDecoder(use_lxml=False).decode)]
+    if LxmlPresent:
+        retval.append(('lxml', WsManDecoder(use_lxml=True).decode))
+    return retval
+
+
+def measure(func, value, repeat):
+    best = None
+    for i in range(0, repeat):
+        t1 = time.time()
+        func(value)
+        elapsed = time.time() - t1
+        if best is None or elapsed < best:
+            best = elapsed
+    peak = None
+    if PY3:
+        tracemalloc.start()
+        func(value)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return (best, peak)
+
+
+def benchmark(envelopes, repeat=5):
+    """Decode each envelope with every decoder
+
+    :return: {envelope: {decoder: {'Time': best seconds, 'Peak': bytes, 'Same': bool}}}
+    """
+    results = {}
+    for name in envelopes:
+        value = envelopes[name]
+        reference = decode_minidom(value)
+        results[name] = {}
+        for (dname, func) in decoders():
+            (best, peak) = measure(func, value, repeat)
+            results[name][dname] = {
+                'Time': best,
+                'Peak': peak,
+                'Same': func(value) == reference
+            }
+    return results
+
+
+def print_results(envelopes, results):
+    for name in results:
+        print("{0} ({1} bytes)".format(name, len(envelopes[name])))
+        base = results[name]['minidom']['Time']
+        for dname in results[name]:
+            res = results[name][dname]
+            peak = "-" if res['Peak'] is None else "{0:.1f} MB".format(res['Peak'] / 1048576.0)
+            print("    {0:10s} {1:8.4f}s  x{2:5.2f}  peak {3:>9s}  same: {4}".format(
+                dname, res['Time'], base / res['Time'] if res['Time'] else 0, peak, res['Same']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark WS-Man response decoders")
+    parser.add_argument("--dir", help="directory of recorded WS-Man envelopes (*.xml)")
+    parser.add_argument("--count", type=int, default=2000,
+                        help="instances in the synthetic envelope when no --dir is given")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    if args.dir:
+        envelopes = load_envelopes(args.dir)
+    else:
+        envelopes = {}
+        for count in (10, args.count):
+            envelopes["SoftwareIdentity-" + str(count)] = synthesize_envelope(count)
+    print_results(envelopes, benchmark(envelopes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -133,17 +133,38 @@ class iBaseDiscovery(object):
         self.ref = registry
         self.protofactory = ProtocolFactory()
         self.prefDiscOrder = 999  # default
+        # ProtocolEnum => {attribute: regex} identifying the device
+        # in the answers collected by DeviceFingerprint
+        self.fingerprint = {}
 
-    def is_entitytype(self, pinfra, ipaddr, creds, protopref, driver_en, pOptions):
+    def match_fingerprint(self, fprint):
+        """Check whether the device fingerprint belongs to this driver
+
+        :return: True if it does, False if it does not, None if it cannot be told
+        """
+        matched = None
+        for proto in self.protofactory.protos:
+            result = proto.match_fingerprint(fprint, self.fingerprint)
+            if result:
+                return True
+            if result is False:
+                matched = False
+        return matched
+
+    def is_entitytype(self, pinfra, ipaddr, creds, protopref, driver_en, pOptions, transports=None):
         protofactory = self.protofactory.clone()
         if self.protofactory.prefProtocol:
             protofactory.copy(self.protofactory.prefProtocol)
         elif protopref:
             protofactory.copy(protopref)
+        if transports:
+            for proto in protofactory.protos:
+                proto.transport = transports.get(proto.enumid)
         entity = self.my_entitytype(pinfra, ipaddr, creds, protofactory)
         if not entity is None:
             entity.driver_en = driver_en
             entity.pOptions = pOptions
+            entity.parallel_probe = pinfra.parallel_probe
             if entity.connect():
                 return entity
         return None
@@ -199,8 +220,15 @@ class iBaseDriver(object):
         self.entityjson = {}
         # SNMP Entity MIB JSON
         self.emib_json = {}
+        # SNMP Entity MIB physical containment tree
+        self.emib_tree = {}
         self.supports_entity_mib = False
 
+        # Number of views enumerated concurrently
+        self.max_parallel_views = ConnectionFactory.MAX_PARALLEL_VIEWS
+        # Probe protocols concurrently while identifying the device
+        self.parallel_probe = False
+
         # Reset
         self.reset()
 
@@ -218,6 +246,7 @@ class iBaseDriver(object):
 
         # Initialize EnityJSON
         self.emib_json = {}
+        self.emib_tree = {}
         self.entityjson = {}
         self.entityjson["topology"] = {}
         self.entityjson["devices"] = {}
@@ -250,6 +279,16 @@ class iBaseDriver(object):
             pOptions = self.pOptions
         return self.my_connect(pOptions)
 
+    def set_parallel_views(self, count):
+        """
+            Enumerate up to count independent views of the device concurrently
+        :param count: maximum number of concurrent requests to the device, 1 to disable
+        :type count: int
+        """
+        self.max_parallel_views = max(1, count)
+        if self.cfactory:
+            self.cfactory.max_parallel = self.max_parallel_views
+
     def my_connect(self, pOptions):
         if not self.cfactory.connect(self.ref.name, self.ipaddr, self.creds, self.protofactory, pOptions):
             logger.debug("Connection failed to " + self.ipaddr)
@@ -28,6 +28,7 @@ from omsdk.sdkproto import ProtocolEnum
 from omsdk.sdkprotopref import ProtoPreference, ProtoMethods
 from omsdk.sdkcenum import EnumWrapper, TypeHelper
 from omsdk.sdkprint import PrettyPrint
+from omsdk.sdkworkers import WorkerPool
 
 from enum import Enum
 import re
@@ -41,12 +42,15 @@ logger = logging.getLogger(__name__)
 class ConnectionFactory(object):
 
     CONN_RETRIES = 1
+    MAX_PARALLEL_VIEWS = 1
 
     def __init__(self, sdkobj):
         self.work_connection = []
         self.work_protocols = []
         self.isConnected = False
         self.sdkobj = sdkobj
+        self.max_parallel = sdkobj.max_parallel_views
+        self.parallel_probe = sdkobj.parallel_probe
 
     def printx(self):
         logger.debug(str(len(self.work_connection)) + " connections in loop!")
@@ -122,9 +126,8 @@ class ConnectionFactory(object):
         collector = {}
         collector_idseq = {}
         disconnectProto = []
-        for connection in self.work_connection:
-            retval = connection.enumerate_view(index, True)
-
+        results = self._view_results(index)
+        for (connection, retval) in results:
             if retval['Status'] != 'Success' or \
                 not 'Data' in retval or \
                 retval['Data'] is None or \
@@ -163,6 +166,7 @@ class ConnectionFactory(object):
             if index in self.pfactory.classifier:
                 disconnectProto.append(connection)
                 break
+        results.close()
 
         if disconnectProto:
             self.work_connection = []
@@ -177,6 +181,27 @@ class ConnectionFactory(object):
                 retdoc[clsName].append(collector[clsName][i])
         return retdoc
 
+    def _view_results(self, index):
+        # yields (connection, retval) in protocol preference order
+        if not self.parallel_probe or len(self.work_connection) <= 1 or \
+                index not in self.pfactory.classifier:
+            for connection in self.work_connection:
+                yield (connection, connection.enumerate_view(index, True))
+            return
+        # Probe all protocols at once; the preference order still decides
+        # the winner, slower protocols behind it are cancelled
+        pool = WorkerPool(len(self.work_connection), name=self.ipaddr + "-probe")
+        items = []
+        for connection in self.work_connection:
+            items.append((connection, pool.submit(connection.enumerate_view, index, True)))
+        try:
+            for (connection, item) in items:
+                yield (connection, item.get())
+        finally:
+            for (connection, item) in items:
+                pool.abandon(item, 'Cancelled')
+            pool.shutdown(wait=False)
+
     def enumerate_all(self, retdoc, comp_enum):
         plist = []
         for comp in comp_enum:
@@ -184,13 +209,20 @@ class ConnectionFactory(object):
         return self.enumerate_list(retdoc, *plist)
 
     def enumerate_list(self, retdoc, *comp_enum):
+        comps = []
+        names = set([])
         for comp in comp_enum:
             # Ignore if component already present
-            if TypeHelper.resolve(comp) in retdoc:
+            name = TypeHelper.resolve(comp)
+            if name in retdoc or name in names:
                 continue
-            comp_details = self.enumerate_view(comp)
-            for field in comp_details:
-                retdoc[field] = comp_details[field]
+            names.add(name)
+            comps.append(comp)
+        if self._supports_parallel() and len(comps) > 1:
+            self._enumerate_parallel(retdoc, comps)
+        else:
+            for comp in comps:
+                self._merge_view(retdoc, self.enumerate_view(comp))
         self.complete()
         
         if not self.pfactory.sspec is None:
@@ -216,6 +248,32 @@ class ConnectionFactory(object):
                 retdoc["Subsystem"] = subsystem
         return retdoc
 
+    def _merge_view(self, retdoc, comp_details):
+        for field in comp_details:
+            retdoc[field] = comp_details[field]
+
+    def _supports_parallel(self):
+        if self.max_parallel <= 1:
+            return False
+        for connection in self.work_connection:
+            if not connection.supports_concurrency:
+                return False
+        return True
+
+    def _enumerate_parallel(self, retdoc, comps):
+        # classifier views can narrow down work_connection, so run them first
+        serial = [comp for comp in comps if comp in self.pfactory.classifier]
+        others = [comp for comp in comps if comp not in self.pfactory.classifier]
+        for comp in serial:
+            self._merge_view(retdoc, self.enumerate_view(comp))
+        logger.debug(self.ipaddr + " : enumerating " + str(len(others)) +
+                     " views with " + str(self.max_parallel) + " parallel requests")
+        with WorkerPool(self.max_parallel, name=self.ipaddr) as pool:
+            items = [pool.submit(self.enumerate_view, comp) for comp in others]
+        # merge in the requested order, so retdoc is the same as the serial walk
+        for item in items:
+            self._merge_view(retdoc, item.get())
+
     def operation(self, fname, **kwargs):
         retdoc = {}
         for connection in self.work_connection:
@@ -68,6 +68,38 @@ class Snmpv2Credentials(iCredentials):
         return (TypeHelper.resolve(self.enid) + "(community=" + self.community + ")")
 
 
+class Snmpv3Credentials(iCredentials):
+    def __init__(self, username, authKey=None, privKey=None,
+                 authProtocol='SHA', privProtocol='AES', engineId=None):
+        """
+        :param username: USM user name
+        :param authKey: authentication passphrase, None for noAuthNoPriv
+        :param privKey: privacy passphrase, None for authNoPriv
+        :param authProtocol: MD5, SHA, SHA224, SHA256, SHA384 or SHA512
+        :param privProtocol: DES, 3DES, AES, AES192 or AES256
+        :param engineId: hex string of the authoritative snmpEngineID, needed
+            to receive v3 traps from an agent
+        :type username: str
+        :type engineId: str
+        """
+        if PY2:
+            super(Snmpv3Credentials, self).__init__(CredentialsEnum.SNMPv3)
+        else:
+            super().__init__(CredentialsEnum.SNMPv3)
+        self.username = username
+        self.authKey = authKey
+        self.privKey = privKey
+        self.authProtocol = authProtocol
+        self.privProtocol = privProtocol
+        self.engineId = engineId
+
+    def __str__(self):
+        return (TypeHelper.resolve(self.enid) + "(username=" + str(self.username) + ")")
+
+    def __repr__(self):
+        return (TypeHelper.resolve(self.enid) + "(username=" + str(self.username) + ")")
+
+
 class UserCredentials(iCredentials):
     def __init__(self, username, password, work_group="."):
         if PY2:
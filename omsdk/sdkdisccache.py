@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#
+# Copyright © 2018 Dell Inc. or its subsidiaries. All rights reserved.
+# Dell, EMC, and other trademarks are trademarks of Dell Inc. or its subsidiaries.
+# Other trademarks may be trademarks of their respective owners.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import os
+import sys
+import json
+import time
+import atexit
+import logging
+import tempfile
+import threading
+from omsdk.sdkcenum import TypeHelper
+from omsdk.sdkprotopref import ProtoPreference, ProtocolEnum
+from omsdk.sdkproto import ProtocolOptionsFactory, SNMPOptions
+from omsdk.http.sdkwsmanbase import WsManOptions
+from omsdk.http.sdkredfishbase import RedfishOptions
+from omsdk.http.sdkrestbase import RestOptions
+
+PY2 = sys.version_info[0] == 2
+PY3 = sys.version_info[0] == 3
+
+logger = logging.getLogger(__name__)
+
+
+
+def _user_cache_dir():
+    # per user directory, so that other local users cannot plant or
+    # redirect the cache file
+    home = os.path.expanduser('~')
+    if home != '~' and os.path.isdir(home):
+        return os.path.join(home, '.omsdk')
+    if hasattr(os, 'getuid'):
+        user = str(os.getuid())
+    else:
+        user = os.environ.get('USERNAME', 'user')
+    return os.path.join(tempfile.gettempdir(), 'omsdk-' + user)
+
+
+DEFAULT_DISCOVERY_CACHE_DIR = _user_cache_dir()
+DEFAULT_DISCOVERY_CACHE_FILE = os.path.join(DEFAULT_DISCOVERY_CACHE_DIR, "discovery.json")
+
+OptionsMap = {
+    'SNMP': SNMPOptions,
+    'WSMAN': WsManOptions,
+    'REDFISH': RedfishOptions,
+    'REST': RestOptions
+}
+
+
+class DiscoveryCache(object):
+    """
+    On-disk cache of discovery results
+
+    Remembers, per device address, the driver which classified the device
+    and the protocols (with port and options) that worked, so that the next
+    find_driver() can connect straight away instead of hunting.
+    """
+    def __init__(self, filename=None, ttl=86400, save_interval=5):
+        """
+        :param filename: json file holding the cache, discovery.json in
+            the .omsdk directory of the user by default
+        :param ttl: time in seconds after which an entry is rediscovered
+        :param save_interval: minimum time in seconds between two writes of the file
+        :type filename: str
+        :type ttl: int
+        :type save_interval: int
+        """
+        if filename is None:
+            filename = DEFAULT_DISCOVERY_CACHE_FILE
+        self.filename = filename
+        self.ttl = ttl
+        self.save_interval = save_interval
+        self.entries = {}
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._saved_at = 0
+        self.load()
+        atexit.register(self.flush)
+
+    def load(self):
+        with self._lock:
+            self.entries = {}
+            if not os.path.exists(self.filename):
+                return False
+            if not self._trusted_dir():
+                return False
+            try:
+                with open(self.filename) as cache_data:
+                    self.entries = json.load(cache_data)
+            except Exception as ex:
+                logger.error("Discovery cache " + self.filename + " is not readable: " + str(ex))
+                self.entries = {}
+                return False
+            return True
+
+    def get(self, host):
+        """Return the live cache entry for host, None if absent or expired"""
+        with self._lock:
+            entry = self.entries.get(host)
+            if entry is None:
+                return None
+            if time.time() - entry.get('Time', 0) > self.ttl:
+                logger.debug(host + " : discovery cache entry expired")
+                self._remove(host)
+                return None
+            return entry
+
+    def put(self, host, drv):
+        """Record the driver, its working protocols and options for host"""
+        cfactory = drv.cfactory
+        if cfactory is None or not cfactory.work_protocols:
+            return False
+        protocols = []
+        for connection in cfactory.work_connection:
+            protocols.append(self._encode_protocol(connection))
+        with self._lock:
+            self.entries[host] = {
+                'Driver': TypeHelper.resolve(drv.driver_en),
+                'Protocols': protocols,
+                'Time': time.time()
+            }
+            self._changed()
+        return True
+
+    def invalidate(self, host):
+        with self._lock:
+            self._remove(host)
+
+    def clear(self):
+        with self._lock:
+            self.entries = {}
+            self._changed()
+
+    def _remove(self, host):
+        if host in self.entries:
+            del self.entries[host]
+            self._changed()
+
+    def _changed(self):
+        self._dirty = True
+        if time.time() - self._saved_at >= self.save_interval:
+            self.flush()
+
+    def _trusted_dir(self):
+        """Check the default cache directory belongs to the user only
+
+        Other directories are the choice of the caller.
+        """
+        dirname = os.path.dirname(os.path.abspath(self.filename))
+        if dirname != os.path.abspath(DEFAULT_DISCOVERY_CACHE_DIR) or \
+                not hasattr(os, 'getuid'):
+            return True
+        stat = os.stat(dirname)
+        if stat.st_uid != os.getuid() or stat.st_mode & 0o022:
+            logger.error("Discovery cache directory " + dirname +
+                         " is not owned by the user or is writable by others")
+            return False
+        return True
+
+    def flush(self):
+        """Write the cache to disk if it has changed"""
+        with self._lock:
+            if not self._dirty:
+                return True
+            dirname = os.path.dirname(os.path.abspath(self.filename))
+            tmpfile = None
+            try:
+                if not os.path.isdir(dirname):
+                    os.makedirs(dirname, 0o700)
+                if not self._trusted_dir():
+                    return False
+                # private file with an unpredictable name, replacing the
+                # cache in one step
+                (fd, tmpfile) = tempfile.mkstemp(prefix='.discovery', suffix='.tmp', dir=dirname)
+                with os.fdopen(fd, "w") as cache_data:
+                    json.dump(self.entries, cache_data)
+                if PY2:
+                    if os.path.exists(self.filename):
+                        os.remove(self.filename)
+                    os.rename(tmpfile, self.filename)
+                else:
+                    os.replace(tmpfile, self.filename)
+            except Exception as ex:
+                logger.error("Discovery cache " + self.filename + " is not writable: " + str(ex))
+                if tmpfile is not None and os.path.exists(tmpfile):
+                    os.remove(tmpfile)
+                return False
+            self._dirty = False
+            self._saved_at = time.time()
+            return True
+
+    def _encode_protocol(self, connection):
+        pOptions = getattr(connection, 'pOptions', None)
+        options = {}
+        if pOptions is not None:
+            for (name, value) in vars(pOptions).items():
+                if name == 'enid':
+                    continue
+                if value is None or isinstance(value, (bool, int, float, str)):
+                    options[name] = value
+        return {
+            'Protocol': TypeHelper.get_enumname(connection.enumid),
+            'Port': options.get('port'),
+            'Options': options
+        }
+
+    def protocol_preference(self, entry, protopref=None):
+        """Preference selecting only the cached protocols
+
+        :param protopref: preference given by the caller, cached
+            protocols excluded by it are not used
+        :return: preference, None if no cached protocol is allowed
+        :rtype: ProtoPreference
+        """
+        allowed = []
+        for proto in entry['Protocols']:
+            protoenum = getattr(ProtocolEnum, proto['Protocol'], None)
+            if protoenum is None:
+                continue
+            if protopref is not None and not self._includes(protopref, protoenum):
+                continue
+            allowed.append(protoenum)
+        if not allowed:
+            return None
+        pref = ProtoPreference(*allowed)
+        pref.include_only(*allowed)
+        return pref
+
+    def _includes(self, protopref, protoenum):
+        for i in range(0, len(protopref.protocols)):
+            if protopref.protocols[i] == protoenum:
+                return protopref.include_flag[i]
+        return False
+
+    def protocol_options(self, entry):
+        """Rebuild the protocol options recorded for the entry
+
+        :return: options of the cached protocols, None if defaults were used
+        :rtype: ProtocolOptionsFactory
+        """
+        pOptions = None
+        for proto in entry['Protocols']:
+            if not proto['Options'] or proto['Protocol'] not in OptionsMap:
+                continue
+            options = OptionsMap[proto['Protocol']]()
+            for (name, value) in proto['Options'].items():
+                setattr(options, name, value)
+            if pOptions is None:
+                pOptions = ProtocolOptionsFactory()
+            pOptions.add(options)
+        return pOptions
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#
+# Copyright © 2018 Dell Inc. or its subsidiaries. All rights reserved.
+# Dell, EMC, and other trademarks are trademarks of Dell Inc. or its subsidiaries.
+# Other trademarks may be trademarks of their respective owners.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import re
+import sys
+import copy
+import logging
+from omsdk.sdkcenum import TypeHelper
+from omsdk.sdkcreds import ProtocolCredentialsFactory, CredentialsEnum
+from omsdk.sdkprotopref import ProtocolEnum
+from omsdk.sdkproto import ProtocolOptionsFactory, SNMPOptions
+from omsdk.sdksnmp import SNMPProtocol, PySnmpPresent
+from omsdk.sdkworkers import WorkerPool
+from omsdk.http.sdkwsmanbase import WsManOptions
+from omsdk.http.sdkwsman import WsManProtocol
+from omsdk.http.sdkredfishbase import RedfishOptions
+from omsdk.http.sdkredfish import RedfishProtocol
+
+PY2 = sys.version_info[0] == 2
+PY3 = sys.version_info[0] == 3
+
+logger = logging.getLogger(__name__)
+
+SysObjectIDOid = '1.3.6.1.2.1.1.2.0'
+EnterprisesOid = '1.3.6.1.4.1.'
+
+
+class DeviceFingerprint(object):
+    """
+    What a device tells about itself with one request per protocol
+
+    A Redfish service root GET, a WS-Man Identify and a SNMP sysObjectID GET
+    are sent to the device at the same time. Drivers match the answers to
+    decide whether they can manage the device, before running their full
+    classifier. The protocol objects used for probing are kept in transports,
+    so that the matching driver can continue on them.
+    """
+    def __init__(self, ipaddr):
+        self.ipaddr = ipaddr
+        # ProtocolEnum => answer of the device, None if it did not answer
+        self.results = {}
+        # ProtocolEnum => protocol object used for the probe
+        self.transports = {}
+
+    def probe(self, creds, pOptions=None):
+        """Probe the device on all protocols the credentials allow
+
+        :param creds: bundle of credentials for the device
+        :param pOptions: protocol specific options, port, timeout etc
+        :return: self
+        """
+        probes = []
+        ucreds = self._creds(creds, CredentialsEnum.User)
+        if ucreds is not None:
+            probes.append((ProtocolEnum.REDFISH, self._probe_redfish, ucreds,
+                           self._options(pOptions, ProtocolEnum.REDFISH, RedfishOptions)))
+            probes.append((ProtocolEnum.WSMAN, self._probe_wsman, ucreds,
+                           self._options(pOptions, ProtocolEnum.WSMAN, WsManOptions)))
+        screds = self._creds(creds, CredentialsEnum.SNMPv3)
+        if screds is None:
+            screds = self._creds(creds, CredentialsEnum.SNMPv1_v2c)
+        if screds is not None and PySnmpPresent:
+            probes.append((ProtocolEnum.SNMP, self._probe_snmp, screds,
+                           self._options(pOptions, ProtocolEnum.SNMP, SNMPOptions)))
+        if not probes:
+            return self
+
+        pool = WorkerPool(len(probes), name=self.ipaddr + "-fingerprint")
+        items = []
+        for (protoenum, func, pcreds, options) in probes:
+            items.append((protoenum, pool.submit(func, pcreds, options)))
+        for (protoenum, item) in items:
+            try:
+                self.results[protoenum] = item.get()
+            except Exception as ex:
+                logger.debug(self.ipaddr + " : " + str(protoenum) + " probe failed: " + str(ex))
+                self.results[protoenum] = None
+        pool.shutdown()
+        logger.debug(self.ipaddr + " : fingerprint " + str(self.results))
+        return self
+
+    def _creds(self, creds, credsEnum):
+        if isinstance(creds, ProtocolCredentialsFactory):
+            return creds.get(credsEnum)
+        if creds is not None and TypeHelper.resolve(creds.enid) == TypeHelper.resolve(credsEnum):
+            return creds
+        return None
+
+    def _options(self, pOptions, protoenum, default):
+        options = None
+        if isinstance(pOptions, ProtocolOptionsFactory):
+            options = pOptions.get(protoenum)
+        elif pOptions is not None and \
+                TypeHelper.resolve(pOptions.enid) == TypeHelper.resolve(protoenum):
+            options = pOptions
+        if options is None:
+            return default()
+        # drivers modify the options while connecting (e.g. urlbase)
+        return copy.copy(options)
+
+    def _probe_redfish(self, creds, options):
+        proto = RedfishProtocol(self.ipaddr, creds, options)
+        self.transports[ProtocolEnum.REDFISH] = proto
+        retval = proto.enumerate('ServiceRoot', {'url': '/' + options.urlbase})
+        if retval['Status'] != 'Success':
+            return None
+        return retval['Data']['ServiceRoot'][0]
+
+    def _probe_wsman(self, creds, options):
+        proto = WsManProtocol(self.ipaddr, creds, options)
+        self.transports[ProtocolEnum.WSMAN] = proto
+        retval = proto.identify()
+        if retval.get('Status') != 'Success' or 'IdentifyResponse' not in retval['Data']:
+            return None
+        return retval['Data']['IdentifyResponse']
+
+    def _probe_snmp(self, creds, options):
+        if TypeHelper.resolve(creds.enid) == TypeHelper.resolve(CredentialsEnum.SNMPv3):
+            proto = SNMPProtocol(self.ipaddr, pOptions=options, v3creds=creds)
+        else:
+            proto = SNMPProtocol(self.ipaddr, creds.community, creds.writeCommunity, options)
+        self.transports[ProtocolEnum.SNMP] = proto
+        retval = proto.get(SysObjectIDOid)
+        if retval['Status'] != 'Success':
+            return None
+        (oid, value) = retval['Data'][0]
+        numeric = str(value)
+        if not re.match('^[0-9.]+$', numeric):
+            # noSuchObject, noSuchInstance
+            return None
+        # classifiers are written against the MIB rendering of the oid
+        forms = [numeric]
+        if numeric.startswith(EnterprisesOid):
+            forms.append('SNMPv2-SMI::enterprises.' + numeric[len(EnterprisesOid):])
+        if value.prettyPrint() not in forms:
+            forms.append(value.prettyPrint())
+        return {'SysObjectID': forms}
+
+    def responded(self, protoenum):
+        return self.results.get(protoenum) is not None
+
+    def matches(self, protoenum, rules):
+        """Match the answer on a protocol against {attribute: regex} rules
+
+        :return: True if all rules match, False if the device answered
+            differently, None if the protocol has no answer
+        :rtype: bool
+        """
+        data = self.results.get(protoenum)
+        if data is None:
+            return None
+        for attr in rules:
+            values = data.get(attr)
+            if values is None:
+                return False
+            if not isinstance(values, list):
+                values = [values]
+            if not any(re.search(rules[attr], str(value)) for value in values):
+                return False
+        return True
+
+    def release(self, drv=None):
+        """Close the transports which the driver did not take over"""
+        keep = []
+        if drv and drv.cfactory:
+            keep = [connection.proto for connection in drv.cfactory.work_connection]
+        for protoenum in self.transports:
+            proto = self.transports[protoenum]
+            if any(proto is kept for kept in keep):
+                continue
+            try:
+                proto.reset(True)
+            except Exception as ex:
+                logger.debug(self.ipaddr + " : " + str(ex))
+        self.transports = {}
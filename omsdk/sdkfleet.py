@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#
+# Copyright © 2018 Dell Inc. or its subsidiaries. All rights reserved.
+# Dell, EMC, and other trademarks are trademarks of Dell Inc. or its subsidiaries.
+# Other trademarks may be trademarks of their respective owners.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import sys
+import time
+import logging
+import threading
+from omsdk.sdkworkers import WorkerPool
+
+PY2 = sys.version_info[0] == 2
+PY3 = sys.version_info[0] == 3
+
+if PY2:
+    import Queue as queue
+else:
+    import queue
+
+logger = logging.getLogger(__name__)
+
+
+class FleetStatistics(object):
+    """
+    Throughput statistics for a fleet collection run
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.start_time = None
+        self.end_time = None
+        self.times = []
+        self.status = {}
+
+    def start(self):
+        with self._lock:
+            self.start_time = time.time()
+            self.end_time = None
+
+    def stop(self):
+        with self._lock:
+            self.end_time = time.time()
+
+    def record(self, result):
+        with self._lock:
+            self.status[result['Status']] = self.status.get(result['Status'], 0) + 1
+            if result['Elapsed'] is not None:
+                self.times.append(result['Elapsed'])
+
+    def percentile(self, pct):
+        with self._lock:
+            times = sorted(self.times)
+        if len(times) <= 0:
+            return None
+        # nearest-rank percentile
+        rank = int(round(pct / 100.0 * len(times) + 0.5)) - 1
+        return times[max(0, min(rank, len(times) - 1))]
+
+    def summary(self):
+        with self._lock:
+            end_time = self.end_time
+            if end_time is None:
+                end_time = time.time()
+            elapsed = 0.0
+            if self.start_time is not None:
+                elapsed = end_time - self.start_time
+            devices = sum(self.status.values())
+            retval = {
+                'Devices': devices,
+                'Elapsed': elapsed,
+                'DevicesPerSec': (devices / elapsed) if elapsed > 0 else 0.0
+            }
+            for status in ['Success', 'Failed', 'TimedOut', 'Cancelled']:
+                retval[status] = self.status.get(status, 0)
+        retval['P50'] = self.percentile(50)
+        retval['P99'] = self.percentile(99)
+        return retval
+
+
+class FleetCollector(object):
+    """
+    Collects inventory from a fleet of devices with a bounded worker pool
+
+    Results are streamed as each device finishes, either through iter_results()
+    or through a callback passed to run(). Every result is a dict:
+
+        { 'Host' : host, 'Status' : 'Success' | 'Failed' | 'TimedOut' | 'Cancelled',
+          'Data' : device json, 'Driver' : driver (if keep_driver), 'Message' : str,
+          'Elapsed' : seconds spent on the device }
+    """
+    def __init__(self, sd, creds, driver_en=None, protopref=None, pOptions=None,
+                 max_workers=32, device_timeout=300, components=None,
+                 collect=None, keep_driver=False, parallel_views=1):
+        """
+        :param sd: sdk infrastructure with drivers loaded
+        :param creds: bundle of credentials for the devices
+        :param driver_en: driver to use, find_driver() is used when None
+        :param protopref: the preferred protocol to be used if the device supports the protocol
+        :param pOptions: protocol specific options to be passed, port, timeout etc
+        :param max_workers: maximum number of devices processed concurrently
+        :param device_timeout: deadline in seconds for a single device
+        :param components: components to collect, full entityjson when None
+        :param collect: callable(driver) returning the data for a device
+        :param keep_driver: return the connected driver along with the data
+        :param parallel_views: views of a single device enumerated concurrently
+        :type sd: object <sdkinfra>
+        :type creds: dict of obj <Snmpv2Credentials or UserCredentials>
+        :type driver_en: enumeration of the device type
+        :type max_workers: int
+        :type device_timeout: int
+        :type components: list of component enums or names
+        """
+        self.sd = sd
+        self.creds = creds
+        self.driver_en = driver_en
+        self.protopref = protopref
+        self.pOptions = pOptions
+        self.max_workers = max_workers
+        self.device_timeout = device_timeout
+        self.components = components
+        self.collect = collect
+        self.keep_driver = keep_driver
+        self.parallel_views = parallel_views
+        self.stats = FleetStatistics()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        """Cancel the run: queued devices are skipped, running ones abandoned"""
+        self._cancel.set()
+
+    def is_cancelled(self):
+        return self._cancel.is_set()
+
+    def _default_collect(self, drv):
+        if self.components:
+            drv.get_partial_entityjson(*self.components)
+        elif not drv.get_entityjson():
+            return None
+        return drv.get_json_device()
+
+    def _process(self, host):
+        retval = {'Host': host, 'Status': 'Failed', 'Data': None, 'Message': None}
+        if self._cancel.is_set():
+            retval['Status'] = 'Cancelled'
+            return retval
+        if self.driver_en is None:
+            drv = self.sd.find_driver(host, self.creds, self.protopref, self.pOptions)
+        else:
+            drv = self.sd.get_driver(self.driver_en, host, self.creds,
+                                     self.protopref, self.pOptions)
+        if drv is None:
+            retval['Message'] = host + " : Connection to Dell EMC device failed"
+            return retval
+        try:
+            if self._cancel.is_set():
+                retval['Status'] = 'Cancelled'
+                return retval
+            drv.set_parallel_views(self.parallel_views)
+            collect = self.collect
+            if collect is None:
+                collect = self._default_collect
+            retval['Data'] = collect(drv)
+            if retval['Data'] is None:
+                retval['Message'] = host + " : Failed to collect data"
+            else:
+                retval['Status'] = 'Success'
+        finally:
+            if self.keep_driver:
+                retval['Driver'] = drv
+            else:
+                drv.disconnect()
+        return retval
+
+    def _discard(self, result):
+        # late result of an abandoned device
+        if result.get('Driver') is not None:
+            result['Driver'].disconnect()
+
+    def _to_result(self, host, item):
+        if item.status == 'Done':
+            retval = item.result
+        else:
+            retval = {'Host': host, 'Status': item.status, 'Data': None, 'Message': None}
+            if item.exception is not None:
+                retval['Status'] = 'Failed'
+                retval['Message'] = host + " : " + str(item.exception)
+            elif item.status == 'TimedOut':
+                retval['Message'] = host + " : Device did not complete in " + \
+                                    str(self.device_timeout) + " seconds"
+        retval['Elapsed'] = item.elapsed() if item.start_time else None
+        return retval
+
+    def iter_results(self, devices):
+        """Collect from all the devices and yield results as they complete
+
+        :param devices: host names or ipaddresses; may be a generator
+        :type devices: iterable of str
+        :return: result dict for each device, in completion order
+        """
+        self._cancel.clear()
+        self.stats.start()
+        completed = queue.Queue()
+        inflight = {}
+        devices = iter(devices)
+        exhausted = False
+        tick = 1.0
+        if self.device_timeout:
+            tick = max(0.05, min(1.0, self.device_timeout / 10.0))
+        pool = WorkerPool(self.max_workers, name="fleet")
+        try:
+            while inflight or not exhausted:
+                # keep the queue short, so huge device lists stay lazy
+                while not exhausted and not self._cancel.is_set() and \
+                        len(inflight) < 2 * self.max_workers:
+                    try:
+                        host = next(devices)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    host = host.strip()
+                    if not host:
+                        continue
+                    item = pool.submit(self._process, host)
+                    inflight[item] = host
+                    item.add_done_callback(completed.put)
+                if self._cancel.is_set():
+                    exhausted = True
+                    for item in list(inflight):
+                        pool.abandon(item, 'Cancelled', self._discard)
+                elif self.device_timeout:
+                    now = time.time()
+                    for item in list(inflight):
+                        if item.start_time is not None and not item.done() and \
+                                now - item.start_time > self.device_timeout:
+                            logger.debug(inflight[item] + " : deadline exceeded")
+                            pool.abandon(item, 'TimedOut', self._discard)
+                if not inflight:
+                    continue
+                try:
+                    item = completed.get(timeout=tick)
+                except queue.Empty:
+                    continue
+                if item not in inflight:
+                    continue
+                result = self._to_result(inflight.pop(item), item)
+                self.stats.record(result)
+                yield result
+        finally:
+            for item in list(inflight):
+                pool.abandon(item, 'Cancelled', self._discard)
+            pool.shutdown(wait=False)
+            self.stats.stop()
+
+    def run(self, devices, callback=None):
+        """Collect from all the devices, invoking callback as each completes
+
+        :param devices: host names or ipaddresses
+        :param callback: callable(result) invoked for every device
+        :return: throughput statistics of the run
+        :rtype: dict
+        """
+        for result in self.iter_results(devices):
+            if callback:
+                try:
+                    callback(result)
+                except Exception as ex:
+                    logger.error(result['Host'] + " : callback failed: " + str(ex))
+        return self.stats.summary()
+
+    def run_file(self, listfile, callback=None):
+        """Collect from all the devices listed (one per line) in listfile"""
+        with open(listfile, "r") as mylist:
+            return self.run(mylist, callback)
@@ -23,10 +23,15 @@
 import os
 import imp
 import logging
-import socket
 import sys, glob
 from collections import OrderedDict
 from omsdk.sdkcenum import EnumWrapper, TypeHelper
+from omsdk.sdkworkers import WorkerPool
+from omsdk.sdkdisccache import DiscoveryCache
+from omsdk.sdkfingerprint import DeviceFingerprint
+from omsdk.sdkresolver import Resolver
+from omsdk.http.sdkhttppool import HttpPool
+from omsdk.http.sdkredfishcache import RedfishResponses
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +44,11 @@ class sdkinfra:
         self.drivers = {}
         self.disc_modules = OrderedDict()
         self.driver_names = {}
+        self.parallel_probe = False
+        self.max_probes = 4
+        self.disc_cache = None
+        self.fingerprinting = False
+        self.resolver = Resolver
     
     def load_from_file(self, filepath):
         mod_name = None
@@ -103,22 +113,174 @@ class sdkinfra:
                 :rtype: object <iBaseDriver>
 
         """
-        duplicSet = set()
         msg = ipaddr + " : Connection to Dell EMC device failed, please check device status and credentials."
-        drv = None
+        drv = self._create_cached_driver(None, ipaddr, creds, protopref, pOptions)
+        if drv is None:
+            mods = self._candidate_drivers()
+            fprint = None
+            if self.fingerprinting:
+                fprint = DeviceFingerprint(ipaddr).probe(creds, pOptions)
+                (matched, mods) = self._match_fingerprint(fprint, mods)
+                for mod in matched:
+                    drv = self._create_driver(mod, ipaddr, creds, protopref, pOptions, fprint.transports)
+                    if drv:
+                        break
+            if drv is None:
+                if self.parallel_probe:
+                    drv = self._find_driver_parallel(mods, ipaddr, creds, protopref, pOptions)
+                else:
+                    for mod in mods:
+                        drv = self._create_driver(mod, ipaddr, creds, protopref, pOptions)
+                        if drv:
+                            break
+            if fprint:
+                fprint.release(drv)
+            self._cache_driver(ipaddr, drv)
+        if drv:
+            msg = ipaddr + " : Connected to Dell EMC device"
+
+        if msgFlag:
+            return drv, msg
+        return drv
+
+    def _candidate_drivers(self):
+        duplicSet = set()
+        mods = []
         for mod in self.disc_modules:
             if (self.disc_modules[mod] in duplicSet) or (str(mod) == "FileList"):
                 continue
-            drv = self._create_driver(mod, ipaddr, creds, protopref, pOptions)
-            if drv:
-                msg = ipaddr + " : Connected to Dell EMC device"
-                break
+            mods.append(mod)
             duplicSet.add(self.disc_modules[mod])
+        return mods
 
-        if msgFlag:
-            return drv, msg
+    def _match_fingerprint(self, fprint, mods):
+        # drivers recognizing the device, and drivers which cannot tell
+        matched = []
+        unknown = []
+        for mod in mods:
+            result = self.disc_modules[mod].match_fingerprint(fprint)
+            if result:
+                matched.append(mod)
+            elif result is None:
+                unknown.append(mod)
+        logger.debug(fprint.ipaddr + " : fingerprint matches " + str(matched))
+        return (matched, unknown)
+
+    def _find_driver_parallel(self, mods, ipaddr, creds, protopref, pOptions):
+        pool = WorkerPool(self.max_probes, name=ipaddr + "-probe")
+        items = [pool.submit(self._create_driver, mod, ipaddr, creds, protopref, pOptions)
+                 for mod in mods]
+        drv = None
+        try:
+            # prefDiscOrder breaks the tie: a driver wins only after all
+            # the drivers ahead of it have failed
+            for item in items:
+                item.wait()
+                if item.result:
+                    drv = item.result
+                    break
+        finally:
+            for item in items:
+                if drv is not None and item.result is drv:
+                    continue
+                if item.done():
+                    self._discard_driver(item.result)
+                else:
+                    pool.abandon(item, 'Cancelled', self._discard_driver)
+            pool.shutdown(wait=False)
         return drv
 
+    def _discard_driver(self, drv):
+        if drv:
+            drv.disconnect()
+
+    def setParallelProbe(self, enabled=True, max_probes=4):
+        """Probe candidate drivers and protocols concurrently while finding a driver
+
+            :param enabled: True to probe concurrently, False for one after another
+            :param max_probes: maximum number of drivers probed at a time
+            :type enabled: bool
+            :type max_probes: int
+        """
+        self.parallel_probe = enabled
+        self.max_probes = max(1, max_probes)
+
+    def setConnectionPool(self, pool_size=4, idle_timeout=300):
+        """Size the HTTPS connections shared by the WS-Man and Redfish protocols
+
+            :param pool_size: maximum number of connections kept per host and port
+            :param idle_timeout: time in seconds after which idle connections are closed
+            :type pool_size: int
+            :type idle_timeout: int
+        """
+        HttpPool.configure(pool_size, idle_timeout)
+
+    def setRedfishCache(self, max_entries=4096, ttls=None):
+        """Size the Redfish response cache shared by all the devices
+
+            Responses are revalidated with If-None-Match once they expire.
+            RedfishResponses.stats() returns the hit, miss and eviction counters.
+
+            :param max_entries: maximum number of responses kept
+            :param ttls: list of (url regex, seconds) setting the time to live of matching resources
+            :type max_entries: int
+            :type ttls: list
+        """
+        RedfishResponses.max_entries = max_entries
+        RedfishResponses.set_ttls(ttls)
+
+    def setFingerprinting(self, enabled=True):
+        """Fingerprint the device before trying the drivers in find_driver
+
+            One Redfish service root GET, one WS-Man Identify and one SNMP
+            sysObjectID GET are sent to the device. Only the drivers matching
+            the answers run their full classifier, on the same transports.
+            Drivers ruled out by the answers are not tried at all.
+
+            :param enabled: True to fingerprint, False to try all drivers
+            :type enabled: bool
+        """
+        self.fingerprinting = enabled
+
+    def setDiscoveryCache(self, enabled=True, filename=None, ttl=86400):
+        """Remember the driver and working protocols of discovered devices on disk
+
+            find_driver() and get_driver() connect to a cached device directly,
+            without hunting for its driver and protocol.
+
+            :param enabled: True to use the cache, False to always rediscover
+            :param filename: json file holding the cache, defaults to discovery.json in the .omsdk directory of the user
+            :param ttl: time in seconds after which a device is rediscovered
+            :type enabled: bool
+            :type filename: str
+            :type ttl: int
+        """
+        if self.disc_cache:
+            self.disc_cache.flush()
+        self.disc_cache = None
+        if enabled:
+            self.disc_cache = DiscoveryCache(filename, ttl)
+
+    def _create_cached_driver(self, mod, ipaddr, creds, protopref, pOptions):
+        if self.disc_cache is None:
+            return None
+        entry = self.disc_cache.get(ipaddr)
+        if entry is None or entry['Driver'] not in self.disc_modules:
+            return None
+        if mod is not None and self.disc_modules[mod] is not self.disc_modules[entry['Driver']]:
+            return None
+        cached_pref = self.disc_cache.protocol_preference(entry, protopref)
+        if cached_pref is None:
+            return None
+        if pOptions is None:
+            pOptions = self.disc_cache.protocol_options(entry)
+        logger.debug(ipaddr + " : using cached driver " + entry['Driver'])
+        return self._create_driver(entry['Driver'], ipaddr, creds, cached_pref, pOptions)
+
+    def _cache_driver(self, ipaddr, drv):
+        if self.disc_cache is not None and drv:
+            self.disc_cache.put(ipaddr, drv)
+
     # Return:
     #    None - if driver not found, not classifed
     #    instance of iBaseEntity  - if device of the proper type
@@ -141,20 +303,23 @@ class sdkinfra:
         """
         mod = TypeHelper.resolve(driver_en)
         logger.debug("get_driver(): Asking for " + mod)
-        return self._create_driver(mod, ipaddr, creds, protopref, pOptions)
+        if mod in self.disc_modules:
+            drv = self._create_cached_driver(mod, ipaddr, creds, protopref, pOptions)
+            if drv:
+                return drv
+        drv = self._create_driver(mod, ipaddr, creds, protopref, pOptions)
+        self._cache_driver(ipaddr, drv)
+        return drv
 
-    def _create_driver(self, mod, host, creds, protopref, pOptions):
+    def _create_driver(self, mod, host, creds, protopref, pOptions, transports=None):
         msg = "Connection to Dell EMC device failed, please check device status and credentials."
         logger.debug("get_driver(): Asking for " + mod)
         ipaddr = host
-        try:
-            result = socket.getaddrinfo(host, None)
-            lastuple = result[-1]
-            ipaddress = lastuple[-1][0]
-            # if ipaddress:
-            #     ipaddr = ipaddress
-        except socket.gaierror as err:
-            logger.error("{}: {}: {}".format(host, err, "cannot resolve hostname!"))
+        ipaddress = self.resolver.resolve(host)
+        # if ipaddress:
+        #     ipaddr = ipaddress
+        if ipaddress is None:
+            logger.error("{}: {}".format(host, "cannot resolve hostname!"))
         if not mod in self.disc_modules:
             # TODO: Change this to exception
             logger.error("{}: {}".format(host, msg))
@@ -162,25 +327,33 @@ class sdkinfra:
             return None
         try:
             logger.debug(mod + " driver found!")
-            drv = self.disc_modules[mod].is_entitytype(self, ipaddr, creds, protopref, mod, pOptions)
+            drv = self.disc_modules[mod].is_entitytype(self, ipaddr, creds, protopref, mod, pOptions, transports)
             if drv is None:
                 logger.info("{}: {}".format(host, msg))
+                self._invalidate_cache(host, mod)
             if drv:
                 logger.info("{}: {}".format(host, "Connection to Dell EMC device success!"))
-                hostname = None
-                try:
-                    hostname, aliaslist, addresslist = socket.gethostbyaddr(ipaddr)
-                    logger.debug("Found host name for " + ipaddr + " as " + hostname)
-                except socket.herror:
-                    hostname = None
-                    logger.debug("No host name found for " + ipaddr)
-                drv.hostname = hostname
+                # filled in once the reverse lookup completes
+                drv.hostname = None
+                def set_hostname(hostname):
+                    drv.hostname = hostname
+                self.resolver.reverse_async(ipaddr, set_hostname)
             return drv
         except AttributeError as attrerror:
             logger.debug(mod + " is not device or console")
             logger.debug(attrerror)
             return None
 
+    def _invalidate_cache(self, host, mod):
+        # only a failure of the cached driver makes the entry stale
+        if self.disc_cache is None:
+            return
+        entry = self.disc_cache.get(host)
+        if entry and entry['Driver'] in self.disc_modules and \
+                self.disc_modules[entry['Driver']] is self.disc_modules[mod]:
+            logger.debug(host + " : invalidating cached driver " + entry['Driver'])
+            self.disc_cache.invalidate(host)
+
     def _driver(self, driver_en):
         mod = TypeHelper.resolve(driver_en)
         logger.debug("_driver(): Asking for " + mod)
@@ -29,6 +29,8 @@ import time
 from omsdk.sdkconsole import iConsoleRegistry, iConsoleDriver, iConsoleDiscovery
 from omsdk.sdkprint import PrettyPrint
 from omsdk.sdkproto import PCONSOLE
+from omsdk.sdkfleet import FleetCollector
+from omsdk.sdkworkers import WorkerPool
 import sys
 import logging
 
@@ -43,6 +45,8 @@ PY3 = sys.version_info[0] == 3
 #    format='[%(levelname)s] (%(threadName)-10s) %(message)s',)
 
 class ListProc:
+    MaxWorkers = 32
+
     def __init__(self, sd, listfile, creds):
         self.listfile = listfile
         self.myentitylistlock = threading.Lock()
@@ -58,18 +62,11 @@ class ListProc:
         if not os.path.isfile(self.listfile):
             logger.debug("Unable to find file")
             return None
-        counter = 0
-        with open(self.listfile, "r") as mylist:
-            for line in mylist:
-                counter = counter + 1
-                device = line.rstrip()
-                thr = threading.Thread(name=device,
-                                       target=self._worker, args=(device, str(counter),))
-                self.threadlist.append(thr)
-                thr.start()
-        logger.debug('Waiting for _worker threads')
-        for t in self.threadlist:
-            t.join()
+        fleet = FleetCollector(self.sd, self.creds, self.sd.driver_enum.iDRAC,
+                               max_workers=self.MaxWorkers,
+                               collect=lambda entity: True, keep_driver=True)
+        stats = fleet.run_file(self.listfile, self._worker)
+        logger.debug("Fleet statistics: " + str(stats))
         return self
 
     def printx(self):
@@ -80,12 +77,13 @@ class ListProc:
                     logger.debug(device.entityjson)
                 logger.debug("-==================-------")
 
-    def _worker(self, device, counter):
-        logger.debug("Starting")
-        devEntity = self.sd.get_driver(self.sd.driver_enum.iDRAC, device, self.creds)
+    def _worker(self, result):
         with self.myentitylistlock:
-            if not devEntity is None:
-                self.entitylist.append(devEntity)
+            if result['Status'] == 'Success':
+                self.entitylist.append(result['Driver'])
+                self.success[result['Host']] = result['Elapsed']
+            else:
+                self.failed[result['Host']] = result['Message']
 
     def _run(self, entity, counter):
         t1 = time.time()
@@ -100,12 +98,7 @@ class ListProc:
 
     def get_data(self):
         counter = 0
-        for entity in self.entitylist:
-            counter = counter + 1
-            thr = threading.Thread(name=entity.ipaddr,
-                                   target=self._run,
-                                   args=(entity, counter,))
-            self.threadlist.append(thr)
-            thr.start()
-        for t in self.threadlist:
-            t.join()
+        with WorkerPool(self.MaxWorkers, name="get_data") as pool:
+            for entity in self.entitylist:
+                counter = counter + 1
+                pool.submit(self._run, entity, counter)
@@ -23,7 +23,7 @@
 from enum import Enum
 from datetime import datetime
 from omsdk.sdkcreds import ProtocolCredentialsFactory, CredentialsEnum
-from omsdk.sdksnmp import SNMPProtocol, EntityMibConvertor
+from omsdk.sdksnmp import SNMPProtocol, SNMPViewTrie, EntityMibConvertor
 from omsdk.sdkcenum import EnumWrapper, TypeHelper
 from omsdk.sdkprotopref import ProtoPreference, ProtocolEnum
 from omsdk.sdkprint import PrettyPrint
@@ -127,14 +127,25 @@ class SNMPOptions(ProtocolOptions):
         Options for establishing a SNMP Communication
     """
 
-    def __init__(self, port=161, timeout=3, nretries=1):
+    def __init__(self, port=161, timeout=3, nretries=1, version='v2c', max_repetitions=25,
+                 max_message_size=1472):
         """
         :param port: Port number for SNMP communication
         :param timeout: time in seconds to wait for the request to wait before giving up
         :param nretries: The maximum number of retries each connection should attempt
+        :param version: v1 or v2c for community credentials. v2c walks tables
+            with GETBULK and falls back to v1 if the device does not answer.
+            SNMPv3 credentials always use v3
+        :param max_repetitions: rows asked for in each GETBULK request
+        :param max_message_size: largest message the agent handles. Scalars
+            are fetched with as many variables per GET as fit in it. All
+            agents handle at least 484 bytes
         :type port: Int
         :type timeout: Int
         :type nretries: Int
+        :type version: str
+        :type max_repetitions: Int
+        :type max_message_size: Int
         """
         if PY2:
             super(SNMPOptions, self).__init__(ProtocolEnum.SNMP)
@@ -144,6 +155,9 @@ class SNMPOptions(ProtocolOptions):
         self.port = port
         self.timeout = timeout
         self.nretries = nretries
+        self.version = version
+        self.max_repetitions = max_repetitions
+        self.max_message_size = max_message_size
 
     def __str__(self):
         return (TypeHelper.resolve(str(self.enid)) + "(port=" + str(self.port) + ")" + "(timeout=" + str(
@@ -168,6 +182,10 @@ class ProtocolWrapper(object):
         self.view_fieldspec = {}
         self.proto = None
         self.creds = None
+        # True if views can be enumerated from multiple threads
+        self.supports_concurrency = False
+        # connected protocol object to take over, see DeviceFingerprint
+        self.transport = None
 
     def get_name(self):
         return TypeHelper.resolve(self.enumid)
@@ -186,7 +204,8 @@ class ProtocolWrapper(object):
         self.creds = None
         for supported_cred in self.supported_creds:
             if isinstance(creds, ProtocolCredentialsFactory):
-                self.creds = creds.get(supported_cred)
+                if self.creds is None:
+                    self.creds = creds.get(supported_cred)
             elif TypeHelper.resolve(creds.enid) == TypeHelper.resolve(supported_cred):
                 self.creds = creds
             else:
@@ -207,8 +226,25 @@ class ProtocolWrapper(object):
                 self.pOptions = pOptions
             else:
                 logger.debug("Invalid pOptions provided!")
+        if self.transport is not None and self._adopt_transport(self.transport):
+            logger.debug("Reusing " + str(self) + " transport of " + ipaddr)
+            return True
         return self.my_connect(ipaddr, self.creds, self.pOptions)
 
+    def _adopt_transport(self, transport):
+        return False
+
+    def match_fingerprint(self, fprint, rules):
+        """Check the fingerprint of a device against the driver rules
+
+        :param fprint: answers of the device
+        :param rules: ProtocolEnum => {attribute: regex} of the driver
+        :return: True/False if the protocol tells the device apart, None if unknown
+        """
+        if self.enumid in rules:
+            return fprint.matches(self.enumid, rules[self.enumid])
+        return None
+
     def disconnect(self):
         not_implemented
 
@@ -425,6 +461,10 @@ class ProtocolWrapper(object):
             retval = self.proto.enumerate(clsName, wsprof, self.selectors, False, filter)
             if Simulator.is_recording():
                 Simulator.record_proto(self.ipaddr, self.enumid, clsName, retval)
+        return self._process_view(index, clsName, retval)
+
+    def _process_view(self, index, clsName, retval):
+        """Apply the classifiers and field specs of the view to its data"""
         if not 'Data' in retval or retval['Data'] is None or len(retval['Data']) <= 0:
             return retval
         if index in self.classifier_cond:
@@ -563,10 +603,17 @@ class PWSMAN(ProtocolWrapper):
         self.compmap = compmap
         self.cmds = cmds
         self.supported_creds = [CredentialsEnum.User]
+        self.supports_concurrency = True
 
     def clone(self):
         return PWSMAN(self.selectors, self.views, self.compmap, self.cmds, self.view_fieldspec)
 
+    def _adopt_transport(self, transport):
+        if not isinstance(transport, WsManProtocol):
+            return False
+        self.proto = transport
+        return True
+
     def my_connect(self, ipaddr, creds, pOptions):
         if pOptions is None:
             pOptions = WsManOptions()
@@ -594,22 +641,55 @@ class PSNMP(ProtocolWrapper):
         self.view_fieldspec = view_fieldspec
         self.classifier = classifier
         self.cmds = cmds
-        self.supported_creds = [CredentialsEnum.SNMPv1_v2c]
+        self.supported_creds = [CredentialsEnum.SNMPv3, CredentialsEnum.SNMPv1_v2c]
         self.supports_entity_mib = False
         self.emib_mgr = EntityMibConvertor()
         self.useSNMPGetFlag = useSNMPGetFlag
         self.classifier_cond = classifier_cond
+        self.trie = SNMPViewTrie.shared(views)
 
     def clone(self):
         return PSNMP(self.views, self.classifier, self.view_fieldspec, self.cmds, self.useSNMPGetFlag, self.classifier_cond)
 
+    def _adopt_transport(self, transport):
+        if not isinstance(transport, SNMPProtocol):
+            return False
+        # shares the snmp engine and target of the transport
+        self.proto = copy.copy(transport)
+        self.proto.useSNMPGetFlag = self.useSNMPGetFlag
+        self.proto.trie = self.trie
+        return True
+
+    def match_fingerprint(self, fprint, rules):
+        if ProtocolEnum.SNMP in rules:
+            return fprint.matches(ProtocolEnum.SNMP, rules[ProtocolEnum.SNMP])
+        matched = None
+        for index in self.classifier:
+            spec = self.classifier[index]
+            if not isinstance(spec, dict):
+                spec = {index: spec}
+            if 'SysObjectID' not in spec:
+                continue
+            result = fprint.matches(ProtocolEnum.SNMP, {'SysObjectID': spec['SysObjectID']})
+            if result:
+                return True
+            if result is False:
+                matched = False
+        return matched
+
     def my_connect(self, ipaddr, creds, pOptions):
         if pOptions is None:
             pOptions = SNMPOptions()
 
-        self.proto = SNMPProtocol(ipaddr, creds.community, creds.writeCommunity, pOptions, self.useSNMPGetFlag)
+        if TypeHelper.resolve(creds.enid) == TypeHelper.resolve(CredentialsEnum.SNMPv3):
+            self.proto = SNMPProtocol(ipaddr, pOptions=pOptions, useSNMPGetFlag=self.useSNMPGetFlag,
+                                      v3creds=creds)
+        else:
+            self.proto = SNMPProtocol(ipaddr, creds.community, creds.writeCommunity, pOptions,
+                                      self.useSNMPGetFlag)
         if self.proto is None:
             return False
+        self.proto.trie = self.trie
         return True
 
     def disconnect(self):
@@ -624,6 +704,7 @@ class PSNMP(ProtocolWrapper):
         if not "Entity" in sdkbase.emib_json['Data']:
             return False
         self.emib_mgr.build_entity_json(sdkbase.emib_json['Data'], sdkbase.entityjson)
+        sdkbase.emib_tree = self.emib_mgr.build_entity_tree(sdkbase.emib_json['Data'])
 
 
 class PREST(ProtocolWrapper):
@@ -670,6 +751,15 @@ class PREDFISH(ProtocolWrapper):
         self.urlbase = urlbase
         self.cmds = cmds
         self.supported_creds = [CredentialsEnum.User]
+        self.supports_concurrency = True
+
+    def _adopt_transport(self, transport):
+        if not isinstance(transport, RedfishProtocol):
+            return False
+        if self.urlbase and self.urlbase != transport.pOptions.urlbase:
+            return False
+        self.proto = transport
+        return True
 
     def my_connect(self, ipaddr, creds, pOptions):
         if pOptions is None:
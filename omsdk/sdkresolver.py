@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#
+# Copyright © 2018 Dell Inc. or its subsidiaries. All rights reserved.
+# Dell, EMC, and other trademarks are trademarks of Dell Inc. or its subsidiaries.
+# Other trademarks may be trademarks of their respective owners.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import sys
+import time
+import socket
+import logging
+import threading
+from omsdk.sdkworkers import WorkerPool
+
+PY2 = sys.version_info[0] == 2
+PY3 = sys.version_info[0] == 3
+
+logger = logging.getLogger(__name__)
+
+
+class NameResolver(object):
+    """
+    Caching forward and reverse name resolution
+
+    Answers are kept for ttl seconds, failures for negative_ttl seconds.
+    Reverse lookups can be run in the background, so that a missing or
+    slow PTR record does not hold up connecting to the device.
+    """
+    def __init__(self, ttl=300, negative_ttl=60, max_workers=4):
+        """
+        :param ttl: time in seconds to keep a resolved name
+        :param negative_ttl: time in seconds to keep a failed lookup
+        :param max_workers: maximum number of concurrent background lookups
+        :type ttl: int
+        :type negative_ttl: int
+        :type max_workers: int
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_workers = max_workers
+        self._forward = {}
+        self._reverse = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _lookup(self, cache, key):
+        with self._lock:
+            if key in cache:
+                (value, expires) = cache[key]
+                if time.time() < expires:
+                    return (True, value)
+                del cache[key]
+        return (False, None)
+
+    def _store(self, cache, key, value):
+        ttl = self.ttl
+        if value is None:
+            ttl = self.negative_ttl
+        with self._lock:
+            cache[key] = (value, time.time() + ttl)
+
+    def resolve(self, host):
+        """Resolve host to an ip address
+
+        :return: ip address, None if the name cannot be resolved
+        :rtype: str
+        """
+        (found, ipaddress) = self._lookup(self._forward, host)
+        if found:
+            return ipaddress
+        ipaddress = None
+        try:
+            result = socket.getaddrinfo(host, None)
+            ipaddress = result[-1][-1][0]
+        except (socket.gaierror, socket.herror) as err:
+            logger.debug("{}: {}".format(host, err))
+        self._store(self._forward, host, ipaddress)
+        return ipaddress
+
+    def reverse(self, ipaddr):
+        """Find the host name of an ip address
+
+        :return: host name, None if there is none
+        :rtype: str
+        """
+        (found, hostname) = self._lookup(self._reverse, ipaddr)
+        if found:
+            return hostname
+        hostname = None
+        try:
+            hostname, aliaslist, addresslist = socket.gethostbyaddr(ipaddr)
+            logger.debug("Found host name for " + ipaddr + " as " + hostname)
+        except (socket.gaierror, socket.herror):
+            logger.debug("No host name found for " + ipaddr)
+        self._store(self._reverse, ipaddr, hostname)
+        return hostname
+
+    def reverse_async(self, ipaddr, callback):
+        """Find the host name of an ip address in the background
+
+        callback(hostname) is called once the lookup completes; right away
+        if the answer is cached. Concurrent requests for the same address
+        share one lookup.
+        """
+        (found, hostname) = self._lookup(self._reverse, ipaddr)
+        if found:
+            callback(hostname)
+            return
+        with self._lock:
+            if ipaddr in self._pending:
+                self._pending[ipaddr].append(callback)
+                return
+            self._pending[ipaddr] = [callback]
+            if self._pool is None:
+                self._pool = WorkerPool(self.max_workers, name="omsdk-resolver")
+        self._pool.submit(self._reverse_job, ipaddr)
+
+    def _reverse_job(self, ipaddr):
+        hostname = None
+        try:
+            hostname = self.reverse(ipaddr)
+        finally:
+            with self._lock:
+                callbacks = self._pending.pop(ipaddr, [])
+            for callback in callbacks:
+                try:
+                    callback(hostname)
+                except Exception as ex:
+                    logger.debug("Resolver callback failed: " + str(ex))
+
+    def flush(self):
+        with self._lock:
+            self._forward = {}
+            self._reverse = {}
+
+
+Resolver = NameResolver()
@@ -24,6 +24,7 @@ import re
 import json
 import sys
 import logging
+import threading
 from omsdk.sdkprint import PrettyPrint
 from omsdk.sdkprotobase import ProtocolBase
 
@@ -40,19 +41,171 @@ try:
     from pysnmp.smi import *
     from pysnmp.entity.rfc3413.oneliner import cmdgen
     from pysnmp.proto import rfc1902
+    from pysnmp.proto import errind
+    from pysnmp.proto import rfc1905
+    from pysnmp.hlapi.varbinds import CommandGeneratorVarBinds
     from pysnmp import debug
+    from pyasn1.error import PyAsn1Error
 
     PySnmpPresent = True
+    Snmpv3AuthProtocols = {
+        None: usmNoAuthProtocol,
+        'MD5': usmHMACMD5AuthProtocol,
+        'SHA': usmHMACSHAAuthProtocol,
+        'SHA224': usmHMAC128SHA224AuthProtocol,
+        'SHA256': usmHMAC192SHA256AuthProtocol,
+        'SHA384': usmHMAC256SHA384AuthProtocol,
+        'SHA512': usmHMAC384SHA512AuthProtocol
+    }
+    Snmpv3PrivProtocols = {
+        None: usmNoPrivProtocol,
+        'DES': usmDESPrivProtocol,
+        '3DES': usm3DESEDEPrivProtocol,
+        'AES': usmAesCfb128Protocol,
+        'AES192': usmAesCfb192Protocol,
+        'AES256': usmAesCfb256Protocol
+    }
     # debug.setLogger(debug.Debug('dsp', 'msgproc'))
 
 except ImportError:
     PySnmpPresent = False
+    Snmpv3AuthProtocols = {}
+    Snmpv3PrivProtocols = {}
+
+
+class SNMPViewTrie(object):
+    """
+    Prefix trie of the OIDs of SNMP views
+
+    Each attribute of a view is resolved with the MIBs once, when the view
+    is first enumerated. A varbind is then decoded with one walk down the
+    trie, which gives its attribute, the MIB syntax of its value and its
+    index. Attributes which are not MIB columns or scalars, or which have
+    MIB objects under them, are left out: their varbinds are resolved with
+    the MIBs as before.
+
+    Views made of MIB scalars only are noted, so that they can be fetched
+    with GET instead of being walked.
+    """
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._views = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, views):
+        """Trie shared by the protocol instances of a driver
+
+        :param views: SNMP views of the driver
+        """
+        with cls._shared_lock:
+            if id(views) not in cls._shared:
+                # holds on to views, so that its id is not reused
+                cls._shared[id(views)] = (views, cls())
+            return cls._shared[id(views)][1]
+
+    def compile(self, clsName, snmpview, mibViewC):
+        """Compile a view, unless it is already compiled
+
+        :return: (trie root, reverse map of the attributes)
+        """
+        compiled = self._views.get(clsName)
+        if compiled is not None and compiled[0] is snmpview:
+            return compiled[1:3]
+        with self._lock:
+            compiled = self._views.get(clsName)
+            if compiled is not None and compiled[0] is snmpview:
+                return compiled[1:3]
+            (MibScalar, MibTableColumn) = mibViewC.mibBuilder.importSymbols(
+                'SNMPv2-SMI', 'MibScalar', 'MibTableColumn')
+            root = {}
+            revVars = {}
+            scalars = []
+            for attr in snmpview:
+                # loads the MIBs of the view, as the walk does
+                snmpview[attr].resolveWithMib(mibViewC)
+            order = 0
+            for attr in snmpview:
+                order = order + 1
+                oid = snmpview[attr]
+                revVars[str(oid) + "."] = attr
+                revVars[oid.prettyPrint()] = attr
+                prefix = tuple(oid.getOid())
+                (modName, symName, indices) = mibViewC.getNodeLocation(prefix)
+                (mibNode,) = mibViewC.mibBuilder.importSymbols(modName, symName)
+                if modName == "SNMPv2-SMI" and symName == "enterprises":
+                    syntax = None
+                elif len(indices) == 0 and isinstance(mibNode, (MibScalar, MibTableColumn)):
+                    syntax = mibNode.getSyntax()
+                else:
+                    scalars = None
+                    continue
+                try:
+                    nextOid = mibViewC.getNextNodeName(prefix)[0]
+                    if tuple(nextOid[:len(prefix)]) == prefix:
+                        scalars = None
+                        continue
+                except Exception:
+                    pass
+                if scalars is not None and syntax is not None and \
+                        not isinstance(mibNode, MibTableColumn):
+                    scalars.append(prefix)
+                else:
+                    scalars = None
+                node = root
+                for arc in prefix:
+                    node = node.setdefault(arc, {})
+                if -1 in node:
+                    # the later attribute wins, at the position of the first
+                    order = node[-1][0]
+                node[-1] = (order, attr, syntax)
+            if not scalars:
+                scalars = None
+            self._views[clsName] = (snmpview, root, revVars, scalars)
+            return (root, revVars)
+
+    def scalars(self, clsName, snmpview, mibViewC):
+        """OIDs of the view, if all its attributes are MIB scalars
+
+        :return: OIDs of the scalars, in the order of the view, or None
+        """
+        self.compile(clsName, snmpview, mibViewC)
+        return self._views[clsName][3]
+
+    def lookup(self, root, oid):
+        """Find the attribute of a varbind
+
+        :return: (attribute, syntax or None for enterprise OIDs, index) or None
+        """
+        found = None
+        node = root
+        depth = 0
+        for arc in oid:
+            node = node.get(arc)
+            if node is None:
+                break
+            depth = depth + 1
+            entry = node.get(-1)
+            if entry is None or (found is not None and found[0][0] < entry[0]):
+                continue
+            if entry[2] is None and depth == len(oid):
+                continue
+            found = (entry, depth)
+        if found is None:
+            return None
+        (entry, depth) = found
+        return (entry[1], entry[2], '.'.join([str(arc) for arc in oid[depth:]]))
 
 
 class SNMPProtocol(ProtocolBase):
-    def __init__(self, host, cstring="public", rwstring=None, pOptions=None, useSNMPGetFlag=False):
+    def __init__(self, host, cstring="public", rwstring=None, pOptions=None, useSNMPGetFlag=False, v3creds=None,
+                 snmpEngine=None):
         if PySnmpPresent:
-            self.snmpe = SnmpEngine()
+            self.snmpe = snmpEngine
+            if snmpEngine is None:
+                self.snmpe = SnmpEngine()
             self.cmdGen = cmdgen.CommandGenerator()
         else:
             self.cmdGen = None
@@ -72,6 +225,226 @@ class SNMPProtocol(ProtocolBase):
             self.udpx = UdpTransportTarget((self.host, self.pOptions.port),
                                            timeout=self.pOptions.timeout, retries=self.pOptions.nretries)
         self.useSNMPGetFlag = useSNMPGetFlag
+        self.v3creds = v3creds
+        self.version = getattr(self.pOptions, 'version', 'v1')
+        if v3creds is not None:
+            self.version = 'v3'
+        self.maxRepetitions = getattr(self.pOptions, 'max_repetitions', 25)
+        self.maxMessageSize = getattr(self.pOptions, 'max_message_size', 1472)
+        # lowered when the agent answers tooBig
+        self.maxVarBinds = None
+        self._v1Probed = False
+        self.trie = None
+
+    def _auth(self):
+        if self.version == 'v3':
+            authProtocol = None
+            if self.v3creds.authKey is not None:
+                authProtocol = self.v3creds.authProtocol
+            privProtocol = None
+            if self.v3creds.privKey is not None:
+                privProtocol = self.v3creds.privProtocol
+            return UsmUserData(self.v3creds.username, self.v3creds.authKey, self.v3creds.privKey,
+                               authProtocol=Snmpv3AuthProtocols[authProtocol],
+                               privProtocol=Snmpv3PrivProtocols[privProtocol])
+        if self.version == 'v2c':
+            return CommunityData(self.cstring, mpModel=1)
+        return CommunityData(self.cstring, mpModel=0)
+
+    # sysObjectID.0, answered by every agent
+    _probeOid = '1.3.6.1.2.1.1.2.0'
+
+    def _fallback(self, errorIndication):
+        """Drop to SNMPv1 when the agent does not answer SNMPv2c
+
+        SNMPv1 only agents silently discard v2c messages, so a timeout is
+        all we get back. A timeout is confirmed with a single short SNMPv1
+        GET, once per session, so that dead hosts are not waited for twice.
+        Once confirmed, the fallback sticks for the rest of the session.
+
+        :return: True if the request should be retried with SNMPv1
+        :rtype: bool
+        """
+        if not self._v1_probe_due(errorIndication):
+            return False
+        (errorIndication, errorStatus, errorIndex, varBinds) = next(
+            getCmd(self.snmpe, CommunityData(self.cstring, mpModel=0), self._probe_target(),
+                   ContextData(), ObjectType(ObjectIdentity(self._probeOid)), lookupMib=False))
+        return self._v1_confirmed(errorIndication)
+
+    def _v1_probe_due(self, errorIndication):
+        if self.version != 'v2c' or self._v1Probed:
+            return False
+        if errorIndication is None or errorIndication != errind.requestTimedOut:
+            return False
+        self._v1Probed = True
+        return True
+
+    def _probe_target(self):
+        # one try with a short timeout
+        return self.udpx.__class__((self.host, self.pOptions.port),
+                                   timeout=min(1.0, self.pOptions.timeout / 2.0), retries=0)
+
+    def _v1_confirmed(self, errorIndication):
+        if errorIndication:
+            logger.debug(self.host + ": no SNMPv2c or SNMPv1 answer")
+            return False
+        logger.debug(self.host + ": no SNMPv2c answer, falling back to SNMPv1")
+        self.version = 'v1'
+        return True
+
+    def _walk(self, oids, lookupMib=True):
+        """Walk the columns of a table, row by row
+
+        Uses GETBULK with maxRepetitions rows per request on SNMPv2c/v3 and
+        GETNEXT, one row per request, on SNMPv1.
+
+        :param oids: ObjectType of the columns
+        :param lookupMib: False to get the varbinds without MIB resolution
+        :return: generator of (errorIndication, errorStatus, errorIndex, varBinds)
+            per row, as nextCmd
+        """
+        if self.version != 'v1':
+            rows = self._bulk_walk(oids, lookupMib)
+            if rows is not None:
+                for row in rows:
+                    yield row
+                return
+        previous = None
+        for row in nextCmd(self.snmpe, self._auth(), self.udpx, ContextData(),
+                           *oids, lexicographicMode=False, lookupMib=lookupMib):
+            names = [varBind[0] for varBind in row[3]]
+            if names == previous and not row[0]:
+                # noSuchName at the end of a v1 MIB repeats the last row
+                continue
+            previous = names
+            yield row
+
+    def _bulk_walk(self, oids, lookupMib=True):
+        while True:
+            rows = []
+            for (errorIndication, errorStatus, errorIndex, varBinds) in \
+                    bulkCmd(self.snmpe, self._auth(), self.udpx, ContextData(),
+                            0, self.maxRepetitions, *oids, lexicographicMode=False,
+                            lookupMib=lookupMib):
+                if errorStatus and errorStatus == 1 and self.maxRepetitions > 1:
+                    # tooBig: retry with smaller responses
+                    self.maxRepetitions = max(1, self.maxRepetitions // 2)
+                    logger.debug(self.host + ": tooBig, maxRepetitions down to " + str(self.maxRepetitions))
+                    rows = None
+                    break
+                if (errorIndication or errorStatus) and not rows and \
+                        self._fallback(errorIndication):
+                    return None
+                if errorIndication or errorStatus:
+                    # bulkCmd keeps retrying timed out requests, nextCmd gives up
+                    rows.append((errorIndication, errorStatus, errorIndex, varBinds))
+                    break
+                if all([isinstance(varBind[1], EndOfMibView) for varBind in varBinds]):
+                    # a batch ending with the table gives one row past its end
+                    continue
+                rows.append((errorIndication, errorStatus, errorIndex, varBinds))
+            if rows is not None:
+                return rows
+
+    # estimates for packing variables in a request: the message and PDU
+    # headers, and the encoded value of a variable. Larger values make the
+    # agent answer tooBig, and the requests get smaller from then on
+    _msgOverhead = {'v1': 64, 'v2c': 64, 'v3': 160}
+    _valueSize = 16
+
+    def _oid_size(self, oid):
+        # BER encoded size of the variable name
+        size = 3
+        for arc in [oid[0] * 40 + oid[1]] + list(oid[2:]):
+            size = size + 1
+            while arc > 127:
+                arc = arc >> 7
+                size = size + 1
+        return size
+
+    def _batch(self, oids):
+        """Number of oids, from the start, to ask for in one request
+
+        Keeps the expected response within the max message size of the agent.
+        """
+        size = self._msgOverhead[self.version]
+        count = 0
+        for oid in oids:
+            size = size + 2 + self._oid_size(oid) + self._valueSize
+            if count > 0 and (size > self.maxMessageSize or
+                              (self.maxVarBinds is not None and count >= self.maxVarBinds)):
+                break
+            count = count + 1
+        return count
+
+    def _tooBig(self, errorStatus, count):
+        if errorStatus and errorStatus == 1 and count > 1:
+            self.maxVarBinds = max(1, count // 2)
+            logger.debug(self.host + ": tooBig, variables per request down to " + str(self.maxVarBinds))
+            return True
+        return False
+
+    def _get_packed(self, oids):
+        """GET instances with as few requests as fit
+
+        :param oids: OIDs of the instances
+        :return: (error, {oid: varBind}). error is None, or the
+            (errorIndication, errorStatus, errorIndex, varBinds) of the failed
+            request. Instances the agent does not have get noSuchObject,
+            noSuchInstance or endOfMibView values
+        """
+        values = {}
+        pending = list(oids)
+        while pending:
+            count = self._batch(pending)
+            batch = pending[:count]
+            (errorIndication, errorStatus, errorIndex, varBinds) = next(
+                getCmd(self.snmpe, self._auth(), self.udpx, ContextData(),
+                       *[ObjectType(ObjectIdentity(oid)) for oid in batch], lookupMib=False))
+            if errorIndication and self._fallback(errorIndication):
+                continue
+            if self._tooBig(errorStatus, count):
+                continue
+            if errorStatus and errorStatus == 2 and errorIndex:
+                # SNMPv1 noSuchName, ask again for the others
+                oid = batch[int(errorIndex) - 1]
+                values[oid] = (rfc1902.ObjectName(oid), rfc1905.endOfMibView)
+                pending.remove(oid)
+                continue
+            if errorIndication or errorStatus:
+                return ((errorIndication, errorStatus, errorIndex, varBinds), values)
+            for (oid, varBind) in zip(batch, varBinds):
+                values[oid] = varBind
+            pending = pending[count:]
+        return (None, values)
+
+    def _get_scalars(self, scalars):
+        """Fetch the instances of scalars with as few GET requests as fit
+
+        Gives the row a walk of the scalars would: scalars the agent does not
+        have come back as endOfMibView, and there is no row if it has none.
+
+        :param scalars: OIDs of the scalars
+        :return: rows of (errorIndication, errorStatus, errorIndex, varBinds), as _walk
+        """
+        (error, values) = self._get_packed([oid + (0,) for oid in scalars])
+        if error is not None:
+            return [error]
+        return self._scalar_rows(scalars, dict([(oid, values[oid + (0,)]) for oid in scalars]))
+
+    def _scalar_rows(self, scalars, values):
+        # the row of the walk of the scalars, from their GET varbinds
+        varBinds = []
+        for oid in scalars:
+            varBind = values[oid]
+            if isinstance(varBind[1], (rfc1905.NoSuchObject, rfc1905.NoSuchInstance,
+                                       rfc1905.EndOfMibView)):
+                varBind = (rfc1902.ObjectName(oid), rfc1905.endOfMibView)
+            varBinds.append(varBind)
+        if all([isinstance(varBind[1], rfc1905.EndOfMibView) for varBind in varBinds]):
+            return []
+        return [(None, 0, 0, varBinds)]
 
     def reset_connection(self):
         pass
@@ -90,15 +463,44 @@ class SNMPProtocol(ProtocolBase):
         # return { 'Status' : 'Error', 'Message' : 'Not implemented' }
         return retval
 
+    def get(self, *oids):
+        """SNMP GET of the given scalar instances in a single request
+
+        :param oids: instance oids, e.g. '1.3.6.1.2.1.1.2.0'
+        :return: {'Status': 'Success', 'Data': [(oid, value), ...]} on success
+        """
+        try:
+            errorIndication, errorStatus, errorIndex, varBinds = next(
+                getCmd(self.snmpe, self._auth(), self.udpx, ContextData(),
+                       *[ObjectType(ObjectIdentity(oid)) for oid in oids]))
+        except Exception as exp:
+            logger.debug("Exception: " + str(exp))
+            return {'Status': 'Failed', 'Message': 'Exception:' + str(exp)}
+        if errorIndication and self._fallback(errorIndication):
+            return self.get(*oids)
+        if errorIndication:
+            logger.debug(errorIndication)
+            return {'Status': 'Failed', 'Message': str(errorIndication)}
+        elif errorStatus:
+            return {'Status': 'Failed', 'Message': ('%s at %s' % (
+                errorStatus.prettyPrint(),
+                errorIndex and varBinds[int(errorIndex) - 1][0] or '?'))}
+        return {'Status': 'Success', 'Data': [(varBind[0], varBind[1]) for varBind in varBinds]}
+
     def _snmpset(self, defaultIdx, var):
         try:
             newvar = []
             for i in var:
                 newvar.append((i + "." + str(defaultIdx), var[i]))
             logger.debug(newvar)
-            logger.debug("host=" + self.host + ":community=" + self.rwstring)
+            if self.version == 'v3':
+                # SNMPv3 user of the session
+                authData = self._auth()
+            else:
+                logger.debug("host=" + self.host + ":community=" + self.rwstring)
+                authData = cmdgen.CommunityData(self.rwstring)
             errorIndication, errorStatus, errorIndex, varBinds = self.cmdGen.setCmd(
-                cmdgen.CommunityData(self.rwstring),
+                authData,
                 self.udpx,
                 *newvar)
             if errorIndication:
@@ -128,12 +530,7 @@ class SNMPProtocol(ProtocolBase):
             indices = []
             try:
                 oids = [ObjectType(ObjectIdentity(indexField))]
-                for (errorIndication, errorStatus, errorIndex, varBinds) in nextCmd(self.snmpe,
-                                                                                    CommunityData(self.cstring,
-                                                                                                  mpModel=0),
-                                                                                    self.udpx,
-                                                                                    ContextData(),
-                                                                                    *oids, lexicographicMode=False):
+                for (errorIndication, errorStatus, errorIndex, varBinds) in self._walk(oids):
                     counter = counter + 1
                     if errorIndication:
                         logger.debug(errorIndication)
@@ -194,12 +591,7 @@ class SNMPProtocol(ProtocolBase):
                     oids = [ObjectType(ObjectIdentity(indexField))]
                 else:
                     oids = [ObjectType(ObjectIdentity(nextIdx))]
-                for (errorIndication, errorStatus, errorIndex, varBinds) in nextCmd(self.snmpe,
-                                                                                    CommunityData(self.cstring,
-                                                                                                  mpModel=0),
-                                                                                    self.udpx,
-                                                                                    ContextData(),
-                                                                                    *oids, lexicographicMode=False):
+                for (errorIndication, errorStatus, errorIndex, varBinds) in self._walk(oids):
                     counter = counter + 1
                     if errorIndication:
                         logger.debug(errorIndication)
@@ -252,7 +644,6 @@ class SNMPProtocol(ProtocolBase):
         return rjson
 
     def _snmp_builder(self, clsName, snmpview):
-        ifMibRevVars = {}
         entity_raw = {}
         entity_raw[clsName] = []
         oids = []
@@ -263,19 +654,19 @@ class SNMPProtocol(ProtocolBase):
             logger.debug("::" + clsName + " is empty")
             return entity_raw
         try:
+            if self.trie is None:
+                self.trie = SNMPViewTrie()
+            mibViewC = CommandGeneratorVarBinds.getMibViewController(self.snmpe)
+            (trie, ifMibRevVars) = self.trie.compile(clsName, snmpview, mibViewC)
+            scalars = self.trie.scalars(clsName, snmpview, mibViewC)
+            if scalars is not None:
+                rows = self._get_scalars(scalars)
+            else:
+                rows = self._walk(oids, lookupMib=False)
             for (errorIndication,
                  errorStatus,
                  errorIndex,
-                 varBinds) in nextCmd(self.snmpe,
-                                      CommunityData(self.cstring, mpModel=0),
-                                      self.udpx,
-                                      ContextData(),
-                                      *oids,
-                                      lexicographicMode=False):
-                mibViewC = self.snmpe.getUserContext('mibViewController')
-                for attr in snmpview:
-                    ifMibRevVars[str(snmpview[attr]) + "."] = attr
-                    ifMibRevVars[snmpview[attr].prettyPrint()] = attr
+                 varBinds) in rows:
                 if errorIndication:
                     logger.debug(errorIndication)
                     continue
@@ -284,41 +675,65 @@ class SNMPProtocol(ProtocolBase):
                                                errorIndex and varBinds[int(errorIndex) - 1][0] or '?'))
                     continue
                 else:
-                    entry = {}
-                    idx = None
-                    for varBind in varBinds:
-                        (modName, symName, indices) = varBind[0].getMibSymbol()
-                        if modName == "SNMPv2-SMI" and symName == "enterprises":
-                            # MIB is not resolved!!
-                            vname = None
-                            vvarn = str(varBind[0])
-                            for vvar in ifMibRevVars:
-                                if vvar in vvarn:
-                                    vname = ifMibRevVars[vvar]
-                                    idx = vvarn.replace(vvar, "")
-                                    break
-                        else:
-                            vn = ObjectIdentity(modName, symName)
-                            vn.resolveWithMib(mibViewC)
-                            myvar = vn.prettyPrint()
-                            if not myvar in ifMibRevVars:
-                                logger.debug("WARN: " + str(myvar) + " not found in ifMibRevVars")
-                                logger.debug("WARN: " + varBind[0].prettyPrint())
-                                vname = str(myvar)
-                            else:
-                                vname = ifMibRevVars[myvar]
-                        val = varBind[1].prettyPrint()
-                        if vname is None:
-                            vname = "notsure"
-                        if val != "":
-                            entry[vname] = re.sub("^'|'$", "", val)
-                        if idx and not "_SNMPIndex" in entry:
-                            entry["_SNMPIndex"] = idx
-                    entity_raw[clsName].append(entry)
+                    entity_raw[clsName].append(self._decode_row(varBinds, trie, ifMibRevVars, mibViewC))
         except Exception as exp:
             logger.debug(clsName + " is not present!!")
             logger.debug(str(exp))
             # traceback.print_exc()
+        return self._entities(clsName, entity_raw)
+
+    def _decode_row(self, varBinds, trie, ifMibRevVars, mibViewC):
+        """Decode a row of varbinds into an entry of the view
+
+        :param varBinds: varbinds of the row, not resolved with the MIBs
+        :param trie: root of the compiled view, see SNMPViewTrie.compile
+        :return: {attribute: value, '_SNMPIndex': index}
+        """
+        entry = {}
+        idx = None
+        for varBind in varBinds:
+            found = self.trie.lookup(trie, tuple(varBind[0]))
+            if found is not None:
+                (vname, syntax, vidx) = found
+                if syntax is None:
+                    idx = vidx
+                val = self._value(syntax, varBind[1], mibViewC).prettyPrint()
+                if val != "":
+                    entry[vname] = re.sub("^'|'$", "", val)
+                if idx and not "_SNMPIndex" in entry:
+                    entry["_SNMPIndex"] = idx
+                continue
+            varBind = ObjectType(ObjectIdentity(varBind[0]), varBind[1]).resolveWithMib(mibViewC)
+            (modName, symName, indices) = varBind[0].getMibSymbol()
+            if modName == "SNMPv2-SMI" and symName == "enterprises":
+                # MIB is not resolved!!
+                vname = None
+                vvarn = str(varBind[0])
+                for vvar in ifMibRevVars:
+                    if vvar in vvarn:
+                        vname = ifMibRevVars[vvar]
+                        idx = vvarn.replace(vvar, "")
+                        break
+            else:
+                vn = ObjectIdentity(modName, symName)
+                vn.resolveWithMib(mibViewC)
+                myvar = vn.prettyPrint()
+                if not myvar in ifMibRevVars:
+                    logger.debug("WARN: " + str(myvar) + " not found in ifMibRevVars")
+                    logger.debug("WARN: " + varBind[0].prettyPrint())
+                    vname = str(myvar)
+                else:
+                    vname = ifMibRevVars[myvar]
+            val = varBind[1].prettyPrint()
+            if vname is None:
+                vname = "notsure"
+            if val != "":
+                entry[vname] = re.sub("^'|'$", "", val)
+            if idx and not "_SNMPIndex" in entry:
+                entry["_SNMPIndex"] = idx
+        return entry
+
+    def _entities(self, clsName, entity_raw):
         if (len(entity_raw[clsName]) <= 0):
             return {}
         elif (len(entity_raw[clsName]) > 1):
@@ -326,31 +741,51 @@ class SNMPProtocol(ProtocolBase):
         else:
             return {clsName: entity_raw[clsName][0]}
 
+    def _value(self, syntax, value, mibViewC):
+        # value casting of ObjectType.resolveWithMib, for MIB columns and scalars
+        if syntax is None or isinstance(value, (rfc1905.UnSpecified, rfc1905.NoSuchObject,
+                                                rfc1905.NoSuchInstance, rfc1905.EndOfMibView)):
+            return value
+        try:
+            value = syntax.clone(value)
+        except PyAsn1Error:
+            pass
+        if rfc1902.ObjectIdentifier().isSuperTypeOf(value, matchConstraints=False):
+            value = ObjectIdentity(value).resolveWithMib(mibViewC)
+        return value
+
     def _snmp_builder_UseSNMPGet(self, clsName, snmpview):
-        ifMibRevVars = {}
         entity_raw = {}
         entity_raw[clsName] = []
-        oids = []
         entry = {}
         try:
-            for attr in snmpview:
-                tmpoid = ObjectType(snmpview[attr])
-                oids.append(tmpoid)
+            attrs = list(snmpview)
+            oids = CommandGeneratorVarBinds().makeVarBinds(
+                self.snmpe, [ObjectType(snmpview[attr]) for attr in attrs])
+            while attrs:
+                # the first object of each attribute, packed in a GETNEXT
+                count = self._batch([tuple(oid[0].getOid()) for oid in oids])
                 errorIndication, errorStatus, errorIndex, varBinds = next(
-                    nextCmd(self.snmpe, CommunityData(self.cstring, mpModel=0), self.udpx, ContextData(),
-                            ObjectType(snmpview[attr]), lexicographicMode=False))
-                if errorIndication:
-                    logger.debug(errorIndication)
+                    nextCmd(self.snmpe, self._auth(), self.udpx, ContextData(), *oids[:count]))
+                if errorIndication and self._fallback(errorIndication):
                     continue
-                elif errorStatus:
-                    logger.debug('%s at %s' % (errorStatus.prettyPrint(),
-                                               errorIndex and varBinds[int(errorIndex) - 1][0] or '?'))
+                if self._tooBig(errorStatus, count):
                     continue
+                if errorIndication:
+                    logger.debug(errorIndication)
+                elif errorStatus or varBinds[0] is oids[0]:
+                    # an error, or a SNMPv1 noSuchName which nextCmd hides:
+                    # ask for the attributes one at a time
+                    for attr in attrs[:count]:
+                        self._snmp_next(attr, snmpview[attr], entry)
                 else:
-                    for varBind in varBinds:
-                        # pprint(varBind)
-                        # print(' = '.join([x.prettyPrint() for x in varBind]))
+                    for (attr, oid, varBind) in zip(attrs, oids, varBinds):
+                        if isinstance(varBind[1], EndOfMibView) or not oid[0].isPrefixOf(varBind[0]):
+                            # as the walk of the attribute stopping
+                            raise StopIteration()
                         entry[attr] = varBind[1].prettyPrint()
+                attrs = attrs[count:]
+                oids = oids[count:]
             entry["_SNMPIndex"] = '0'
             entity_raw[clsName].append(entry)
         except Exception as exp:
@@ -358,25 +793,34 @@ class SNMPProtocol(ProtocolBase):
             logger.debug(str(exp))
             # traceback.print_exc()
 
-        if (len(entity_raw[clsName]) <= 0):
-            return {}
-        elif (len(entity_raw[clsName]) > 1):
-            return entity_raw
+        return self._entities(clsName, entity_raw)
+
+    def _snmp_next(self, attr, oid, entry):
+        errorIndication, errorStatus, errorIndex, varBinds = next(
+            nextCmd(self.snmpe, self._auth(), self.udpx, ContextData(),
+                    ObjectType(oid), lexicographicMode=False))
+        if errorIndication and self._fallback(errorIndication):
+            errorIndication, errorStatus, errorIndex, varBinds = next(
+                nextCmd(self.snmpe, self._auth(), self.udpx, ContextData(),
+                        ObjectType(oid), lexicographicMode=False))
+        if errorIndication:
+            logger.debug(errorIndication)
+        elif errorStatus:
+            logger.debug('%s at %s' % (errorStatus.prettyPrint(),
+                                       errorIndex and varBinds[int(errorIndex) - 1][0] or '?'))
         else:
-            return {clsName: entity_raw[clsName][0]}
+            for varBind in varBinds:
+                entry[attr] = varBind[1].prettyPrint()
 
 
 class EntityMibConvertor(object):
-    def _checkit(self, tree, value):
-        if value in tree:
-            return tree
-        for k in tree:
-            if not "children" in tree[k]:
-                continue
-            node = self._checkit(tree[k]["children"], value)
-            if not node is None:
-                return node
-        return None
+    def _entity_key(self, entry, pos):
+        # entPhysicalContainedIn refers to the entPhysicalIndex of the
+        # parent. The index column is not-accessible, so when the agent
+        # does not return it the position of the row stands in for it.
+        if entry.get('FQDD') not in [None, '']:
+            return str(entry['FQDD'])
+        return str(pos)
 
     def _named_entity_tree(self, entity_tree, new_entity_tree):
         for i in entity_tree:
@@ -398,19 +842,35 @@ class EntityMibConvertor(object):
         if len(entity_raw["Entity"]) == 0:
             logger.debug("no entity present")
             return entity_raw
-        entity_tree = {}
-        entity_tree['1'] = entity_raw["Entity"][0]
-        entity_tree['1']["children"] = {}
-        counter = 0
-        for i in entity_raw["Entity"]:
-            counter = counter + 1
-            if i['ContainedIn'] == '0':
+        entities = entity_raw["Entity"]
+        # index the rows by entPhysicalIndex and entPhysicalContainedIn
+        keys = []
+        contains = {}
+        for pos in range(0, len(entities)):
+            keys.append(self._entity_key(entities[pos], pos + 1))
+            parent = str(entities[pos].get('ContainedIn', '0'))
+            if pos == 0 or parent == '0':
                 continue
-            node = self._checkit(entity_tree, i['ContainedIn'])
-            if not node is None:
-                if not "children" in node[i['ContainedIn']]:
-                    node[i['ContainedIn']]['children'] = {}
-                node[i['ContainedIn']]['children'][str(counter)] = i
+            if not parent in contains:
+                contains[parent] = []
+            contains[parent].append(pos)
+
+        # first row is the root, rows are copied to leave entity_raw intact
+        entity_tree = {}
+        entity_tree[keys[0]] = dict(entities[0])
+        entity_tree[keys[0]]["children"] = {}
+        pending = [(keys[0], entity_tree[keys[0]])]
+        seen = set([0])
+        while len(pending) > 0:
+            (key, node) = pending.pop()
+            for pos in contains.get(key, []):
+                if pos in seen:
+                    continue
+                seen.add(pos)
+                if not "children" in node:
+                    node["children"] = {}
+                node["children"][keys[pos]] = dict(entities[pos])
+                pending.append((keys[pos], node["children"][keys[pos]]))
         entity_tree = self._named_entity_tree(entity_tree, {})
         return entity_tree
 
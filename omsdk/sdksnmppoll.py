@@ -0,0 +1,603 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#
+# Copyright © 2018 Dell Inc. or its subsidiaries. All rights reserved.
+# Dell, EMC, and other trademarks are trademarks of Dell Inc. or its subsidiaries.
+# Other trademarks may be trademarks of their respective owners.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import sys
+import time
+import socket
+import asyncio
+import logging
+from omsdk.sdkcreds import CredentialsEnum
+from omsdk.sdkcenum import TypeHelper
+from omsdk.sdkproto import SNMPOptions
+from omsdk.sdksnmp import SNMPProtocol, SNMPViewTrie, PySnmpPresent
+from omsdk.simulator.devicesim import Simulator
+
+if PySnmpPresent:
+    from pysnmp.hlapi import SnmpEngine, ContextData, ObjectType, ObjectIdentity, CommunityData
+    from pysnmp.hlapi.asyncore import cmdgen
+    from pysnmp.hlapi.asyncore import UdpTransportTarget, Udp6TransportTarget
+    from pysnmp.hlapi.varbinds import CommandGeneratorVarBinds
+    from pysnmp.carrier.base import AbstractTransport, AbstractTransportDispatcher
+    from pysnmp.carrier.asyncore.dgram import udp, udp6
+    from pysnmp.entity import config
+    from pysnmp.proto.rfc1905 import endOfMibView, EndOfMibView
+    from pysnmp.proto.rfc1902 import ObjectName
+    from pyasn1.type.univ import Null
+
+PY2 = sys.version_info[0] == 2
+PY3 = sys.version_info[0] == 3
+
+logger = logging.getLogger(__name__)
+
+# Asyncio SNMP poller.
+# All the targets share one SNMP engine and one UDP socket, served by the
+# asyncio event loop; a dead device only holds up its own coroutine.
+#
+#     poller = SNMPPoller(max_inflight=256, rate=2000)
+#     async with poller:
+#         target = poller.target('10.0.0.1', Snmpv2Credentials('public'), psnmp=psnmp)
+#         result = await poller.enumerate_view(target, psnmp, F10CompEnum.Port)
+
+
+class _AsyncioDispatcher(AbstractTransportDispatcher):
+    """Drives the timers of the SNMP engine from the event loop"""
+
+    def __init__(self, loop, resolution=0.1):
+        AbstractTransportDispatcher.__init__(self)
+        self.loop = loop
+        self.setTimerResolution(resolution)
+        self._timer = None
+
+    def start(self):
+        self._timer = self.loop.call_later(self.getTimerResolution(), self._tick)
+
+    def _tick(self):
+        try:
+            self.handleTimerTick(time.time())
+        except Exception as ex:
+            logger.debug("SNMP timer failed: " + str(ex))
+        self._timer = self.loop.call_later(self.getTimerResolution(), self._tick)
+
+    def runDispatcher(self, timeout=0.0):
+        raise RuntimeError("SNMPPoller engine runs in its event loop")
+
+    def closeDispatcher(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        AbstractTransportDispatcher.closeDispatcher(self)
+
+
+class _UdpAsyncioTransport(asyncio.DatagramProtocol, AbstractTransport):
+    """UDP socket of the poller, shared by all the targets"""
+    protoTransportDispatcher = _AsyncioDispatcher
+    addressType = udp.UdpTransportAddress
+    sockFamily = socket.AF_INET
+    iface = ('0.0.0.0', 0)
+
+    def __init__(self):
+        self.transport = None
+
+    async def open(self, loop, rcvbuf):
+        sock = socket.socket(self.sockFamily, socket.SOCK_DGRAM)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        except (socket.error, OSError) as ex:
+            logger.debug("SO_RCVBUF not set: " + str(ex))
+        sock.bind(self.iface)
+        sock.setblocking(False)
+        await loop.create_datagram_endpoint(lambda: self, sock=sock)
+        return self
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, datagram, address):
+        if self._cbFun is None:
+            return
+        try:
+            self._cbFun(self, self.addressType(address[:2]), datagram)
+        except Exception as ex:
+            logger.debug("SNMP response from " + str(address) + " dropped: " + str(ex))
+
+    def error_received(self, exc):
+        logger.debug("SNMP socket error: " + str(exc))
+
+    def sendMessage(self, outgoingMessage, transportAddress):
+        self.transport.sendto(outgoingMessage, tuple(transportAddress))
+
+    def closeTransport(self):
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+        AbstractTransport.closeTransport(self)
+
+
+class _Udp6AsyncioTransport(_UdpAsyncioTransport):
+    addressType = udp6.Udp6TransportAddress
+    sockFamily = socket.AF_INET6
+    iface = ('::', 0)
+
+
+class _UdpTarget(UdpTransportTarget):
+    protoTransport = _UdpAsyncioTransport
+
+
+class _Udp6Target(Udp6TransportTarget):
+    protoTransport = _Udp6AsyncioTransport
+
+
+class SNMPPoller(object):
+    """
+    Asyncio SNMP poller for many devices
+
+    One SNMP engine and one socket (two with IPv6) serve all the targets.
+    Each target keeps the timeout and retries of its SNMPOptions, so a
+    device which does not answer only delays its own views. At most
+    max_inflight requests are outstanding and, if rate is given, no more
+    than rate requests per second are sent.
+
+    Views are walked and decoded as SNMPProtocol.enumerate does, so
+    enumerate_view gives the same results as PSNMP.enumerate_view.
+    """
+
+    def __init__(self, max_inflight=256, rate=None, burst=None, rcvbuf=4 * 1024 * 1024):
+        """
+        :param max_inflight: most SNMP requests outstanding at once
+        :param rate: most SNMP requests sent per second, None for no limit
+        :param burst: requests which can be sent at once within the rate, rate by default
+        :param rcvbuf: receive buffer size of the socket
+        :type max_inflight: int
+        :type rate: float
+        :type burst: int
+        :type rcvbuf: int
+        """
+        self.max_inflight = max_inflight
+        self.rate = rate
+        self.burst = burst
+        if self.burst is None and rate:
+            self.burst = max(1, int(rate))
+        self.rcvbuf = rcvbuf
+        self.snmpe = None
+        self.loop = None
+        self._dispatcher = None
+        self._inflight = None
+        self._tokens = 0
+        self._stamp = 0
+        self.counters = {'Requests': 0, 'Responses': 0, 'Timeouts': 0, 'Errors': 0}
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    async def start(self):
+        """Open the socket and start the SNMP engine in the running loop"""
+        if self.snmpe is not None:
+            return
+        if not PySnmpPresent:
+            raise RuntimeError("pysnmp is not installed")
+        self.loop = asyncio.get_event_loop()
+        self._inflight = asyncio.Semaphore(self.max_inflight)
+        self._tokens = self.burst or 0
+        self._stamp = self.loop.time()
+        self.snmpe = SnmpEngine()
+        self._dispatcher = _AsyncioDispatcher(self.loop)
+        self.snmpe.registerTransportDispatcher(self._dispatcher)
+        transport = await _UdpAsyncioTransport().open(self.loop, self.rcvbuf)
+        config.addTransport(self.snmpe, udp.domainName, transport)
+        try:
+            transport = await _Udp6AsyncioTransport().open(self.loop, self.rcvbuf)
+            config.addTransport(self.snmpe, udp6.domainName, transport)
+        except (socket.error, OSError) as ex:
+            logger.debug("No IPv6 SNMP socket: " + str(ex))
+        self._dispatcher.start()
+
+    def stop(self):
+        if self.snmpe is None:
+            return
+        self._dispatcher.closeDispatcher()
+        self.snmpe.unregisterTransportDispatcher()
+        self.snmpe = None
+        self._dispatcher = None
+
+    def target(self, host, creds, pOptions=None, psnmp=None):
+        """Session with a device, on the engine of the poller
+
+        :param host: address of the device
+        :param creds: Snmpv2Credentials or Snmpv3Credentials
+        :param pOptions: SNMPOptions of the device
+        :param psnmp: PSNMP of the driver, whose compiled views are used
+        :return: the session, for enumerate and enumerate_view
+        :rtype: SNMPProtocol
+        """
+        if pOptions is None:
+            pOptions = SNMPOptions()
+        if TypeHelper.resolve(creds.enid) == TypeHelper.resolve(CredentialsEnum.SNMPv3):
+            proto = SNMPProtocol(host, pOptions=pOptions, v3creds=creds, snmpEngine=self.snmpe)
+        else:
+            proto = SNMPProtocol(host, creds.community, creds.writeCommunity, pOptions,
+                                 snmpEngine=self.snmpe)
+        if ':' in host:
+            proto.udpx = _Udp6Target((host, pOptions.port),
+                                     timeout=pOptions.timeout, retries=pOptions.nretries)
+        else:
+            proto.udpx = _UdpTarget((host, pOptions.port),
+                                    timeout=pOptions.timeout, retries=pOptions.nretries)
+        if psnmp is not None:
+            proto.trie = psnmp.trie
+            proto.useSNMPGetFlag = psnmp.useSNMPGetFlag
+        return proto
+
+    async def _throttle(self):
+        if not self.rate:
+            return
+        while True:
+            now = self.loop.time()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            if self._tokens >= 1:
+                self._tokens = self._tokens - 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def _request(self, proto, cmd, *args, auth=None, target=None):
+        await self._throttle()
+        await self._inflight.acquire()
+        future = self.loop.create_future()
+
+        def cbFun(snmpEngine, sendRequestHandle, errorIndication,
+                  errorStatus, errorIndex, varBindTable, cbCtx):
+            # the slot is held until pysnmp is done with the request, retries
+            # included, even when the caller was cancelled by a deadline
+            self._inflight.release()
+            if not future.done():
+                future.set_result((errorIndication, errorStatus, errorIndex, varBindTable))
+            # one request at a time, the walk is driven from here
+            return False
+
+        self.counters['Requests'] = self.counters['Requests'] + 1
+        try:
+            cmd(self.snmpe, auth or proto._auth(), target or proto.udpx, ContextData(), *args,
+                cbFun=cbFun, lookupMib=False)
+        except Exception as ex:
+            self._inflight.release()
+            logger.debug(proto.host + ": SNMP request failed: " + str(ex))
+            self.counters['Errors'] = self.counters['Errors'] + 1
+            return (str(ex), 0, 0, [])
+        result = await future
+        if result[0]:
+            self.counters['Timeouts'] = self.counters['Timeouts'] + 1
+        else:
+            self.counters['Responses'] = self.counters['Responses'] + 1
+        return result
+
+    async def _fallback(self, proto, errorIndication):
+        # SNMPProtocol._fallback, with the SNMPv1 probe sent from the loop
+        if not proto._v1_probe_due(errorIndication):
+            return False
+        result = await self._request(proto, cmdgen.getCmd, (ObjectName(proto._probeOid), Null('')),
+                                     auth=CommunityData(proto.cstring, mpModel=0),
+                                     target=proto._probe_target())
+        return proto._v1_confirmed(result[0])
+
+    async def _walk(self, proto, oids):
+        # rows of SNMPProtocol._walk
+        if proto.version != 'v1':
+            rows = await self._bulk_walk(proto, oids)
+            if rows is not None:
+                return rows
+        rows = []
+        initialVars = [tuple(oid[0].getOid()) for oid in oids]
+        varBinds = oids
+        previous = None
+        while True:
+            (errorIndication, errorStatus, errorIndex, varBindTable) = await self._request(
+                proto, cmdgen.nextCmd, *[(x[0], Null('')) for x in varBinds])
+            if errorIndication:
+                rows.append((errorIndication, errorStatus, errorIndex, varBinds))
+                return rows
+            elif errorStatus:
+                if errorStatus == 2:
+                    # SNMPv1 noSuchName at the end of the MIB
+                    errorStatus = errorStatus.clone(0)
+                    errorIndex = errorIndex.clone(0)
+                if [varBind[0] for varBind in varBinds] != previous:
+                    # not the last row repeated
+                    rows.append((errorIndication, errorStatus, errorIndex, varBinds))
+                return rows
+            previousVarBinds = varBinds
+            varBinds = varBindTable and varBindTable[0]
+            stopFlag = True
+            for col, varBind in enumerate(varBinds):
+                (name, val) = varBind
+                if isinstance(val, Null) or not self._in_scope(initialVars[col], name):
+                    varBinds[col] = (previousVarBinds[col][0], endOfMibView)
+                if stopFlag and varBinds[col][1] is not endOfMibView:
+                    stopFlag = False
+            if stopFlag:
+                return rows
+            previous = [varBind[0] for varBind in varBinds]
+            rows.append((errorIndication, errorStatus, errorIndex, varBinds))
+
+    def _in_scope(self, prefix, name):
+        return tuple(name[:len(prefix)]) == prefix
+
+    async def _bulk_walk(self, proto, oids):
+        # rows of SNMPProtocol._bulk_walk
+        while True:
+            rows = await self._bulk_rows(proto, oids)
+            if rows is not False:
+                return rows
+
+    async def _bulk_rows(self, proto, oids):
+        rows = []
+        initialVars = [tuple(oid[0].getOid()) for oid in oids]
+        nullVarBinds = [False] * len(initialVars)
+        varBinds = oids
+        stopFlag = False
+        while not stopFlag:
+            previousVarBinds = varBinds
+            (errorIndication, errorStatus, errorIndex, varBindTable) = await self._request(
+                proto, cmdgen.bulkCmd, 0, proto.maxRepetitions, *[(x[0], Null('')) for x in varBinds])
+            if errorIndication or errorStatus:
+                if errorStatus and errorStatus == 1 and proto.maxRepetitions > 1:
+                    # tooBig: retry with smaller responses
+                    proto.maxRepetitions = max(1, proto.maxRepetitions // 2)
+                    logger.debug(proto.host + ": tooBig, maxRepetitions down to " + str(proto.maxRepetitions))
+                    return False
+                if errorStatus == 2:
+                    errorStatus = errorStatus.clone(0)
+                    errorIndex = errorIndex.clone(0)
+                if (errorIndication or errorStatus) and not rows and \
+                        await self._fallback(proto, errorIndication):
+                    return None
+                row = varBindTable and varBindTable[0] or []
+                if errorIndication or errorStatus or \
+                        not all([isinstance(varBind[1], EndOfMibView) for varBind in row]):
+                    rows.append((errorIndication, errorStatus, errorIndex, row))
+                return rows
+            for row in range(len(varBindTable)):
+                stopFlag = True
+                if len(varBindTable[row]) != len(initialVars):
+                    varBindTable = row and varBindTable[:row - 1] or []
+                    break
+                for col in range(len(varBindTable[row])):
+                    (name, val) = varBindTable[row][col]
+                    if row:
+                        previousVarBinds = varBindTable[row - 1]
+                    if nullVarBinds[col]:
+                        varBindTable[row][col] = (previousVarBinds[col][0], endOfMibView)
+                        continue
+                    stopFlag = False
+                    if isinstance(val, Null) or not self._in_scope(initialVars[col], name):
+                        varBindTable[row][col] = (previousVarBinds[col][0], endOfMibView)
+                        nullVarBinds[col] = True
+                if stopFlag:
+                    varBindTable = row and varBindTable[:row - 1] or []
+                    break
+            varBinds = varBindTable and varBindTable[-1] or []
+            for varBindRow in varBindTable:
+                if all([isinstance(varBind[1], EndOfMibView) for varBind in varBindRow]):
+                    # a batch ending with the table gives one row past its end
+                    continue
+                rows.append((None, 0, 0, varBindRow))
+            if not varBinds:
+                stopFlag = True
+        return rows
+
+    async def _snmp_builder(self, proto, clsName, snmpview):
+        entity_raw = {}
+        entity_raw[clsName] = []
+        oids = []
+        for attr in snmpview:
+            oids.append(ObjectType(snmpview[attr]))
+        if len(oids) <= 0:
+            logger.debug("::" + clsName + " is empty")
+            return entity_raw
+        try:
+            if proto.trie is None:
+                proto.trie = SNMPViewTrie()
+            mibViewC = CommandGeneratorVarBinds.getMibViewController(self.snmpe)
+            (trie, ifMibRevVars) = proto.trie.compile(clsName, snmpview, mibViewC)
+            scalars = proto.trie.scalars(clsName, snmpview, mibViewC)
+            if scalars is not None:
+                rows = await self._get_scalars(proto, scalars)
+            else:
+                oids = CommandGeneratorVarBinds().makeVarBinds(self.snmpe, oids)
+                rows = await self._walk(proto, oids)
+            for (errorIndication, errorStatus, errorIndex, varBinds) in rows:
+                if errorIndication:
+                    logger.debug(errorIndication)
+                    continue
+                elif errorStatus:
+                    logger.debug('%s at %s' % (errorStatus.prettyPrint(),
+                                               errorIndex and varBinds[int(errorIndex) - 1][0] or '?'))
+                    continue
+                entity_raw[clsName].append(proto._decode_row(varBinds, trie, ifMibRevVars, mibViewC))
+        except Exception as exp:
+            logger.debug(clsName + " is not present!!")
+            logger.debug(str(exp))
+        return proto._entities(clsName, entity_raw)
+
+    async def _get_scalars(self, proto, scalars):
+        # rows of SNMPProtocol._get_scalars
+        values = {}
+        pending = list(scalars)
+        while pending:
+            count = proto._batch(pending)
+            batch = pending[:count]
+            (errorIndication, errorStatus, errorIndex, varBinds) = await self._request(
+                proto, cmdgen.getCmd, *[(ObjectName(oid + (0,)), Null('')) for oid in batch])
+            if errorIndication and await self._fallback(proto, errorIndication):
+                continue
+            if proto._tooBig(errorStatus, count):
+                continue
+            if errorStatus and errorStatus == 2 and errorIndex:
+                oid = batch[int(errorIndex) - 1]
+                values[oid] = (ObjectName(oid), endOfMibView)
+                pending.remove(oid)
+                continue
+            if errorIndication or errorStatus:
+                return [(errorIndication, errorStatus, errorIndex, varBinds)]
+            for (oid, varBind) in zip(batch, varBinds):
+                values[oid] = varBind
+            pending = pending[count:]
+        return proto._scalar_rows(scalars, values)
+
+    async def _snmp_builder_UseSNMPGet(self, proto, clsName, snmpview):
+        entity_raw = {}
+        entity_raw[clsName] = []
+        entry = {}
+        mibViewC = CommandGeneratorVarBinds.getMibViewController(self.snmpe)
+        try:
+            attrs = list(snmpview)
+            oids = CommandGeneratorVarBinds().makeVarBinds(
+                self.snmpe, [ObjectType(snmpview[attr]) for attr in attrs])
+            while attrs:
+                # as SNMPProtocol._snmp_builder_UseSNMPGet
+                count = proto._batch([tuple(oid[0].getOid()) for oid in oids])
+                (errorIndication, errorStatus, errorIndex, varBindTable) = await self._request(
+                    proto, cmdgen.nextCmd, *[(oid[0], Null('')) for oid in oids[:count]])
+                if errorIndication and await self._fallback(proto, errorIndication):
+                    continue
+                if proto._tooBig(errorStatus, count):
+                    continue
+                if errorIndication:
+                    logger.debug(errorIndication)
+                elif errorStatus:
+                    for i in range(0, count):
+                        await self._snmp_next(proto, attrs[i], oids[i], entry, mibViewC)
+                else:
+                    for (attr, oid, varBind) in zip(attrs, oids, varBindTable[0]):
+                        self._next_value(attr, oid, varBind, entry, mibViewC)
+                attrs = attrs[count:]
+                oids = oids[count:]
+            entry["_SNMPIndex"] = '0'
+            entity_raw[clsName].append(entry)
+        except Exception as exp:
+            logger.debug(clsName + " is not present!!")
+            logger.debug(str(exp))
+        return proto._entities(clsName, entity_raw)
+
+    async def _snmp_next(self, proto, attr, oid, entry, mibViewC):
+        (errorIndication, errorStatus, errorIndex, varBindTable) = await self._request(
+            proto, cmdgen.nextCmd, (oid[0], Null('')))
+        if errorIndication and await self._fallback(proto, errorIndication):
+            (errorIndication, errorStatus, errorIndex, varBindTable) = await self._request(
+                proto, cmdgen.nextCmd, (oid[0], Null('')))
+        if errorIndication:
+            logger.debug(errorIndication)
+        elif errorStatus and errorStatus != 2:
+            logger.debug('%s at %s' % (errorStatus.prettyPrint(), errorIndex))
+        elif errorStatus:
+            # SNMPv1 noSuchName gives back the request
+            entry[attr] = oid[1].prettyPrint()
+        else:
+            self._next_value(attr, oid, varBindTable[0][0], entry, mibViewC)
+
+    def _next_value(self, attr, oid, varBind, entry, mibViewC):
+        (name, val) = varBind
+        if isinstance(val, Null) or not self._in_scope(tuple(oid[0].getOid()), name):
+            raise LookupError("no " + attr)
+        varBind = ObjectType(ObjectIdentity(name), val).resolveWithMib(mibViewC)
+        entry[attr] = varBind[1].prettyPrint()
+
+    async def enumerate(self, proto, clsName, snmpview):
+        """Walk a view of a target, as SNMPProtocol.enumerate
+
+        :param proto: target, from target()
+        :param clsName: name of the view
+        :param snmpview: {attribute: ObjectIdentity}
+        :return: {'Status': 'Success', 'Data': {clsName: entries}}
+        """
+        retval = {}
+        retval['Status'] = 'Success'
+        if proto.useSNMPGetFlag:
+            retval['Data'] = await self._snmp_builder_UseSNMPGet(proto, clsName, snmpview)
+        else:
+            retval['Data'] = await self._snmp_builder(proto, clsName, snmpview)
+        return retval
+
+    async def enumerate_view(self, proto, psnmp, index, views=None):
+        """Enumerate a view of the driver for a target, as PSNMP.enumerate_view
+
+        :param proto: target, from target()
+        :param psnmp: PSNMP of the driver of the device
+        :param index: view to enumerate
+        :param views: views to pick the view from, views of the driver by default
+        """
+        if views is None:
+            views = psnmp.views
+        if not index in views:
+            logger.debug("WARN: no " + str(index) + " for " + str(psnmp.enumid))
+            return {'Status': 'Success', 'Message': 'Not supported'}
+        clsName = TypeHelper.resolve(index)
+        logger.debug("Collecting " + clsName + " ... via " + str(psnmp.enumid) + "...")
+        if Simulator.is_simulating():
+            retval = Simulator.simulate_proto(proto.host, psnmp.enumid, clsName)
+        else:
+            retval = await self.enumerate(proto, clsName, views[index])
+            if Simulator.is_recording():
+                Simulator.record_proto(proto.host, psnmp.enumid, clsName, retval)
+        return psnmp._process_view(index, clsName, retval)
+
+    async def poll(self, proto, psnmp, indexes=None, timeout=None):
+        """Enumerate views of a target, one after the other
+
+        :param indexes: views to enumerate, all the views of the driver by default
+        :param timeout: deadline in seconds for the target, None for no deadline.
+            Views not done by then fail with a timeout message.
+        :return: {clsName: result of enumerate_view}
+        """
+        if indexes is None:
+            indexes = list(psnmp.views.keys())
+        results = {}
+
+        async def _views():
+            for index in indexes:
+                results[TypeHelper.resolve(index)] = await self.enumerate_view(proto, psnmp, index)
+
+        try:
+            await asyncio.wait_for(_views(), timeout)
+        except asyncio.TimeoutError:
+            logger.debug(proto.host + ": not polled within " + str(timeout) + "s")
+        for index in indexes:
+            if TypeHelper.resolve(index) not in results:
+                results[TypeHelper.resolve(index)] = {
+                    'Status': 'Failed',
+                    'Message': 'Target not polled within ' + str(timeout) + 's'
+                }
+        return results
+
+    async def poll_all(self, targets, indexes=None, timeout=None):
+        """Poll many targets at once
+
+        :param targets: (proto, psnmp) of each target
+        :param timeout: deadline in seconds for each target
+        :return: {host: {clsName: result of enumerate_view}}
+        """
+        targets = list(targets)
+        results = await asyncio.gather(*[self.poll(proto, psnmp, indexes, timeout)
+                                         for (proto, psnmp) in targets])
+        return dict([(targets[i][0].host, results[i]) for i in range(0, len(targets))])
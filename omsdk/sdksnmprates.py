@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#
+# Copyright © 2018 Dell Inc. or its subsidiaries. All rights reserved.
+# Dell, EMC, and other trademarks are trademarks of Dell Inc. or its subsidiaries.
+# Other trademarks may be trademarks of their respective owners.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import sys
+import time
+import logging
+import threading
+from omsdk.sdksnmp import SNMPProtocol, PySnmpPresent
+
+if PySnmpPresent:
+    from pysnmp.hlapi import ObjectType, ObjectIdentity
+    from pysnmp.proto import rfc1905
+
+PY2 = sys.version_info[0] == 2
+PY3 = sys.version_info[0] == 3
+
+logger = logging.getLogger(__name__)
+
+SysUpTime = (1, 3, 6, 1, 2, 1, 1, 3, 0)
+
+# IF-MIB ifXTable: 64-bit counters and counter discontinuities
+HCCounters = {
+    'InOctets': (1, 3, 6, 1, 2, 1, 31, 1, 1, 1, 6),
+    'InUcastPkts': (1, 3, 6, 1, 2, 1, 31, 1, 1, 1, 7),
+    'InMulticastPkts': (1, 3, 6, 1, 2, 1, 31, 1, 1, 1, 8),
+    'InBroadcastPkts': (1, 3, 6, 1, 2, 1, 31, 1, 1, 1, 9),
+    'OutOctets': (1, 3, 6, 1, 2, 1, 31, 1, 1, 1, 10),
+    'OutUcastPkts': (1, 3, 6, 1, 2, 1, 31, 1, 1, 1, 11),
+    'OutMulticastPkts': (1, 3, 6, 1, 2, 1, 31, 1, 1, 1, 12),
+    'OutBroadcastPkts': (1, 3, 6, 1, 2, 1, 31, 1, 1, 1, 13),
+}
+HCColumns = {
+    'CounterDiscontinuityTime': (1, 3, 6, 1, 2, 1, 31, 1, 1, 1, 19),
+}
+
+# IF-MIB ifTable: 32-bit counters, for agents without ifXTable (and SNMPv1)
+Counters = {
+    'InOctets': (1, 3, 6, 1, 2, 1, 2, 2, 1, 10),
+    'InUcastPkts': (1, 3, 6, 1, 2, 1, 2, 2, 1, 11),
+    'InNUcastPkts': (1, 3, 6, 1, 2, 1, 2, 2, 1, 12),
+    'OutOctets': (1, 3, 6, 1, 2, 1, 2, 2, 1, 16),
+    'OutUcastPkts': (1, 3, 6, 1, 2, 1, 2, 2, 1, 17),
+    'OutNUcastPkts': (1, 3, 6, 1, 2, 1, 2, 2, 1, 18),
+}
+Columns = {
+    'Speed': (1, 3, 6, 1, 2, 1, 2, 2, 1, 5),
+}
+
+# speed in Mbit/s, ifSpeed stops at 4294967295 bit/s
+HighSpeed = (1, 3, 6, 1, 2, 1, 31, 1, 1, 1, 15)
+
+# ifTable error counters, which have no 64-bit version
+ErrorCounters = {
+    'InDiscards': (1, 3, 6, 1, 2, 1, 2, 2, 1, 13),
+    'InErrors': (1, 3, 6, 1, 2, 1, 2, 2, 1, 14),
+    'OutDiscards': (1, 3, 6, 1, 2, 1, 2, 2, 1, 19),
+    'OutErrors': (1, 3, 6, 1, 2, 1, 2, 2, 1, 20),
+}
+
+# rates, from the counters summed up for each
+Rates = {
+    'InBitsPerSec': ['InOctets'],
+    'OutBitsPerSec': ['OutOctets'],
+    'InPktsPerSec': ['InUcastPkts', 'InMulticastPkts', 'InBroadcastPkts', 'InNUcastPkts'],
+    'OutPktsPerSec': ['OutUcastPkts', 'OutMulticastPkts', 'OutBroadcastPkts', 'OutNUcastPkts'],
+    'InErrorsPerSec': ['InErrors'],
+    'OutErrorsPerSec': ['OutErrors'],
+    'InDiscardsPerSec': ['InDiscards'],
+    'OutDiscardsPerSec': ['OutDiscards'],
+}
+
+
+class InterfaceRates(object):
+    """
+    Traffic and error rates of the interfaces of a switch
+
+    Every poll reads only the interface counters, and sysUpTime, and
+    compares them with the sample of the previous poll. The 64-bit
+    counters of ifXTable are used when the agent has them, the 32-bit ones
+    of ifTable otherwise; a counter which went down has wrapped. After a
+    restart of the agent, or a discontinuity of the counters of an
+    interface, the new sample is taken as the base for the next poll.
+
+    With a store, the rates are also added to its time series, with the
+    ifIndex as the component of the series.
+
+        rates = InterfaceRates(proto)
+        rates.poll()
+        time.sleep(10)
+        rates.poll()['Data']['1']['InBitsPerSec']
+    """
+    def __init__(self, proto, interfaces=None, store=None, device=None):
+        """
+        :param proto: SNMP protocol of the switch
+        :param interfaces: ifIndex of the interfaces to poll, all by default.
+            Given interfaces are read with GET instead of a walk of the tables
+        :param store: time series to add the rates to
+        :param device: key of the device in the store, the host by default
+        :type proto: omsdk.sdksnmp.SNMPProtocol
+        :type interfaces: list
+        :type store: omsdk.sdktelemetry.TimeSeriesStore
+        :type device: str
+        """
+        self.proto = proto
+        self.interfaces = interfaces
+        if interfaces is not None:
+            self.interfaces = [str(i) for i in interfaces]
+        self.store = store
+        self.device = device
+        if self.device is None:
+            self.device = proto.host
+        # None until the first poll finds out if the agent has ifXTable
+        self.hc = None
+        self._uptime = None
+        self._stamp = None
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_device(cls, device, interfaces=None, store=None):
+        """Rates of a switch connected with SNMP, such as a F10 or F10NG device
+
+        :param device: connected device, from sdkinfra.get_driver
+        :return: None if the device has no SNMP connection
+        :rtype: InterfaceRates
+        """
+        cfactory = getattr(device, 'cfactory', None)
+        if cfactory is None:
+            return None
+        for connection in cfactory.work_connection:
+            proto = getattr(connection, 'proto', None)
+            if isinstance(proto, SNMPProtocol):
+                return cls(proto, interfaces, store, device.ipaddr)
+        return None
+
+    def _columns(self, hc):
+        columns = dict(ErrorCounters)
+        columns['HighSpeed'] = HighSpeed
+        if hc:
+            columns.update(HCCounters)
+            columns.update(HCColumns)
+        else:
+            columns.update(Counters)
+            columns.update(Columns)
+        return columns
+
+    def _value(self, value):
+        if value is None or isinstance(value, (rfc1905.NoSuchObject, rfc1905.NoSuchInstance,
+                                               rfc1905.EndOfMibView)):
+            return None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    def _read(self, hc):
+        """Read sysUpTime and the columns
+
+        :return: (uptime in ticks, {ifIndex: {column: value}}), None if the agent did not answer
+        """
+        columns = self._columns(hc)
+        if self.interfaces is not None:
+            oids = [SysUpTime]
+            for ifIndex in self.interfaces:
+                oids.extend([columns[name] + (int(ifIndex),) for name in columns])
+        else:
+            oids = [SysUpTime]
+        (error, values) = self.proto._get_packed(oids)
+        uptime = None
+        if error is None:
+            uptime = self._value(values[SysUpTime][1])
+        if uptime is None:
+            logger.debug(self.device + ": no sysUpTime: " + str(error and (error[0] or error[1])))
+            return None
+        samples = {}
+        if self.interfaces is not None:
+            for ifIndex in self.interfaces:
+                for name in columns:
+                    value = self._value(values[columns[name] + (int(ifIndex),)][1])
+                    if value is not None:
+                        samples.setdefault(ifIndex, {})[name] = value
+            return (uptime, samples)
+        names = dict([(columns[name], name) for name in columns])
+        lengths = sorted(set([len(oid) for oid in names]))
+        for (errorIndication, errorStatus, errorIndex, varBinds) in \
+                self.proto._walk([ObjectType(ObjectIdentity(columns[name])) for name in columns],
+                                 lookupMib=False):
+            if errorIndication or errorStatus:
+                logger.debug(self.device + ": walk of the counters failed: " +
+                             str(errorIndication or errorStatus.prettyPrint()))
+                return None
+            for (oid, value) in varBinds:
+                oid = tuple(oid)
+                value = self._value(value)
+                if value is None:
+                    continue
+                for length in lengths:
+                    if oid[:length] in names and len(oid) > length:
+                        ifIndex = '.'.join([str(arc) for arc in oid[length:]])
+                        samples.setdefault(ifIndex, {})[names[oid[:length]]] = value
+                        break
+        return (uptime, samples)
+
+    def _interval(self, uptime, stamp):
+        """Seconds since the previous poll, in the clock of the agent
+
+        :return: None on the first poll, and when the agent has restarted since the previous one
+        """
+        if self._uptime is None:
+            return None
+        elapsed = stamp - self._stamp
+        # latency of the requests and the tick of the agent clock
+        slack = max(5.0, elapsed * 0.1)
+        ticks = uptime - self._uptime
+        if ticks < 0:
+            # sysUpTime wraps after 497 days, anything else going down is a restart
+            ticks = ticks + 2 ** 32
+            if abs(ticks / 100.0 - elapsed) > slack:
+                logger.debug(self.device + ": agent restarted, sysUpTime went down")
+                return None
+        elif uptime / 100.0 + slack < elapsed:
+            logger.debug(self.device + ": agent restarted since the previous poll")
+            return None
+        if ticks <= 0:
+            return None
+        return ticks / 100.0
+
+    def _delta(self, name, previous, sample):
+        delta = sample[name] - previous[name]
+        if delta < 0:
+            if name in HCCounters and self.hc:
+                # 64-bit counters do not wrap between polls, they were reset
+                return None
+            delta = delta + 2 ** 32
+        return delta
+
+    def _rates(self, previous, sample, interval):
+        if previous.get('CounterDiscontinuityTime') != sample.get('CounterDiscontinuityTime'):
+            return None
+        rates = {}
+        for rate in Rates:
+            total = None
+            for name in Rates[rate]:
+                if name not in sample or name not in previous:
+                    continue
+                delta = self._delta(name, previous, sample)
+                if delta is None:
+                    return None
+                total = (total or 0) + delta
+            if total is None:
+                continue
+            if rate.endswith('BitsPerSec'):
+                total = total * 8
+            rates[rate] = total / interval
+        speed = None
+        if sample.get('HighSpeed'):
+            speed = sample['HighSpeed'] * 1000000.0
+        elif sample.get('Speed') and sample['Speed'] < 2 ** 32 - 1:
+            speed = float(sample['Speed'])
+        if speed:
+            for direction in ['In', 'Out']:
+                if direction + 'BitsPerSec' in rates:
+                    rates[direction + 'Utilization'] = rates[direction + 'BitsPerSec'] * 100.0 / speed
+        return rates
+
+    def poll(self):
+        """Read the counters and compute the rates since the previous poll
+
+        :return: {'Status': 'Success', 'Data': {ifIndex: {rate: value}}, 'Interval': seconds}
+            Rates are per second, utilizations in percent of the interface
+            speed. Data is empty on the first poll and after a restart of the agent
+        :rtype: dict
+        """
+        with self._lock:
+            hc = self.hc
+            read = self._read(hc is not False)
+            if read is not None and hc is None:
+                hc = any(['InOctets' in sample for sample in read[1].values()])
+                if not hc:
+                    # no ifXTable, or SNMPv1 which has no 64-bit counters
+                    logger.debug(self.device + ": no 64-bit counters, using ifTable")
+                    read = self._read(False)
+            if read is None:
+                return {'Status': 'Failed', 'Message': 'Could not read the counters of ' + str(self.device)}
+            self.hc = hc
+            (uptime, samples) = read
+            stamp = time.time()
+            interval = self._interval(uptime, stamp)
+            retval = {'Status': 'Success', 'Data': {}, 'Interval': interval}
+            if interval is not None:
+                for ifIndex in samples:
+                    previous = self._samples.get(ifIndex, None)
+                    if previous is None:
+                        continue
+                    rates = self._rates(previous, samples[ifIndex], interval)
+                    if rates is None:
+                        logger.debug(self.device + ": counters of " + ifIndex + " were reset")
+                        continue
+                    retval['Data'][ifIndex] = rates
+            self._uptime = uptime
+            self._stamp = stamp
+            self._samples = samples
+        if self.store is not None:
+            for ifIndex in retval['Data']:
+                for rate in retval['Data'][ifIndex]:
+                    self.store.add(self.device, ifIndex, rate, stamp, retval['Data'][ifIndex][rate])
+        return retval
+
+    def reset(self):
+        """Forget the previous sample, the next poll starts over"""
+        with self._lock:
+            self._uptime = None
+            self._stamp = None
+            self._samples = {}
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#
+# Copyright © 2018 Dell Inc. or its subsidiaries. All rights reserved.
+# Dell, EMC, and other trademarks are trademarks of Dell Inc. or its subsidiaries.
+# Other trademarks may be trademarks of their respective owners.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import re
+import sys
+import json
+import time
+import socket
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+
+PY2 = sys.version_info[0] == 2
+PY3 = sys.version_info[0] == 3
+
+logger = logging.getLogger(__name__)
+
+
+class TimeSeriesStore(object):
+    """
+    In memory time series of numeric samples
+
+    Samples are keyed by device, FQDD and metric id. Every series keeps
+    the latest max_samples samples, in time order.
+    """
+    def __init__(self, max_samples=1440):
+        """
+        :param max_samples: number of samples kept per series
+        :type max_samples: int
+        """
+        self.max_samples = max_samples
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def add(self, device, fqdd, metric, timestamp, value):
+        """Add a sample, unless the series already has a newer or same sample
+
+        :return: True if the sample was added
+        :rtype: bool
+        """
+        key = (device, fqdd, metric)
+        with self._lock:
+            series = self._series.get(key, None)
+            if series is None:
+                series = deque(maxlen=self.max_samples)
+                self._series[key] = series
+            elif len(series) > 0 and series[-1][0] >= timestamp:
+                return False
+            series.append((timestamp, value))
+        return True
+
+    def series(self, device, fqdd, metric):
+        """Samples of a series
+
+        :return: list of (timestamp, value), oldest first
+        :rtype: list
+        """
+        with self._lock:
+            return list(self._series.get((device, fqdd, metric), []))
+
+    def latest(self, device, fqdd=None):
+        """Latest sample of every series of the device
+
+        :param fqdd: only the series of this component
+        :return: {fqdd: {metric: (timestamp, value)}}
+        :rtype: dict
+        """
+        retval = {}
+        with self._lock:
+            for ((sdevice, sfqdd, metric), series) in self._series.items():
+                if sdevice != device or len(series) <= 0:
+                    continue
+                if fqdd is not None and sfqdd != fqdd:
+                    continue
+                retval.setdefault(sfqdd, {})[metric] = series[-1]
+        return retval
+
+    def devices(self):
+        with self._lock:
+            return sorted(set(key[0] for key in self._series))
+
+    def components(self, device):
+        with self._lock:
+            return sorted(set(key[1] for key in self._series if key[0] == device))
+
+    def clear(self, device=None):
+        with self._lock:
+            if device is None:
+                self._series = {}
+                return
+            for key in list(self._series):
+                if key[0] == device:
+                    del self._series[key]
+
+
+TimestampPattern = re.compile(r'^(\d{4}-\d{2}-\d{2})T(\d{2}:\d{2}:\d{2})(\.\d+)?(Z|[+-]\d{2}:?\d{2})?$')
+
+
+def parse_timestamp(value):
+    """Convert a Redfish timestamp to seconds since the epoch
+
+    :return: seconds since the epoch, None if value is not a timestamp
+    :rtype: float
+    """
+    if not value:
+        return None
+    match = TimestampPattern.match(value.strip())
+    if not match:
+        return None
+    (date, clock, fraction, zone) = match.groups()
+    stamp = datetime.strptime(date + 'T' + clock, '%Y-%m-%dT%H:%M:%S')
+    seconds = (stamp - datetime(1970, 1, 1)).total_seconds()
+    if fraction:
+        seconds = seconds + float(fraction)
+    if zone and zone != 'Z':
+        offset = zone.replace(':', '')
+        delta = int(offset[1:3]) * 3600 + int(offset[3:5]) * 60
+        if offset[0] == '+':
+            seconds = seconds - delta
+        else:
+            seconds = seconds + delta
+    return seconds
+
+
+class RedfishTelemetry(object):
+    """
+    Reads the metric reports of a Redfish TelemetryService into a TimeSeriesStore
+
+    Sensor readings are polled from TelemetryService/MetricReports, or
+    pushed by the service over Server-Sent Events, without enumerating
+    the inventory views of the device.
+    """
+    def __init__(self, proto, store=None, device=None):
+        """
+        :param proto: connected Redfish protocol of the device
+        :param store: time series to fill, a new one by default
+        :param device: key of the device in the store, the ip address by default
+        :type proto: omsdk.http.sdkredfishbase.RedfishProtocolBase
+        :type store: TimeSeriesStore
+        :type device: str
+        """
+        self.proto = proto
+        self.store = store
+        if self.store is None:
+            self.store = TimeSeriesStore()
+        self.device = device
+        if self.device is None:
+            self.device = proto.ipaddr
+        self._sse_thread = None
+        self._sse_response = None
+        self._stop = threading.Event()
+
+    def is_supported(self):
+        """Check if the device has an enabled TelemetryService
+
+        :rtype: bool
+        """
+        retval = self.proto.get_resource('TelemetryService', False)
+        if retval['Status'] != 'Success':
+            return False
+        service = retval['Data']
+        if service.get('ServiceEnabled', True) is False:
+            return False
+        status = service.get('Status', {})
+        return status.get('State', 'Enabled') == 'Enabled'
+
+    def _fqdd(self, value, report):
+        oem = value.get('Oem', {}).get('Dell', {})
+        for attr in ['FQDD', 'ContextID']:
+            if oem.get(attr, None):
+                return oem[attr]
+        prop = value.get('MetricProperty', None)
+        if prop:
+            # /redfish/v1/Chassis/System.Embedded.1/Thermal#/Fans/0/Reading
+            # without an FQDD, the property path less its name tells the sensor apart
+            return prop.rsplit('/', 1)[0]
+        # otherwise only the metric tells the sensors of a report apart
+        metric = value.get('MetricId', None)
+        if metric is None:
+            return None
+        return '/'.join([i for i in [report.get('Id', None), metric] if i])
+
+    def ingest(self, report):
+        """Add the numeric samples of a MetricReport to the store
+
+        :param report: MetricReport resource or event
+        :type report: dict
+        :return: number of samples added
+        :rtype: int
+        """
+        count = 0
+        default_time = parse_timestamp(report.get('Timestamp', None))
+        if default_time is None:
+            default_time = time.time()
+        for value in report.get('MetricValues', []):
+            metric = value.get('MetricId', None)
+            try:
+                reading = float(value.get('MetricValue', None))
+            except (TypeError, ValueError):
+                continue
+            timestamp = parse_timestamp(value.get('Timestamp', None))
+            if timestamp is None:
+                timestamp = default_time
+            fqdd = self._fqdd(value, report)
+            if metric is None or fqdd is None:
+                continue
+            if self.store.add(self.device, fqdd, metric, timestamp, reading):
+                count = count + 1
+        return count
+
+    def poll(self, reports=None):
+        """Read the metric reports of the device
+
+        :param reports: ids of the reports to read, all by default
+        :type reports: list
+        :return: {'Status': 'Success', 'Data': {report id: samples added}}
+        :rtype: dict
+        """
+        retval = {'Status': 'Success', 'Data': {}}
+        try:
+            for report in self.proto.iterate_members('TelemetryService/MetricReports', expand=True):
+                if reports is not None and report.get('Id', None) not in reports:
+                    continue
+                retval['Data'][report.get('Id', None)] = self.ingest(report)
+        except Exception as ex:
+            logger.debug(self.device + ": reading metric reports failed: " + str(ex))
+            retval['Status'] = 'Failed'
+            retval['Message'] = str(ex)
+        return retval
+
+    def sse_uri(self):
+        """ServerSentEventUri of the EventService, None if not supported
+
+        :rtype: str
+        """
+        retval = self.proto.get_resource('EventService', False)
+        if retval['Status'] != 'Success':
+            return None
+        return retval['Data'].get('ServerSentEventUri', None)
+
+    def start_sse(self, callback=None):
+        """Ingest the metric reports the device pushes over Server-Sent Events
+
+        The stream is read in a background thread, reconnecting when it
+        drops, until stop() is called.
+
+        :param callback: called as callback(report, samples added) for every metric report
+        :return: False if the device does not support Server-Sent Events
+        :rtype: bool
+        """
+        uri = self.sse_uri()
+        if not uri:
+            return False
+        self._stop.clear()
+        self._sse_thread = threading.Thread(name="omsdk-sse-" + str(self.device),
+                                            target=self._sse_loop, args=(uri, callback))
+        self._sse_thread.daemon = True
+        self._sse_thread.start()
+        return True
+
+    def stop(self, timeout=5):
+        """Stop reading the Server-Sent Events stream"""
+        self._stop.set()
+        response = self._sse_response
+        if response is not None:
+            # closing the response would wait for the blocked reader,
+            # shutting the socket down wakes it up instead
+            conn = getattr(response.raw, 'connection', None)
+            sock = getattr(conn, 'sock', None)
+            try:
+                if sock is not None:
+                    sock.shutdown(socket.SHUT_RDWR)
+            except Exception as ex:
+                logger.debug(str(ex))
+        if self._sse_thread is not None:
+            self._sse_thread.join(timeout)
+            self._sse_thread = None
+
+    def _sse_loop(self, uri, callback):
+        url = self.proto._path_url(uri) + "?$filter=EventFormatType eq MetricReport"
+        while not self._stop.is_set():
+            try:
+                response = self.proto.session.get(url, stream=True,
+                                headers={'Accept': 'text/event-stream'},
+                                timeout=(self.proto.pOptions.connection_timeout, None))
+                self._sse_response = response
+                if not response.ok:
+                    logger.debug(self.device + ": SSE stream failed with status code " +
+                                 str(response.status_code))
+                    response.close()
+                    self._stop.wait(self.proto.pOptions.read_timeout)
+                    continue
+                for event in self._sse_events(response):
+                    if 'MetricValues' in event:
+                        count = self.ingest(event)
+                        if callback:
+                            callback(event, count)
+                response.close()
+            except Exception as ex:
+                if not self._stop.is_set():
+                    logger.debug(self.device + ": SSE stream dropped: " + str(ex))
+                    self._stop.wait(1)
+            finally:
+                self._sse_response = None
+
+    def _sse_events(self, response):
+        data = []
+        # events are small and must not wait for a full chunk
+        for line in response.iter_lines(chunk_size=1, decode_unicode=True):
+            if self._stop.is_set():
+                return
+            if line is None:
+                continue
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+            if line == '':
+                if data:
+                    try:
+                        yield json.loads('\n'.join(data))
+                    except ValueError as ex:
+                        logger.debug(self.device + ": bad SSE event: " + str(ex))
+                    data = []
+            elif line.startswith('data:'):
+                data.append(line[5:].lstrip())
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#
+# Copyright © 2018 Dell Inc. or its subsidiaries. All rights reserved.
+# Dell, EMC, and other trademarks are trademarks of Dell Inc. or its subsidiaries.
+# Other trademarks may be trademarks of their respective owners.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import sys
+import time
+import logging
+import threading
+from collections import deque
+
+PY2 = sys.version_info[0] == 2
+PY3 = sys.version_info[0] == 3
+
+if PY2:
+    import Queue as queue
+else:
+    import queue
+
+logger = logging.getLogger(__name__)
+
+
+class WorkItem(object):
+    """
+    A unit of work submitted to a WorkerPool
+    """
+    def __init__(self, func, args, kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.status = 'Pending'
+        self.result = None
+        self.exception = None
+        self.start_time = None
+        self.end_time = None
+        self.abandoned = False
+        self.discard = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    def _run(self):
+        with self._lock:
+            if self.status != 'Pending':
+                return
+            self.status = 'Running'
+            self.start_time = time.time()
+        result = None
+        exception = None
+        try:
+            result = self.func(*self.args, **self.kwargs)
+            status = 'Done'
+        except Exception as ex:
+            logger.debug("Work item failed: " + str(ex))
+            exception = ex
+            status = 'Failed'
+        if not self._finish(status, result, exception):
+            # abandoned while running, nobody is waiting for this result
+            if self.discard is not None and result is not None:
+                try:
+                    self.discard(result)
+                except Exception as ex:
+                    logger.debug("Work item discard failed: " + str(ex))
+
+    def _finish(self, status, result=None, exception=None):
+        with self._lock:
+            if self._done.is_set():
+                return False
+            self.status = status
+            self.result = result
+            self.exception = exception
+            self.end_time = time.time()
+            self._done.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            self._invoke(callback)
+        return True
+
+    def _invoke(self, callback):
+        try:
+            callback(self)
+        except Exception as ex:
+            logger.debug("Work item callback failed: " + str(ex))
+
+    def add_done_callback(self, callback):
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        self._invoke(callback)
+
+    def cancel(self):
+        """Cancel the work item if it has not started running yet
+
+        :return: True if the item was cancelled
+        :rtype: bool
+        """
+        with self._lock:
+            if self.status != 'Pending':
+                return False
+            self.status = 'Cancelled'
+        self._finish('Cancelled')
+        return True
+
+    def done(self):
+        return self._done.is_set()
+
+    def running(self):
+        return self.status == 'Running'
+
+    def elapsed(self):
+        if self.start_time is None:
+            return 0.0
+        end_time = self.end_time
+        if end_time is None:
+            end_time = time.time()
+        return end_time - self.start_time
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def get(self, timeout=None):
+        """Wait for the work item and return its result
+
+        Re-raises the exception raised by the work function, if any.
+        """
+        self.wait(timeout)
+        if self.exception is not None:
+            raise self.exception
+        return self.result
+
+
+class WorkerPool(object):
+    """
+    Bounded pool of worker threads
+
+    At most max_workers items run at any point of time. A running item
+    which overruns its deadline can be abandoned: the pool stops waiting for
+    it and starts a replacement worker, so that one hung device does not
+    hold a slot for the rest of the run.
+    """
+    def __init__(self, max_workers=8, name="omsdk-worker"):
+        if max_workers < 1:
+            max_workers = 1
+        self.max_workers = max_workers
+        self.name = name
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = 0
+        self._counter = 0
+        self._shutdown = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown(wait=(exc_type is None))
+        return False
+
+    def _spawn(self):
+        self._counter = self._counter + 1
+        thr = threading.Thread(name=self.name + "-" + str(self._counter),
+                               target=self._worker)
+        thr.daemon = True
+        self._workers = self._workers + 1
+        thr.start()
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            item._run()
+            if item.abandoned:
+                # abandon() has already handed this slot to a new worker
+                return
+        with self._lock:
+            self._workers = self._workers - 1
+
+    def submit(self, func, *args, **kwargs):
+        """Queue func(*args, **kwargs) for execution
+
+        :return: handle to track the execution
+        :rtype: WorkItem
+        """
+        item = WorkItem(func, args, kwargs)
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot submit after shutdown")
+            if self._workers < self.max_workers:
+                self._spawn()
+        self._queue.put(item)
+        return item
+
+    def abandon(self, item, status='TimedOut', discard=None):
+        """Stop waiting for a running item and free up its slot
+
+        The item is marked done with the given status; its eventual result
+        is dropped, after being passed to discard(result) if given.
+        """
+        if item.cancel():
+            return True
+        with item._lock:
+            if item._done.is_set():
+                return False
+            item.discard = discard
+            item.abandoned = True
+        item._finish(status)
+        with self._lock:
+            # worker running the item exits once it returns
+            self._workers = self._workers - 1
+            if not self._shutdown:
+                self._spawn()
+        return True
+
+    def map_unordered(self, func, iterable, timeout=None):
+        """Run func over iterable and yield (arg, WorkItem) as each completes
+
+        :param timeout: per item deadline in seconds, measured from the
+            time the item starts running. Items overrunning it are
+            abandoned and yielded with status 'TimedOut'.
+        """
+        completed = queue.Queue()
+        inflight = {}
+        pending = deque()
+        for arg in iterable:
+            item = self.submit(func, arg)
+            inflight[item] = arg
+            item.add_done_callback(completed.put)
+        while inflight:
+            try:
+                item = completed.get(timeout=self._tick(timeout))
+                pending.append(item)
+            except queue.Empty:
+                pass
+            if timeout is not None:
+                now = time.time()
+                for item in list(inflight):
+                    if item.start_time is not None and \
+                            not item.done() and \
+                            now - item.start_time > timeout:
+                        self.abandon(item)
+            while pending:
+                item = pending.popleft()
+                if item in inflight:
+                    yield (inflight.pop(item), item)
+
+    def _tick(self, timeout):
+        if timeout is None:
+            return 1.0
+        return max(0.05, min(1.0, timeout / 10.0))
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            workers = self._workers
+        for i in range(0, workers):
+            self._queue.put(None)
+        if wait:
+            while True:
+                with self._lock:
+                    if self._workers <= 0:
+                        break
+                time.sleep(0.01)
@@ -8,6 +8,7 @@ https://github.com/pypa/sampleproject
 # Always prefer setuptools over distutils
 import sys
 from setuptools import setup, find_packages
+from setuptools.command.build_py import build_py
 # To use a consistent encoding
 from codecs import open
 from os import path
@@ -50,8 +51,22 @@ sys.argv.append('--single-version-externally-managed')
 sys.argv.append('--record')
 sys.argv.append('setup_file.txt')
 
+
+# modules with Python 3 only syntax (async def), left out of Python 2 builds
+py3_only_modules = [('omsdk', 'sdksnmppoll')]
+
+
+class build_py_versioned(build_py):
+    def find_package_modules(self, package, package_dir):
+        modules = build_py.find_package_modules(self, package, package_dir)
+        if sys.version_info[0] == 2:
+            modules = [m for m in modules if m[0:2] not in py3_only_modules]
+        return modules
+
+
 setup(
     name='omsdk',
+    cmdclass={'build_py': build_py_versioned},
     # Versions should comply with PEP440.  For a discussion on single-sourcing
     # the version across setup.py and the project code, see
     # https://packaging.python.org/en/latest/single_source_version.html